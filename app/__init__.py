@@ -1,24 +1,36 @@
 import logging
+import os
+import time
 from flask import Flask, request
 import uuid
 from .config import Config
 from werkzeug.middleware.proxy_fix import ProxyFix
 from .swagger import configure_swagger
 from .utils.logging_config import configure_logging
-from .middleware import register_middlewares
+from .middleware import register_middlewares, RequestDecompressionMiddleware
 from .services.validation_service import HospitalCsvValidator
+from .services.parallel_validation import ParallelCsvValidator
 from .utils.csv_parser import CsvHospitalParser
-from .services.hospital_api_client import HospitalApiClient
+from .services.hospital_api_client import HospitalApiClient, LatencyTracker, parse_timeouts
+from .services.http_pool import SharedHttpPool
+from .services.upstream_metrics import UpstreamMetrics
+from .services.app_metrics import AppMetrics
+from .services.profiler import Profiler
+from .services.memory_diagnostics import MemoryDiagnostics
+from .services.upstream_recording import TrafficRecorder, ReplayAdapter, replay_session
 from .services.batch_processor import BatchProcessor
 from .repository.hospital_batch_repository import HospitalBatchRepository
+from .repository.hospital_index import HospitalIndexRepository
+from .repository.idempotency import IdempotencyRepository
 from .services.batch_service import BatchService
 from .utils.openapi_auto import assert_route_docs
-from .constants import EXT_BATCH_PROCESSOR, EXT_BATCH_REPOSITORY, EXT_CSV_VALIDATOR, EXT_BATCH_SERVICE
+from .constants import EXT_BATCH_PROCESSOR, EXT_BATCH_REPOSITORY, EXT_CSV_VALIDATOR, EXT_BATCH_SERVICE, EXT_HOSPITAL_INDEX, EXT_HTTP_POOL, EXT_UPSTREAM_METRICS, EXT_APP_METRICS, EXT_PROFILER, EXT_MEMORY_DIAGNOSTICS
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_port=1, x_prefix=1)
+    app.wsgi_app = RequestDecompressionMiddleware(app.wsgi_app, max_ratio=app.config.get('UPLOAD_MAX_DECOMPRESSION_RATIO'))
     
     configure_logging(app)
     
@@ -26,27 +38,105 @@ def create_app(config_class=Config):
     
     from .api import bp as api_bp
     app.register_blueprint(api_bp)
+    if app.config.get('METRICS_ENABLED', True):
+        from .api.metrics_routes import metrics_bp
+        app.register_blueprint(metrics_bp)
+    if app.config.get('ADMIN_TOKEN'):
+        from .api.admin_routes import admin_bp
+        app.register_blueprint(admin_bp)
     
     configure_swagger(app)
     
+    http_pool = SharedHttpPool(
+        pool_maxsize=app.config.get('HTTP_POOL_MAXSIZE', 32),
+        pool_block=app.config.get('HTTP_POOL_BLOCK', False),
+        keep_alive=app.config.get('HTTP_KEEP_ALIVE', True),
+    )
+
+    upstream_timeouts = parse_timeouts(
+        app.config.get('UPSTREAM_TIMEOUTS', ''),
+        connect=app.config.get('UPSTREAM_CONNECT_TIMEOUT'),
+        read=app.config.get('UPSTREAM_READ_TIMEOUT'),
+    )
+    upstream_latency = LatencyTracker()
+    upstream_metrics = UpstreamMetrics()
+    record_path = app.config.get('UPSTREAM_RECORD_PATH')
+    recorder = TrafficRecorder(record_path) if record_path else None
+    replay_path = app.config.get('UPSTREAM_REPLAY_PATH')
+    replay = ReplayAdapter.from_file(replay_path, speed=app.config.get('UPSTREAM_REPLAY_SPEED', 1.0)) if replay_path else None
+    if replay is not None:
+        app.logger.info(f"Replaying upstream traffic from {replay_path} instead of calling the Hospital Directory API")
+
     def client_factory():
-        return HospitalApiClient(base_url=app.config['HOSPITAL_API_BASE_URL'])
+        # One client per batch run, so the deadline covers that run
+        deadline_seconds = app.config.get('BATCH_DEADLINE_SECONDS', 0)
+        return HospitalApiClient(
+            # A replay never reaches the network, so it needs no real upstream URL
+            base_url=app.config['HOSPITAL_API_BASE_URL'] or ('http://upstream.replay' if replay is not None else None),
+            session_factory=(lambda: replay_session(replay)) if replay is not None else http_pool.session,
+            timeouts=upstream_timeouts,
+            deadline=time.monotonic() + deadline_seconds if deadline_seconds > 0 else None,
+            hedge=app.config.get('UPSTREAM_HEDGE_GETS', False),
+            hedge_delay=app.config.get('UPSTREAM_HEDGE_DELAY_SECONDS', 1.0),
+            latency=upstream_latency,
+            metrics=upstream_metrics,
+            recorder=recorder,
+        )
 
-    repository = HospitalBatchRepository()
+    app_metrics = AppMetrics()
+    profiler = Profiler(
+        os.path.join(app.config.get('LOG_DIR', 'logs'), 'profiles'),
+        max_per_minute=app.config.get('PROFILE_MAX_PER_MINUTE', 6),
+        batches=app.config.get('PROFILE_BATCHES', False),
+        keep_files=app.config.get('PROFILE_KEEP_FILES', 50),
+    )
+    repository = HospitalBatchRepository(lock_wait_observer=app_metrics.observe_lock_wait)
+    hospital_index = HospitalIndexRepository(app.config.get('HOSPITAL_INDEX_PATH')) if app.config.get('CROSS_BATCH_DEDUP', True) else None
     batch_processor = BatchProcessor(
         client_factory=client_factory,
         repository=repository,
-        logger=logging.getLogger('app.batch_processor')
+        logger=logging.getLogger('app.batch_processor'),
+        hospital_index=hospital_index,
+        sub_batch_workers=app.config.get('SUB_BATCH_CONCURRENCY', 4),
+        row_log_every=app.config.get('ROW_LOG_EVERY', 100),
+        progress_log_seconds=app.config.get('PROGRESS_LOG_SECONDS', 10.0),
+        metrics=app_metrics,
+        profiler=profiler,
     )
-    validator = HospitalCsvValidator()
+    validator = HospitalCsvValidator(duplicate_mode=app.config.get('DUPLICATE_ROWS_MODE', 'flag'))
     parser = CsvHospitalParser()
-    batch_service = BatchService(validator=validator, repository=repository, processor=batch_processor)
+    parallel_validator = None
+    if app.config.get('PARALLEL_VALIDATION_MIN_BYTES', 0) > 0:
+        parallel_validator = ParallelCsvValidator(
+            validator,
+            workers=app.config.get('PARALLEL_VALIDATION_WORKERS'),
+            chunk_bytes=app.config.get('PARALLEL_VALIDATION_CHUNK_BYTES'),
+            spool_dir=app.config.get('UPLOAD_SPOOL_DIR'),
+        )
+    idempotency_window = app.config.get('IDEMPOTENCY_WINDOW_SECONDS', 0)
+    idempotency = IdempotencyRepository(idempotency_window) if idempotency_window > 0 else None
+    batch_service = BatchService(
+        validator=validator,
+        repository=repository,
+        processor=batch_processor,
+        parallel_validator=parallel_validator,
+        idempotency=idempotency,
+        reconcile_on_resume=app.config.get('RESUME_RECONCILE', True),
+    )
 
     app.extensions = getattr(app, 'extensions', {})
     app.extensions[EXT_BATCH_PROCESSOR] = batch_processor
     app.extensions[EXT_BATCH_REPOSITORY] = repository
     app.extensions[EXT_CSV_VALIDATOR] = validator
     app.extensions[EXT_BATCH_SERVICE] = batch_service
+    app.extensions[EXT_HOSPITAL_INDEX] = hospital_index
+    app.extensions[EXT_HTTP_POOL] = http_pool
+    app.extensions[EXT_UPSTREAM_METRICS] = upstream_metrics
+    app.extensions[EXT_APP_METRICS] = app_metrics
+    app.extensions[EXT_PROFILER] = profiler
+    app.extensions[EXT_MEMORY_DIAGNOSTICS] = MemoryDiagnostics(repository, max_snapshots=app.config.get('TRACEMALLOC_MAX_SNAPSHOTS', 4))
+    if replay is None:
+        http_pool.prewarm_in_background(app.config.get('HOSPITAL_API_BASE_URL'), app.config.get('HTTP_PREWARM_CONNECTIONS', 0))
 
     strict_docs = app.config.get('OPENAPI_STRICT_DOCS', False)
     try:
@@ -0,0 +1,355 @@
+import logging
+from functools import wraps
+
+from flask import Blueprint, request, jsonify, current_app
+from ..constants import EXT_UPSTREAM_METRICS, EXT_PROFILER, EXT_MEMORY_DIAGNOSTICS
+from ..services.memory_diagnostics import GROUP_BY_CHOICES, TracingNotStarted
+from ..utils.admin_auth import admin_token_valid
+
+logger = logging.getLogger(__name__)
+
+# Registered by create_app only when ADMIN_TOKEN is set
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/v1')
+
+
+def admin_only(view):
+    """Require the ``X-Admin-Token`` header to match ``ADMIN_TOKEN``."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not admin_token_valid():
+            logger.warning(f"Rejected admin request to {request.path}")
+            return jsonify({'error': 'Admin token required'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@admin_bp.route('/admin/upstream-metrics', methods=['GET'])
+@admin_only
+def upstream_metrics():
+    """
+    Latency, error and byte counters for Hospital Directory API calls.
+
+    ---
+    get:
+      tags: [Admin]
+      summary: Upstream call metrics
+      description: Per-endpoint call counts, latency summaries (p50/p95/p99, in seconds) by status code, error counts by kind and request/response body bytes since startup or the last reset. Requires X-Admin-Token; not served unless ADMIN_TOKEN is set.
+      parameters:
+        - in: query
+          name: reset
+          required: false
+          schema:
+            type: boolean
+          description: Clear the counters after reading them
+      responses:
+        '200':
+          description: Upstream metrics snapshot
+        '401':
+          description: Missing or wrong admin token
+    """
+    metrics = current_app.extensions.get(EXT_UPSTREAM_METRICS)
+    snapshot = metrics.snapshot()
+    if request.args.get('reset', '').lower() in ('1', 'true', 'yes'):
+        metrics.reset()
+        logger.info("Upstream metrics reset")
+    return jsonify(snapshot), 200
+
+
+@admin_bp.route('/admin/profiling', methods=['GET', 'POST'])
+@admin_only
+def profiling():
+    """
+    Inspect or change opt-in cProfile capture.
+
+    ---
+    get:
+      tags: [Admin]
+      summary: Profiling state
+      description: Rate cap, whether batch runs are profiled, how many upcoming requests are armed for profiling, the output directory and the ids of the most recent profiles. Requires X-Admin-Token; not served unless ADMIN_TOKEN is set.
+      responses:
+        '200':
+          description: Profiling state
+        '401':
+          description: Missing or wrong admin token
+    post:
+      tags: [Admin]
+      summary: Change profiling
+      description: Switch profiling of whole batch runs on or off and/or profile the next N requests. Profiles are written to LOG_DIR/profiles as .pstats and .collapsed files, subject to PROFILE_MAX_PER_MINUTE. Requires X-Admin-Token; not served unless ADMIN_TOKEN is set.
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                batches:
+                  type: boolean
+                requests:
+                  type: integer
+                  minimum: 0
+      responses:
+        '200':
+          description: Updated profiling state
+        '400':
+          description: Invalid settings
+        '401':
+          description: Missing or wrong admin token
+    """
+    profiler = current_app.extensions.get(EXT_PROFILER)
+    if request.method == 'POST':
+        settings = request.get_json(silent=True)
+        if not isinstance(settings, dict):
+            return jsonify({'error': 'Expected a JSON object with batches and/or requests'}), 400
+        batches = settings.get('batches')
+        requests_to_profile = settings.get('requests')
+        if batches is not None and not isinstance(batches, bool):
+            return jsonify({'error': 'batches must be a boolean'}), 400
+        if requests_to_profile is not None and (isinstance(requests_to_profile, bool) or not isinstance(requests_to_profile, int) or requests_to_profile < 0):
+            return jsonify({'error': 'requests must be a non-negative integer'}), 400
+        profiler.configure(batches=batches, requests=requests_to_profile)
+        logger.info(f"Profiling updated: batches={profiler.batches}, armed requests={requests_to_profile}")
+    return jsonify(profiler.state()), 200
+
+
+def _int_arg(name, default):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    return int(value)
+
+
+def _report_args():
+    group_by = request.args.get('group_by', 'lineno')
+    if group_by not in GROUP_BY_CHOICES:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY_CHOICES)}")
+    return _int_arg('limit', 20), group_by
+
+
+@admin_bp.route('/admin/memory', methods=['GET'])
+@admin_only
+def memory_status():
+    """
+    tracemalloc state.
+
+    ---
+    get:
+      tags: [Admin]
+      summary: Memory tracing state
+      description: Whether tracemalloc is running, with how many frames, traced and peak traced bytes, tracemalloc's own overhead and the ids of stored snapshots. Requires X-Admin-Token; not served unless ADMIN_TOKEN is set.
+      responses:
+        '200':
+          description: Tracing state
+        '401':
+          description: Missing or wrong admin token
+    """
+    return jsonify(current_app.extensions.get(EXT_MEMORY_DIAGNOSTICS).status()), 200
+
+
+@admin_bp.route('/admin/memory/tracing', methods=['POST'])
+@admin_only
+def memory_tracing():
+    """
+    Start or stop tracemalloc.
+
+    ---
+    post:
+      tags: [Admin]
+      summary: Start or stop memory tracing
+      description: Tracing slows every allocation, so it is off until started here. Stopping drops stored snapshots. Requires X-Admin-Token; not served unless ADMIN_TOKEN is set.
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+              type: object
+              required: [enabled]
+              properties:
+                enabled:
+                  type: boolean
+                frames:
+                  type: integer
+                  minimum: 1
+                  description: Stack frames kept per allocation (default 1)
+      responses:
+        '200':
+          description: Tracing state after the change
+        '400':
+          description: Invalid settings
+        '401':
+          description: Missing or wrong admin token
+    """
+    diagnostics = current_app.extensions.get(EXT_MEMORY_DIAGNOSTICS)
+    settings = request.get_json(silent=True)
+    if not isinstance(settings, dict) or not isinstance(settings.get('enabled'), bool):
+        return jsonify({'error': 'Expected a JSON object with a boolean enabled'}), 400
+    frames = settings.get('frames', 1)
+    if isinstance(frames, bool) or not isinstance(frames, int) or frames < 1:
+        return jsonify({'error': 'frames must be a positive integer'}), 400
+    if settings['enabled']:
+        diagnostics.start(frames)
+        logger.info(f"tracemalloc started with {frames} frames")
+    else:
+        diagnostics.stop()
+        logger.info("tracemalloc stopped")
+    return jsonify(diagnostics.status()), 200
+
+
+@admin_bp.route('/admin/memory/snapshots', methods=['POST'])
+@admin_only
+def memory_snapshot():
+    """
+    Take and store a tracemalloc snapshot.
+
+    ---
+    post:
+      tags: [Admin]
+      summary: Take a memory snapshot
+      description: Stores a snapshot for later diffs and returns its id; only the newest TRACEMALLOC_MAX_SNAPSHOTS are kept. Requires X-Admin-Token; not served unless ADMIN_TOKEN is set.
+      responses:
+        '201':
+          description: Snapshot id
+        '401':
+          description: Missing or wrong admin token
+        '409':
+          description: tracemalloc is not running
+    """
+    try:
+        snapshot_id = current_app.extensions.get(EXT_MEMORY_DIAGNOSTICS).take_snapshot()
+    except TracingNotStarted as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'snapshot_id': snapshot_id}), 201
+
+
+@admin_bp.route('/admin/memory/top', methods=['GET'])
+@admin_only
+def memory_top():
+    """
+    Top allocation sites right now.
+
+    ---
+    get:
+      tags: [Admin]
+      summary: Top allocation sites
+      description: The largest live allocation sites in a fresh snapshot, with size in bytes, block count and traceback. Requires X-Admin-Token; not served unless ADMIN_TOKEN is set.
+      parameters:
+        - in: query
+          name: limit
+          schema:
+            type: integer
+            default: 20
+        - in: query
+          name: group_by
+          schema:
+            type: string
+            enum: [lineno, filename, traceback]
+            default: lineno
+      responses:
+        '200':
+          description: Allocation sites, largest first
+        '400':
+          description: Invalid parameters
+        '401':
+          description: Missing or wrong admin token
+        '409':
+          description: tracemalloc is not running
+    """
+    try:
+        limit, group_by = _report_args()
+        sites = current_app.extensions.get(EXT_MEMORY_DIAGNOSTICS).top(limit=limit, group_by=group_by)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except TracingNotStarted as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'sites': sites}), 200
+
+
+@admin_bp.route('/admin/memory/diff', methods=['GET'])
+@admin_only
+def memory_diff():
+    """
+    Allocation growth between two snapshots.
+
+    ---
+    get:
+      tags: [Admin]
+      summary: Diff two memory snapshots
+      description: Sites whose live allocations changed most between snapshot "from" and snapshot "to", or a fresh snapshot when "to" is omitted. Requires X-Admin-Token; not served unless ADMIN_TOKEN is set.
+      parameters:
+        - in: query
+          name: from
+          required: true
+          schema:
+            type: integer
+        - in: query
+          name: to
+          schema:
+            type: integer
+        - in: query
+          name: limit
+          schema:
+            type: integer
+            default: 20
+        - in: query
+          name: group_by
+          schema:
+            type: string
+            enum: [lineno, filename, traceback]
+            default: lineno
+      responses:
+        '200':
+          description: Sites ordered by absolute size change
+        '400':
+          description: Invalid parameters
+        '401':
+          description: Missing or wrong admin token
+        '404':
+          description: Unknown snapshot id
+        '409':
+          description: tracemalloc is not running
+    """
+    try:
+        limit, group_by = _report_args()
+        from_id = _int_arg('from', None)
+        if from_id is None:
+            raise ValueError("from is required")
+        to_id = _int_arg('to', None)
+        sites = current_app.extensions.get(EXT_MEMORY_DIAGNOSTICS).diff(from_id, to_id, limit=limit, group_by=group_by)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except KeyError as e:
+        return jsonify({'error': f"Snapshot {e.args[0]} not found"}), 404
+    except TracingNotStarted as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'sites': sites}), 200
+
+
+@admin_bp.route('/admin/memory/batches', methods=['GET'])
+@admin_only
+def memory_batches():
+    """
+    Estimated memory held by stored batches.
+
+    ---
+    get:
+      tags: [Admin]
+      summary: Per-batch memory footprint
+      description: Walks every stored batch and estimates the bytes it holds, largest first, with bytes per hospital row. Works without tracemalloc. Each batch is measured under the repository lock, so this is slow for very large batches. Requires X-Admin-Token; not served unless ADMIN_TOKEN is set.
+      parameters:
+        - in: query
+          name: limit
+          schema:
+            type: integer
+          description: Only list the largest N batches
+      responses:
+        '200':
+          description: Footprint estimates
+        '400':
+          description: Invalid parameters
+        '401':
+          description: Missing or wrong admin token
+    """
+    try:
+        limit = _int_arg('limit', None)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify(current_app.extensions.get(EXT_MEMORY_DIAGNOSTICS).batch_footprints(limit=limit)), 200
@@ -0,0 +1,28 @@
+from flask import Blueprint, Response, current_app
+
+from ..constants import EXT_APP_METRICS, EXT_BATCH_REPOSITORY, EXT_UPSTREAM_METRICS
+from ..utils.prometheus import CONTENT_TYPE
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics for batch processing, upstream calls and API requests.
+
+    ---
+    get:
+      tags: [System]
+      summary: Prometheus metrics
+      description: Text exposition of row counters by outcome, batches by state, running batches, sub-batch queue depth, in-flight upstream calls, upstream latency histograms by endpoint and status, repository lock wait time and request latency by route.
+      responses:
+        '200':
+          description: Metrics in Prometheus text format
+    """
+    app_metrics = current_app.extensions.get(EXT_APP_METRICS)
+    body = app_metrics.render(
+        batch_states=current_app.extensions.get(EXT_BATCH_REPOSITORY).count_by_state(),
+        upstream=current_app.extensions.get(EXT_UPSTREAM_METRICS),
+    )
+    return Response(body, status=200, content_type=CONTENT_TYPE)
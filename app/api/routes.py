@@ -1,7 +1,7 @@
 import time
 import logging
-import io
-from flask import request, jsonify, current_app
+from contextlib import contextmanager
+from flask import request, jsonify, current_app, Response, stream_with_context
 from ..constants import (
     EXT_BATCH_PROCESSOR,
     EXT_CSV_VALIDATOR,
@@ -10,11 +10,89 @@ from ..constants import (
     KEY_PROCESSED_COUNT,
     KEY_FAILED_COUNT,
     KEY_STATUS,
+    EXPORT_FORMAT_NDJSON,
+    EXPORT_FORMAT_CSV,
 )
+from ..utils.streams import open_text_stream, open_gzip_stream, content_hash, stream_size, DecompressionError
 from . import bp
 
 logger = logging.getLogger(__name__)
 
+CSV_EXTENSIONS = ('.csv', '.csv.gz')
+
+
+def _is_gzipped(file):
+    return file.filename.lower().endswith('.gz')
+
+
+def _idempotency_key(file, batch_service, options):
+    """Key an upload by its normalised content hash and processing ``options``, scoped by the client's Idempotency-Key header if sent.
+
+    ``options`` are the resolved values (after config defaults and ``fail_fast``), so
+    a retry with different options is processed anew rather than replayed.
+    """
+    if not batch_service.supports_idempotency:
+        return None
+    digest = content_hash(file.stream, gzipped=_is_gzipped(file), max_ratio=current_app.config.get('UPLOAD_MAX_DECOMPRESSION_RATIO'))
+    if digest is None:
+        return None
+    scope = ",".join(f"{name}={value}" for name, value in sorted(options.items()))
+    client_key = request.headers.get('Idempotency-Key', '').strip()
+    return f"{client_key}:{digest}:{scope}" if client_key else f"{digest}:{scope}"
+
+
+def _query_flag(name, default):
+    raw = request.args.get(name)
+    if raw is None or raw == '':
+        return default
+    return raw.lower() == 'true'
+
+
+def _validation_limits():
+    """Read fail-fast/bounded-error options from the query string, falling back to config.
+
+    ``max_errors`` stops validation after that many failing rows, ``fail_fast=true``
+    means ``max_errors=1``, and ``error_limit`` caps the errors returned; 0 means unlimited.
+    Raises ValueError on non-integer values.
+    """
+    def _limit(name, default):
+        raw = request.args.get(name)
+        try:
+            value = default if raw is None or raw == '' else int(raw)
+        except ValueError:
+            value = -1
+        if value < 0:
+            raise ValueError(f"{name} must be a non-negative integer")
+        return value or None
+
+    max_errors = _limit('max_errors', current_app.config.get('VALIDATION_MAX_ERRORS', 0))
+    if _query_flag('fail_fast', False):
+        max_errors = 1
+    error_limit = _limit('error_limit', current_app.config.get('VALIDATION_ERROR_LIMIT', 0))
+    return {'max_errors': max_errors, 'error_limit': error_limit}
+
+
+@contextmanager
+def _open_csv_upload(file, batch_service):
+    """Yield (csv_source, parallel) for an uploaded file.
+
+    ``.csv.gz`` uploads are gunzipped incrementally on the way in. Uploads at or above
+    PARALLEL_VALIDATION_MIN_BYTES (compressed size for gzip) are handed over as raw bytes
+    for spooled, process-pool validation; everything else is decoded incrementally.
+    Requests without a Content-Length (``Content-Encoding: gzip`` bodies lose theirs when
+    decompressed) are measured by the size of the spooled file instead.
+    """
+    size = request.content_length or stream_size(file.stream) or 0
+    stream = file.stream
+    if _is_gzipped(file):
+        stream = open_gzip_stream(stream, max_ratio=current_app.config.get('UPLOAD_MAX_DECOMPRESSION_RATIO'))
+    min_bytes = current_app.config.get('PARALLEL_VALIDATION_MIN_BYTES', 0)
+    if batch_service.supports_parallel_validation and min_bytes > 0 and size >= min_bytes:
+        yield stream, True
+        return
+    with open_text_stream(stream) as csv_stream:
+        yield csv_stream, False
+
 @bp.route('/', methods=['GET'])
 def health_check():
     """
@@ -41,7 +119,38 @@ def bulk_create_hospitals():
     post:
       tags: [Hospitals]
       summary: Bulk create hospitals from CSV
-      description: Upload a CSV file with hospital data for background processing. Returns immediately with a batch ID.
+      description: Upload a CSV file with hospital data for background processing. Returns immediately with a batch ID. Repeating the same upload within the idempotency window returns the existing batch.
+      parameters:
+        - in: header
+          name: Idempotency-Key
+          required: false
+          schema:
+            type: string
+          description: Optional client key; combined with the CSV content hash to identify repeated uploads
+        - in: query
+          name: max_errors
+          required: false
+          schema:
+            type: integer
+          description: Stop validating after this many failing rows (0 = no limit)
+        - in: query
+          name: fail_fast
+          required: false
+          schema:
+            type: boolean
+          description: Stop at the first failing row (same as max_errors=1)
+        - in: query
+          name: error_limit
+          required: false
+          schema:
+            type: integer
+          description: Maximum number of errors returned (0 = no limit)
+        - in: query
+          name: split
+          required: false
+          schema:
+            type: boolean
+          description: Split an upload larger than MAX_HOSPITALS_PER_BATCH into concurrently processed sub-batches under one parent job (default AUTO_SPLIT_BATCHES)
       requestBody:
         content:
           multipart/form-data:
@@ -52,12 +161,20 @@ def bulk_create_hospitals():
                 file:
                   type: string
                   format: binary
-                  description: CSV file containing hospital data (name,address,phone)
+                  description: CSV file containing hospital data (name,address,phone), optionally gzip-compressed (.csv.gz)
       responses:
         '202':
           description: Request accepted, processing in background
+        '200':
+          description: Repeated upload; status of the batch created by the original upload
         '400':
-          description: Invalid request or CSV format
+          description: Invalid request, CSV format or compressed data
+        '409':
+          description: An identical upload is still being validated
+        '413':
+          description: Compressed upload exceeds the allowed decompression ratio
+        '415':
+          description: Unsupported Content-Encoding
     """
     start_time = time.time()
     logger.info("Bulk hospital creation request received")
@@ -70,15 +187,25 @@ def bulk_create_hospitals():
     filename = file.filename
     logger.info(f"Processing uploaded file: {filename}")
 
-    if filename == '' or not filename.endswith('.csv'):
+    if filename == '' or not filename.lower().endswith(CSV_EXTENSIONS):
         logger.warning(f"Invalid file format: {filename}")
-        return jsonify({'error': 'Invalid file format. Only CSV files are accepted'}), 400
+        return jsonify({'error': 'Invalid file format. Only CSV (.csv or .csv.gz) files are accepted'}), 400
 
     try:
-        csv_text = file.stream.read().decode("UTF-8")
-
+        limits = _validation_limits()
+        split = _query_flag('split', current_app.config.get('AUTO_SPLIT_BATCHES', False))
         batch_service = current_app.extensions.get(EXT_BATCH_SERVICE)
-        result = batch_service.bulk_create_hospitals(csv_text, max_hospitals=current_app.config.get('MAX_HOSPITALS_PER_BATCH'))
+        idempotency_key = _idempotency_key(file, batch_service, {'split': split, **limits})
+        with _open_csv_upload(file, batch_service) as (csv_source, parallel):
+            result = batch_service.bulk_create_hospitals(
+                csv_source,
+                max_hospitals=current_app.config.get('MAX_HOSPITALS_PER_BATCH'),
+                parallel=parallel,
+                idempotency_key=idempotency_key,
+                split=split,
+                max_sub_batches=current_app.config.get('MAX_SUB_BATCHES') or None,
+                **limits,
+            )
 
         elapsed_time = time.time() - start_time
         if not result.get("ok"):
@@ -88,9 +215,14 @@ def bulk_create_hospitals():
         body = result.get("body", {})
         batch_id = body.get('batch_id')
         hospital_count = body.get('total_hospitals', 0)
+        if body.get('idempotent_replay'):
+            logger.info(f"Repeated upload matched existing batch {batch_id} - {elapsed_time:.2f}s")
+            return jsonify(body), result.get("status", 200)
         logger.info(f"Bulk upload request accepted, batch {batch_id} ({hospital_count} hospitals) - {elapsed_time:.2f}s")
         return jsonify(body), result.get("status", 202)
 
+    except DecompressionError:
+        raise
     except UnicodeDecodeError:
         logger.error(f"File {filename} is not a valid UTF-8 encoded CSV")
         return jsonify({'error': 'File is not a valid UTF-8 encoded CSV'}), 400
@@ -111,6 +243,25 @@ def validate_hospitals_csv():
       tags: [Hospitals]
       summary: Validate hospital CSV
       description: Upload a CSV file to validate header and rows. No processing is started.
+      parameters:
+        - in: query
+          name: max_errors
+          required: false
+          schema:
+            type: integer
+          description: Stop validating after this many failing rows (0 = no limit)
+        - in: query
+          name: fail_fast
+          required: false
+          schema:
+            type: boolean
+          description: Stop at the first failing row (same as max_errors=1)
+        - in: query
+          name: error_limit
+          required: false
+          schema:
+            type: integer
+          description: Maximum number of errors returned (0 = no limit)
       requestBody:
         content:
           multipart/form-data:
@@ -121,12 +272,16 @@ def validate_hospitals_csv():
                 file:
                   type: string
                   format: binary
-                  description: CSV file containing hospital data (name,address,phone)
+                  description: CSV file containing hospital data (name,address,phone), optionally gzip-compressed (.csv.gz)
       responses:
         '200':
           description: Validation results
         '400':
-          description: Invalid request or CSV format
+          description: Invalid request, CSV format or compressed data
+        '413':
+          description: Compressed upload exceeds the allowed decompression ratio
+        '415':
+          description: Unsupported Content-Encoding
     """
     start_time = time.time()
     logger.info("CSV validation request received")
@@ -139,15 +294,24 @@ def validate_hospitals_csv():
     filename = file.filename
     logger.info(f"Validating uploaded file: {filename}")
 
-    if filename == '' or not filename.endswith('.csv'):
+    if filename == '' or not filename.lower().endswith(CSV_EXTENSIONS):
         logger.warning(f"Invalid file format for validation: {filename}")
-        return jsonify({'error': 'Invalid file format. Only CSV files are accepted'}), 400
+        return jsonify({'error': 'Invalid file format. Only CSV (.csv or .csv.gz) files are accepted'}), 400
 
     try:
-        csv_text = file.stream.read().decode("UTF-8")
+        limits = _validation_limits()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
+    try:
         batch_service = current_app.extensions.get(EXT_BATCH_SERVICE)
-        result = batch_service.validate_hospitals(csv_text, max_hospitals=current_app.config.get('MAX_HOSPITALS_PER_BATCH'))
+        with _open_csv_upload(file, batch_service) as (csv_source, parallel):
+            result = batch_service.validate_hospitals(
+                csv_source,
+                max_hospitals=current_app.config.get('MAX_HOSPITALS_PER_BATCH'),
+                parallel=parallel,
+                **limits,
+            )
         elapsed_time = time.time() - start_time
         if not result.get("valid"):
             logger.info(f"CSV invalid: {len(result.get('errors', []))} errors ({elapsed_time:.2f}s)")
@@ -156,6 +320,8 @@ def validate_hospitals_csv():
 
         return jsonify(result), 200
 
+    except DecompressionError:
+        raise
     except UnicodeDecodeError:
         logger.error(f"File {filename} is not a valid UTF-8 encoded CSV")
         return jsonify({'error': 'File is not a valid UTF-8 encoded CSV'}), 400
@@ -172,7 +338,7 @@ def get_batch_status(batch_id):
     get:
       tags: [Hospitals]
       summary: Get batch processing status
-      description: Get the current processing status of a hospital batch
+      description: Get the current processing status of a hospital batch. For a split upload's parent job, counts and rows are aggregated over its sub-batches, which are listed under sub_batches. An optional timings section breaks processing down into monotonic phase durations (validation, queue wait, create with per-row upstream p50/p95/max, activation, repository writes).
       parameters:
         - in: path
           name: batch_id
@@ -210,6 +376,73 @@ def get_batch_status(batch_id):
         return jsonify({'error': 'An unexpected error occurred while retrieving batch status'}), 500
 
 
+@bp.route('/hospitals/batch/<batch_id>/export', methods=['GET'])
+def export_batch(batch_id):
+    """
+    Stream per-row results of a batch as NDJSON or CSV
+
+    ---
+    get:
+      tags: [Hospitals]
+      summary: Export batch results
+      description: Stream row, name, status, hospital_id and error for every row of a batch, read from storage in chunks.
+      parameters:
+        - in: path
+          name: batch_id
+          required: true
+          schema:
+            type: string
+          description: Batch ID (UUID)
+        - in: query
+          name: format
+          required: false
+          schema:
+            type: string
+            enum: [ndjson, csv]
+            default: ndjson
+          description: Output format
+        - in: query
+          name: status
+          required: false
+          schema:
+            type: string
+          description: Comma-separated row statuses to include (e.g. failed)
+      responses:
+        '200':
+          description: Streamed rows
+        '400':
+          description: Unsupported format
+        '404':
+          description: Batch not found
+    """
+    fmt = request.args.get('format', EXPORT_FORMAT_NDJSON).lower()
+    status_arg = request.args.get('status', '')
+    statuses = [s.strip() for s in status_arg.split(',') if s.strip()] or None
+    logger.info(f"Export request for batch {batch_id} (format={fmt}, status={status_arg or '*'})")
+
+    try:
+        batch_service = current_app.extensions.get(EXT_BATCH_SERVICE)
+        result = batch_service.export_batch(
+            batch_id,
+            fmt=fmt,
+            statuses=statuses,
+            chunk_size=current_app.config.get('EXPORT_CHUNK_SIZE', 500),
+        )
+        if not result.get("ok"):
+            return jsonify(result.get("body", {})), result.get("status", 400)
+
+        if fmt == EXPORT_FORMAT_CSV:
+            mimetype = 'text/csv'
+            headers = {'Content-Disposition': f'attachment; filename="batch-{batch_id}.csv"'}
+        else:
+            mimetype = 'application/x-ndjson'
+            headers = {}
+        return Response(stream_with_context(result["stream"]), status=result.get("status", 200), mimetype=mimetype, headers=headers)
+    except Exception as e:
+        logger.exception(f"Error exporting batch {batch_id}: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred while exporting batch'}), 500
+
+
 @bp.route('/hospitals/batch/<batch_id>/resume', methods=['PATCH'])
 def resume_batch(batch_id):
     """
@@ -219,7 +452,7 @@ def resume_batch(batch_id):
     patch:
       tags: [Hospitals]
       summary: Resume batch processing
-      description: Resume processing for a previously started batch by re-queueing unprocessed or failed rows.
+      description: Resume processing for a previously started batch by re-queueing unprocessed or failed rows. For a split upload's parent job only incomplete sub-batches are resumed; a sub-batch id resumes that sub-batch alone.
       parameters:
         - in: path
           name: batch_id
@@ -243,4 +476,40 @@ def resume_batch(batch_id):
         return jsonify(body), status
     except Exception as e:
         logger.exception(f"Error resuming batch {batch_id}: {str(e)}")
-        return jsonify({'error': 'An unexpected error occurred while resuming batch'}), 500
\ No newline at end of file
+        return jsonify({'error': 'An unexpected error occurred while resuming batch'}), 500
+
+
+@bp.route('/hospitals/batch/<batch_id>/reconcile', methods=['POST'])
+def reconcile_batch(batch_id):
+    """
+    Match a batch's unprocessed rows against the hospitals the upstream API already holds for it.
+
+    ---
+    post:
+      tags: [Hospitals]
+      summary: Reconcile batch with the Hospital Directory API
+      description: Fetches the batch from the Hospital Directory API once and marks local rows whose hospital already exists upstream as created, so a later resume does not send them again. A split upload's parent job is reconciled sub-batch by sub-batch.
+      parameters:
+        - in: path
+          name: batch_id
+          required: true
+          schema:
+            type: string
+          description: Batch ID (UUID)
+      responses:
+        '200':
+          description: Reconciliation counts (upstream_hospitals, matched, missing)
+        '404':
+          description: Batch not found
+        '502':
+          description: The Hospital Directory API could not be reached
+    """
+    try:
+        batch_service = current_app.extensions.get(EXT_BATCH_SERVICE)
+        result = batch_service.reconcile_batch(batch_id)
+        body = result.get('body', {})
+        status = result.get('status', 200)
+        return jsonify(body), status
+    except Exception as e:
+        logger.exception(f"Error reconciling batch {batch_id}: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred while reconciling batch'}), 500
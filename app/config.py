@@ -6,12 +6,51 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'hard-to-guess-string'
     HOSPITAL_API_BASE_URL = os.environ.get('HOSPITAL_API_BASE_URL')
+    UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', '3.05'))
+    UPSTREAM_READ_TIMEOUT = float(os.environ.get('UPSTREAM_READ_TIMEOUT', '30'))
+    UPSTREAM_TIMEOUTS = os.environ.get('UPSTREAM_TIMEOUTS', '')
+    BATCH_DEADLINE_SECONDS = float(os.environ.get('BATCH_DEADLINE_SECONDS', '0'))
+    UPSTREAM_HEDGE_GETS = os.environ.get('UPSTREAM_HEDGE_GETS', 'false').lower() == 'true'
+    UPSTREAM_HEDGE_DELAY_SECONDS = float(os.environ.get('UPSTREAM_HEDGE_DELAY_SECONDS', '1.0'))
+    UPSTREAM_RECORD_PATH = os.environ.get('UPSTREAM_RECORD_PATH') or None
+    UPSTREAM_REPLAY_PATH = os.environ.get('UPSTREAM_REPLAY_PATH') or None
+    UPSTREAM_REPLAY_SPEED = float(os.environ.get('UPSTREAM_REPLAY_SPEED', '1.0'))
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '32'))
+    HTTP_POOL_BLOCK = os.environ.get('HTTP_POOL_BLOCK', 'false').lower() == 'true'
+    HTTP_KEEP_ALIVE = os.environ.get('HTTP_KEEP_ALIVE', 'true').lower() == 'true'
+    HTTP_PREWARM_CONNECTIONS = int(os.environ.get('HTTP_PREWARM_CONNECTIONS', '4'))
     MAX_HOSPITALS_PER_BATCH = int(os.environ.get('MAX_HOSPITALS_PER_BATCH', '20'))
+    RESUME_RECONCILE = os.environ.get('RESUME_RECONCILE', 'true').lower() == 'true'
+    AUTO_SPLIT_BATCHES = os.environ.get('AUTO_SPLIT_BATCHES', 'false').lower() == 'true'
+    MAX_SUB_BATCHES = int(os.environ.get('MAX_SUB_BATCHES', '50'))
+    SUB_BATCH_CONCURRENCY = int(os.environ.get('SUB_BATCH_CONCURRENCY', '4'))
     
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     LOG_DIR = os.environ.get('LOG_DIR', 'logs')
     LOG_FORMAT = os.environ.get('LOG_FORMAT', 'default')
+    ROW_LOG_EVERY = int(os.environ.get('ROW_LOG_EVERY', '100'))
+    PROGRESS_LOG_SECONDS = float(os.environ.get('PROGRESS_LOG_SECONDS', '10'))
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+    LOG_QUEUE_POLICY = os.environ.get('LOG_QUEUE_POLICY', 'block').lower()
+    PROFILE_MAX_PER_MINUTE = int(os.environ.get('PROFILE_MAX_PER_MINUTE', '6'))
+    PROFILE_BATCHES = os.environ.get('PROFILE_BATCHES', 'false').lower() == 'true'
+    PROFILE_KEEP_FILES = int(os.environ.get('PROFILE_KEEP_FILES', '50'))
+    TRACEMALLOC_MAX_SNAPSHOTS = int(os.environ.get('TRACEMALLOC_MAX_SNAPSHOTS', '4'))
     ENV = os.environ.get('FLASK_ENV', 'production')
     BATCH_STORAGE_DIR = os.environ.get('BATCH_STORAGE_DIR', 'batches')
+    PARALLEL_VALIDATION_MIN_BYTES = int(os.environ.get('PARALLEL_VALIDATION_MIN_BYTES', '0'))
+    PARALLEL_VALIDATION_WORKERS = int(os.environ.get('PARALLEL_VALIDATION_WORKERS', '0')) or None
+    PARALLEL_VALIDATION_CHUNK_BYTES = int(os.environ.get('PARALLEL_VALIDATION_CHUNK_BYTES', str(8 * 1024 * 1024)))
+    UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR') or None
+    DUPLICATE_ROWS_MODE = os.environ.get('DUPLICATE_ROWS_MODE', 'flag').lower()
+    CROSS_BATCH_DEDUP = os.environ.get('CROSS_BATCH_DEDUP', 'true').lower() == 'true'
+    HOSPITAL_INDEX_PATH = os.environ.get('HOSPITAL_INDEX_PATH') or None
+    IDEMPOTENCY_WINDOW_SECONDS = float(os.environ.get('IDEMPOTENCY_WINDOW_SECONDS', '600'))
+    UPLOAD_MAX_DECOMPRESSION_RATIO = float(os.environ.get('UPLOAD_MAX_DECOMPRESSION_RATIO', '100'))
+    VALIDATION_MAX_ERRORS = int(os.environ.get('VALIDATION_MAX_ERRORS', '0'))
+    VALIDATION_ERROR_LIMIT = int(os.environ.get('VALIDATION_ERROR_LIMIT', '1000'))
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '500'))
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN') or None
     OPENAPI_STRICT_DOCS = os.environ.get('OPENAPI_STRICT_DOCS', 'false').lower() == 'true'
 
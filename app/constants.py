@@ -6,6 +6,7 @@ STATUS_CREATED = "created"
 STATUS_ACTIVATED = "activated"
 STATUS_CREATED_AND_ACTIVATED = "created_and_activated"
 STATUS_FAILED = "failed"
+STATUS_LINKED = "linked"
 STATUS_COMPLETE = "complete"
 
 KEY_STATUS = "status"
@@ -17,6 +18,16 @@ KEY_FAILED_COUNT = "failed_hospitals"
 KEY_HOSPITALS = "hospitals"
 KEY_BATCH_ACTIVATED = "batch_activated"
 KEY_PROCESSING_TIME_SECONDS = "processing_time_seconds"
+KEY_SUB_BATCHES = "sub_batches"
+KEY_PARENT_BATCH_ID = "parent_batch_id"
+BATCH_KEY_SUB_BATCH_IDS = "sub_batch_ids"
+BATCH_KEY_PARENT_ID = "parent_id"
+BATCH_KEY_QUEUED_AT = "queued_at_monotonic"
+KEY_TIMINGS = "timings"
+
+BATCH_STATE_PROCESSING = "processing"
+BATCH_STATE_ACTIVATED = "activated"
+BATCH_STATE_INCOMPLETE = "incomplete"
 
 HOSPITAL_KEY_ROW = "row"
 HOSPITAL_KEY_NAME = "name"
@@ -25,16 +36,34 @@ HOSPITAL_KEY_PHONE = "phone"
 HOSPITAL_KEY_STATUS = "status"
 HOSPITAL_KEY_HOSPITAL_ID = "hospital_id"
 HOSPITAL_KEY_ERROR = "error"
+HOSPITAL_KEY_LINKED_BATCH_ID = "linked_batch_id"
+
+DUPLICATE_MODE_ALLOW = "allow"
+DUPLICATE_MODE_FLAG = "flag"
+DUPLICATE_MODE_COLLAPSE = "collapse"
+
+EXPORT_FORMAT_NDJSON = "ndjson"
+EXPORT_FORMAT_CSV = "csv"
 
 EXT_BATCH_PROCESSOR = "batch_processor"
 EXT_BATCH_REPOSITORY = "batch_repository"
 EXT_CSV_VALIDATOR = "csv_validator"
 EXT_BATCH_SERVICE = "batch_service"
+EXT_HOSPITAL_INDEX = "hospital_index"
+EXT_HTTP_POOL = "http_pool"
+EXT_UPSTREAM_METRICS = "upstream_metrics"
+EXT_APP_METRICS = "app_metrics"
+EXT_PROFILER = "profiler"
+EXT_MEMORY_DIAGNOSTICS = "memory_diagnostics"
+
+MAX_NAME_LENGTH = 255
+MAX_ADDRESS_LENGTH = 500
 
 # Validation error messages
 ERROR_NAME_REQUIRED = "name is required and cannot be empty"
 ERROR_ADDRESS_REQUIRED = "address is required and cannot be empty"
 ERROR_PHONE_INVALID = "phone must be a 10-digit number"
+ERROR_FIELD_TOO_LONG_TEMPLATE = "{column} must be at most {max_length} characters"
 ERROR_ROW_FEW_COLUMNS = "Row has fewer than required columns"
 ERROR_MISSING_REQUIRED_COLUMNS = "Missing required columns: name/address"
 ERROR_CSV_MIN_COLUMNS = "CSV must have at least 2 columns: name and address"
@@ -44,5 +73,12 @@ ERROR_CSV_INVALID_FORMAT_TEMPLATE = "Invalid CSV format: {error}"
 ERROR_CSV_INVALID_GENERIC = "Invalid CSV format"
 ERROR_MAX_HOSPITALS_EXCEEDED_TEMPLATE = "CSV contains {count} hospitals, maximum allowed is {max_allowed}"
 ERROR_NO_HOSPITAL_ROWS = "CSV contains 0 hospitals; at least 1 required"
+ERROR_DUPLICATE_ROW_TEMPLATE = "Duplicate of row {row} (same name and address)"
+
+# Validation error codes used in aggregated error counts
+ERROR_CODE_ROW_TOO_SHORT = "row_too_short"
+ERROR_CODE_DUPLICATE_ROW = "duplicate_row"
+ERROR_CODE_NO_ROWS = "no_rows"
+ERROR_CODE_MAX_HOSPITALS_EXCEEDED = "max_hospitals_exceeded"
 
 
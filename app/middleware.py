@@ -1,24 +1,121 @@
+import json
+import time
 import uuid
-from flask import request, current_app
+from flask import request, current_app, g
+from werkzeug.exceptions import HTTPException
+from werkzeug.wsgi import get_input_stream
+
+from .utils.streams import open_gzip_stream, DecompressionError, DecompressionBombError, DEFAULT_MAX_DECOMPRESSION_RATIO
+from .utils.logging_config import set_log_context, reset_log_context
+from .utils.admin_auth import admin_token_valid
+from .services.profiler import PROFILE_KIND_REQUEST
+from .constants import EXT_APP_METRICS, EXT_PROFILER
+
+GZIP_CONTENT_ENCODINGS = ("gzip", "x-gzip")
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
 
 
 def register_middlewares(app):
     """Register request/response and error handlers on the Flask app."""
 
     def assign_request_id():
+        g.request_started = time.perf_counter()
         request.id = str(uuid.uuid4())
+        # Captured once here; log records and background batch threads read it from the context
+        g.log_context_token = set_log_context(request_id=request.id, method=request.method, url=request.url, remote_addr=request.remote_addr)
         current_app.logger.debug(f"Request received: {request.method} {request.path}")
 
+    def start_request_profile():
+        profiler = current_app.extensions.get(EXT_PROFILER)
+        if profiler is None:
+            return
+        # The header is an admin capability: without a valid token it is ignored
+        requested = request.headers.get(PROFILE_HEADER, '').lower() in ('1', 'true', 'yes') and admin_token_valid()
+        if profiler.wants_request(requested):
+            g.profile = profiler.start()
+
+    def finish_request_profile(response):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile_id = current_app.extensions[EXT_PROFILER].finish(profile, PROFILE_KIND_REQUEST, f"{request.method}_{request.path}")
+            if profile_id:
+                response.headers[PROFILE_ID_HEADER] = profile_id
+        return response
+
+    def discard_request_profile(exc):
+        # Only set if the request failed before after_request ran
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.disable()
+
+    def record_request_latency(response):
+        metrics = current_app.extensions.get(EXT_APP_METRICS)
+        started = g.get('request_started')
+        if metrics is not None and started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            metrics.observe_request(route, request.method, response.status_code, time.perf_counter() - started)
+        return response
+
+    def clear_log_context(exc):
+        token = g.pop('log_context_token', None)
+        if token is not None:
+            reset_log_context(token)
+
     def log_response(response):
         current_app.logger.info(f"Request completed with status: {response.status_code}")
         return response
 
+    def handle_decompression_error(e):
+        current_app.logger.warning(f"Rejected compressed upload: {str(e)}")
+        status = 413 if isinstance(e, DecompressionBombError) else 400
+        return {"error": str(e)}, status
+
     def handle_exception(e):
+        # Routing and abort() errors (404, 405, ...) keep their own status
+        if isinstance(e, HTTPException):
+            return e
         current_app.logger.exception(f"Unhandled exception: {str(e)}")
         return {"error": "Internal server error"}, 500
 
     app.before_request(assign_request_id)
+    app.before_request(start_request_profile)
     app.after_request(log_response)
+    app.after_request(record_request_latency)
+    app.after_request(finish_request_profile)
+    app.teardown_request(discard_request_profile)
+    app.teardown_request(clear_log_context)
+    app.register_error_handler(DecompressionError, handle_decompression_error)
     app.register_error_handler(Exception, handle_exception)
 
 
+
+
+class RequestDecompressionMiddleware:
+    """WSGI middleware that gunzips request bodies sent with ``Content-Encoding: gzip``.
+
+    The body is replaced by an incrementally decompressing stream, so form parsing and
+    CSV validation read decompressed bytes as they go. The decompressed length is
+    unknown up front, so Content-Length is dropped and the stream marked as terminated.
+    Other non-identity encodings are rejected with 415.
+    """
+
+    def __init__(self, wsgi_app, *, max_ratio=DEFAULT_MAX_DECOMPRESSION_RATIO):
+        self.wsgi_app = wsgi_app
+        self.max_ratio = max_ratio
+
+    def __call__(self, environ, start_response):
+        encoding = environ.get("HTTP_CONTENT_ENCODING", "").strip().lower()
+        if not encoding or encoding == "identity":
+            return self.wsgi_app(environ, start_response)
+        if encoding not in GZIP_CONTENT_ENCODINGS:
+            body = json.dumps({"error": f"Unsupported Content-Encoding: {encoding}"}).encode("utf-8")
+            start_response("415 Unsupported Media Type", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+            return [body]
+
+        compressed = get_input_stream(environ)
+        environ["wsgi.input"] = open_gzip_stream(compressed, max_ratio=self.max_ratio)
+        environ["wsgi.input_terminated"] = True
+        environ.pop("CONTENT_LENGTH", None)
+        environ.pop("HTTP_CONTENT_ENCODING", None)
+        return self.wsgi_app(environ, start_response)
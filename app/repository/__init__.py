@@ -11,7 +11,12 @@ class Hospital(TypedDict):
     phone: str
     status: str
 
-class Batch(TypedDict):
+class BatchLinks(TypedDict, total=False):
+    """Set only on split uploads: a parent job lists its sub-batches, each sub-batch names its parent."""
+    parent_id: str
+    sub_batch_ids: List[str]
+
+class Batch(BatchLinks):
     id: str
     total_hospitals: int
     processed_hospitals: int
@@ -1,5 +1,24 @@
+import time
+from functools import wraps
+
+
 def synchronized(method):
+    """Run ``method`` holding ``self._lock``.
+
+    If the lock is contended and the instance has a ``_lock_wait_observer``, the time
+    spent waiting is passed to it; uncontended calls add only a non-blocking acquire.
+    """
+    @wraps(method)
     def wrapper(self, *args, **kwargs):
-        with self._lock:
+        lock = self._lock
+        if not lock.acquire(blocking=False):
+            started = time.perf_counter()
+            lock.acquire()
+            observer = getattr(self, "_lock_wait_observer", None)
+            if observer is not None:
+                observer(time.perf_counter() - started)
+        try:
             return method(self, *args, **kwargs)
-    return wrapper
\ No newline at end of file
+        finally:
+            lock.release()
+    return wrapper
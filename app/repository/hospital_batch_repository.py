@@ -1,14 +1,16 @@
 import threading
 import uuid
-from typing import Dict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Collection
 import copy
-from . import Batch
+from . import Batch, Hospital
 from .decorators import synchronized
+from ..constants import BATCH_STATE_PROCESSING, BATCH_STATE_ACTIVATED, BATCH_STATE_INCOMPLETE, KEY_TIMINGS
 
 class HospitalBatchRepository:
-    def __init__(self) -> None:
+    def __init__(self, *, lock_wait_observer: Optional[Callable[[float], None]] = None) -> None:
         self._batches: Dict[str, Batch] = {}
         self._lock = threading.RLock()
+        self._lock_wait_observer = lock_wait_observer
 
     @synchronized
     def save(self, batch: Batch) -> Batch:
@@ -22,15 +24,91 @@ class HospitalBatchRepository:
         batch = self._batches[batch_id]
         batch["hospitals"][hospital_id]["status"] = status
 
+    @synchronized
+    def update_hospital(self, batch_id: str, hospital_id: str, fields: Dict[str, Any]) -> None:
+        """Merge ``fields`` into one hospital record in place."""
+        self._batches[batch_id]["hospitals"][hospital_id].update(fields)
+
     @synchronized
     def find_by_batch_id(self, batch_id: str) -> Batch:
         return copy.deepcopy(self._batches[batch_id])
 
     @synchronized
-    def update_batch_processing_params(self, batch_id: str, processed_hospitals: int, failed_hospitals: int, end_time: float, batch_activated: bool) -> None:
+    def update_batch_processing_params(self, batch_id: str, processed_hospitals: int, failed_hospitals: int, end_time: float, batch_activated: bool, timings: Optional[Dict[str, Any]] = None) -> None:
+        """Record a run's end state; ``timings`` are merged in the same write, so a finished batch never lacks them."""
         batch = self._batches[batch_id]
         batch["processed_hospitals"] = processed_hospitals
         batch["failed_hospitals"] = failed_hospitals
         batch["end_time"] = end_time
         batch["batch_activated"] = batch_activated
-        self._batches[batch_id] = batch
\ No newline at end of file
+        if timings:
+            batch[KEY_TIMINGS] = {**batch.get(KEY_TIMINGS, {}), **timings}
+        self._batches[batch_id] = batch
+
+    @synchronized
+    def update_batch(self, batch_id: str, fields: Dict[str, Any]) -> None:
+        """Merge top-level ``fields`` into a batch record in place."""
+        self._batches[batch_id].update(fields)
+
+    @synchronized
+    def batch_ids(self) -> List[str]:
+        return list(self._batches.keys())
+
+    @synchronized
+    def measure_batch(self, batch_id: str, measure: Callable[[Batch], Any]) -> Any:
+        """Apply ``measure`` to the stored batch itself, not a copy, while holding the lock."""
+        return measure(self._batches[batch_id])
+
+    @synchronized
+    def count_by_state(self) -> Dict[str, int]:
+        """Number of stored batches per state: processing, activated, or finished with failures."""
+        counts = {BATCH_STATE_PROCESSING: 0, BATCH_STATE_ACTIVATED: 0, BATCH_STATE_INCOMPLETE: 0}
+        for batch in self._batches.values():
+            if not batch.get("end_time"):
+                counts[BATCH_STATE_PROCESSING] += 1
+            elif batch.get("batch_activated"):
+                counts[BATCH_STATE_ACTIVATED] += 1
+            else:
+                counts[BATCH_STATE_INCOMPLETE] += 1
+        return counts
+
+    @synchronized
+    def _hospital_keys(self, batch_id: str) -> List[str]:
+        keys = list(self._batches[batch_id]["hospitals"].keys())
+        try:
+            keys.sort(key=int)
+        except ValueError:
+            keys.sort()
+        return keys
+
+    @synchronized
+    def _copy_hospitals(self, batch_id: str, keys: List[str], statuses: Optional[Collection[str]]) -> List[Hospital]:
+        hospitals = self._batches[batch_id]["hospitals"]
+        chunk: List[Hospital] = []
+        for key in keys:
+            hospital = hospitals.get(key)
+            if hospital is None:
+                continue
+            if statuses is not None and hospital.get("status") not in statuses:
+                continue
+            entry = dict(hospital)
+            entry.setdefault("id", key)
+            chunk.append(entry)
+        return chunk
+
+    def iter_hospitals(self, batch_id: str, *, statuses: Optional[Collection[str]] = None, chunk_size: int = 500) -> Iterator[List[Hospital]]:
+        """Yield shallow copies of a batch's hospitals in row order, ``chunk_size`` rows at a time.
+
+        The lock is only held while copying one chunk, so exporting a large batch
+        does not block the processor thread. Raises KeyError eagerly if the batch is unknown.
+        """
+        keys = self._hospital_keys(batch_id)
+        chunk_size = max(1, int(chunk_size))
+
+        def _chunks() -> Iterator[List[Hospital]]:
+            for start in range(0, len(keys), chunk_size):
+                chunk = self._copy_hospitals(batch_id, keys[start:start + chunk_size], statuses)
+                if chunk:
+                    yield chunk
+
+        return _chunks()
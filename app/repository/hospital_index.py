@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple, TypedDict
+
+from .decorators import synchronized
+
+
+class IndexedHospital(TypedDict):
+    hospital_id: str
+    batch_id: str
+
+
+class HospitalIndexRepository:
+    """Cross-batch index of hospitals already created upstream, keyed by name+address fingerprint.
+
+    Lives in memory; when ``path`` is given, entries are appended to a JSON-lines
+    file and reloaded on start so the index survives restarts. ``add_many`` writes a
+    whole batch's entries with one open and write, so callers should index per batch
+    rather than per row.
+    """
+
+    def __init__(self, path: Optional[str] = None, logger: Optional[logging.Logger] = None) -> None:
+        self._entries: Dict[str, IndexedHospital] = {}
+        self._lock = threading.RLock()
+        self._path = path
+        self.logger = logger or logging.getLogger(__name__)
+        if path:
+            self._load(path)
+
+    def _load(self, path: str) -> None:
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    self._entries[record["fingerprint"]] = {"hospital_id": record["hospital_id"], "batch_id": record["batch_id"]}
+                except (ValueError, KeyError) as e:
+                    self.logger.warning(f"Skipping corrupt hospital index line {line_number} in {path}: {e}")
+
+    @synchronized
+    def find(self, fingerprint: str) -> Optional[IndexedHospital]:
+        entry = self._entries.get(fingerprint)
+        return dict(entry) if entry is not None else None
+
+    def add(self, fingerprint: str, hospital_id: str, batch_id: str) -> None:
+        self.add_many([(fingerprint, hospital_id, batch_id)])
+
+    @synchronized
+    def add_many(self, entries: Iterable[Tuple[str, str, str]]) -> int:
+        """Index (fingerprint, hospital_id, batch_id) entries, keeping the first for each fingerprint; returns how many were new."""
+        lines = []
+        for fingerprint, hospital_id, batch_id in entries:
+            if fingerprint in self._entries:
+                continue
+            self._entries[fingerprint] = {"hospital_id": hospital_id, "batch_id": batch_id}
+            lines.append(json.dumps({"fingerprint": fingerprint, "hospital_id": hospital_id, "batch_id": batch_id}) + "\n")
+        if lines and self._path:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self._path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+        return len(lines)
+
+    @synchronized
+    def __len__(self) -> int:
+        return len(self._entries)
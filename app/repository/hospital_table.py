@@ -0,0 +1,90 @@
+import copy
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..constants import STATUS_PENDING
+from ..utils.hospital_columns import HospitalColumns
+from . import Hospital
+
+
+class HospitalTable(MutableMapping):
+    """A batch's ``hospitals`` mapping backed by parsed columns.
+
+    Keys are row numbers as strings, in file order. A row's dict (``id``, ``status``
+    and its column values) is only built the first time the row is looked up, and is
+    then updated in place like any other batch record; rows nobody has touched cost
+    nothing beyond the shared column lists. The columns are never modified, so copies
+    share them and only duplicate the rows already built.
+    """
+
+    def __init__(self, columns: HospitalColumns) -> None:
+        self._columns = columns
+        self._keys: List[str] = [str(row) for row in columns.rows]
+        self._positions: Optional[Dict[str, int]] = None
+        self._built: Dict[str, Hospital] = {}
+        self._removed: set = set()
+        self._added: List[str] = []
+
+    def _positions_map(self) -> Dict[str, int]:
+        if self._positions is None:
+            self._positions = {k: index for index, k in enumerate(self._keys)}
+        return self._positions
+
+    def _position(self, key: str) -> Optional[int]:
+        return self._positions_map().get(key)
+
+    def __getitem__(self, key: str) -> Hospital:
+        hospital = self._built.get(key)
+        if hospital is not None:
+            return hospital
+        index = self._position(key)
+        if index is None or key in self._removed:
+            raise KeyError(key)
+        hospital = {"id": key, "status": STATUS_PENDING}
+        hospital.update(self._columns.hospital(index))
+        self._built[key] = hospital
+        return hospital
+
+    def __setitem__(self, key: str, value: Hospital) -> None:
+        if key not in self:
+            if self._position(key) is None:
+                self._added.append(key)
+            self._removed.discard(key)
+        self._built[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._built.pop(key, None)
+        if self._position(key) is None:
+            self._added.remove(key)
+        else:
+            self._removed.add(key)
+
+    def __contains__(self, key: Any) -> bool:
+        if key in self._built:
+            return True
+        return key not in self._removed and self._position(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        removed = self._removed
+        for key in self._keys:
+            if key not in removed:
+                yield key
+        yield from self._added
+
+    def __len__(self) -> int:
+        return len(self._keys) - len(self._removed) + len(self._added)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "HospitalTable":
+        clone = HospitalTable.__new__(HospitalTable)
+        clone._columns = self._columns
+        clone._keys = self._keys
+        clone._positions = self._positions_map()
+        clone._built = copy.deepcopy(self._built, memo)
+        clone._removed = set(self._removed)
+        clone._added = list(self._added)
+        return clone
+
+    def __repr__(self) -> str:
+        return f"HospitalTable({len(self)} rows, {len(self._built)} built)"
@@ -0,0 +1,46 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .decorators import synchronized
+
+
+class IdempotencyRepository:
+    """Remember which batch an upload key produced, for ``window_seconds``.
+
+    Keys are claimed before validation so concurrent retries of the same upload
+    resolve to a single batch.
+    """
+
+    PURGE_EVERY = 256
+
+    def __init__(self, window_seconds: float) -> None:
+        self._window = float(window_seconds)
+        self._entries: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.RLock()
+        self._claims = 0
+
+    @synchronized
+    def claim(self, key: str, batch_id: str) -> Optional[str]:
+        """Record ``batch_id`` for ``key`` and return None, or return the batch id already holding the key."""
+        now = time.monotonic()
+        self._claims += 1
+        if self._claims % self.PURGE_EVERY == 0:
+            self._purge(now)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        self._entries[key] = (batch_id, now + self._window)
+        return None
+
+    @synchronized
+    def release(self, key: str, batch_id: str) -> None:
+        """Forget a claim (e.g. the upload was rejected) so a corrected retry is processed."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == batch_id:
+            del self._entries[key]
+
+    def _purge(self, now: float) -> None:
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
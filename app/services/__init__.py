@@ -1,5 +1,5 @@
 # Services package
-from typing import Protocol, runtime_checkable, Dict, Any, List, Tuple, Optional
+from typing import Protocol, runtime_checkable, Dict, Any, List, Tuple, Optional, TextIO, Union
 
 
 @runtime_checkable
@@ -18,7 +18,7 @@ class HospitalApiClientProtocol(Protocol):
 
 
 class CsvParserProtocol(Protocol):
-    def parse_hospitals(self, csv_text: str) -> List[Tuple[int, Dict[str, Any]]]:
+    def parse_hospitals(self, csv_text: Union[str, TextIO]) -> List[Tuple[int, Dict[str, Any]]]:
         ...
 
 
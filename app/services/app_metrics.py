@@ -0,0 +1,90 @@
+import threading
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from ..utils.histogram import Histogram
+from ..utils.prometheus import add_histogram, add_metric
+from .upstream_metrics import UpstreamMetrics
+
+# Lock waits are usually micro- to milliseconds
+LOCK_WAIT_BUCKETS = (0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+ROW_OUTCOME_PROCESSED = "processed"
+ROW_OUTCOME_FAILED = "failed"
+
+
+class AppMetrics:
+    """In-process counters for the ``/metrics`` endpoint.
+
+    Every update is a few integer operations under one uncontended lock, cheap enough
+    to call once per processed row. Batch states and upstream metrics are read at
+    scrape time and passed to ``render``.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rows = {ROW_OUTCOME_PROCESSED: 0, ROW_OUTCOME_FAILED: 0}
+        self._batches_running = 0
+        self._sub_batches_queued = 0
+        self._lock_wait = Histogram(LOCK_WAIT_BUCKETS)
+        self._requests: Dict[Tuple[str, str, str], Histogram] = {}
+
+    def row_done(self, ok: bool) -> None:
+        with self._lock:
+            self._rows[ROW_OUTCOME_PROCESSED if ok else ROW_OUTCOME_FAILED] += 1
+
+    def batch_started(self) -> None:
+        with self._lock:
+            self._batches_running += 1
+
+    def batch_finished(self) -> None:
+        with self._lock:
+            self._batches_running -= 1
+
+    def sub_batches_queued(self, count: int) -> None:
+        with self._lock:
+            self._sub_batches_queued += count
+
+    def sub_batch_dequeued(self) -> None:
+        with self._lock:
+            self._sub_batches_queued -= 1
+
+    def observe_lock_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._lock_wait.observe(seconds)
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float) -> None:
+        key = (route, method, str(status))
+        with self._lock:
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram()
+            histogram.observe(seconds)
+
+    def rows(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._rows)
+
+    def render(self, *, batch_states: Mapping[str, int], upstream: Optional[UpstreamMetrics] = None) -> str:
+        """The Prometheus text exposition of every metric."""
+        with self._lock:
+            rows = dict(self._rows)
+            running = self._batches_running
+            queued = self._sub_batches_queued
+            lock_wait = [({"repository": "batches"}, self._lock_wait.copy())]
+            requests = [({"route": route, "method": method, "status": status}, h.copy()) for (route, method, status), h in sorted(self._requests.items())]
+
+        lines: List[str] = []
+        add_metric(lines, "hospital_rows_total", "counter", "Hospital rows finished by the batch processor, by outcome.",
+                   [({"outcome": outcome}, count) for outcome, count in rows.items()])
+        add_metric(lines, "hospital_batches", "gauge", "Stored batches by state.",
+                   [({"state": state}, count) for state, count in sorted(batch_states.items())])
+        add_metric(lines, "hospital_batches_running", "gauge", "Batches and sub-batches currently being processed.", [({}, running)])
+        add_metric(lines, "hospital_batch_queue_depth", "gauge", "Sub-batches waiting for a worker.", [({}, queued)])
+        if upstream is not None:
+            add_metric(lines, "hospital_upstream_in_flight", "gauge", "Hospital Directory API calls currently waiting for a response.", [({}, upstream.in_flight)])
+            add_histogram(lines, "hospital_upstream_request_duration_seconds", "Hospital Directory API call latency by endpoint and status.",
+                          [({"endpoint": endpoint, "status": status}, h) for (endpoint, status), h in sorted(upstream.histograms().items())])
+        add_histogram(lines, "hospital_repository_lock_wait_seconds", "Time spent waiting for a contended repository lock.", lock_wait)
+        add_histogram(lines, "hospital_http_request_duration_seconds", "API request latency by route, method and status.", requests)
+        return "\n".join(lines) + "\n"
+
@@ -1,73 +1,257 @@
+import contextvars
 import logging
-from typing import Callable, Any, Optional, Dict as TypingDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Any, List, Optional, Dict as TypingDict
 from flask import current_app
 from ..repository.hospital_batch_repository import HospitalBatchRepository
+from ..repository.hospital_index import HospitalIndexRepository
+from ..constants import STATUS_PENDING, STATUS_PROCESSING, STATUS_CREATED, STATUS_ACTIVATED, STATUS_FAILED, STATUS_LINKED, HOSPITAL_KEY_HOSPITAL_ID, HOSPITAL_KEY_LINKED_BATCH_ID, BATCH_KEY_SUB_BATCH_IDS, BATCH_KEY_QUEUED_AT
+from ..utils.fingerprint import hospital_fingerprint
+from ..utils.batch_timings import BatchTimer, queue_wait, TIMING_QUEUE_WAIT, TIMING_RECONCILE, TIMING_CREATE, TIMING_ACTIVATION, TIMING_TOTAL
+from ..utils.row_logging import RowLogSampler
+from .app_metrics import AppMetrics
+from .hospital_api_client import UpstreamBatchNotFound
+from .profiler import Profiler, PROFILE_KIND_BATCH
 import time
 
 class BatchProcessor:
-    def __init__(self, *, client_factory: Callable[[], Any], repository: HospitalBatchRepository, logger: Optional[logging.Logger] = None):
+    def __init__(self, *, client_factory: Callable[[], Any], repository: HospitalBatchRepository, logger: Optional[logging.Logger] = None, hospital_index: Optional[HospitalIndexRepository] = None, sub_batch_workers: int = 4, row_log_every: int = 100, progress_log_seconds: float = 10.0, metrics: Optional[AppMetrics] = None, profiler: Optional[Profiler] = None):
         self._repository = repository
         self._client_factory = client_factory
+        self._hospital_index = hospital_index
+        self._sub_batch_workers = max(1, int(sub_batch_workers))
+        self._row_log_every = row_log_every
+        self._progress_log_seconds = progress_log_seconds
+        self._metrics = metrics or AppMetrics()
+        self._profiler = profiler
         self.logger = logger or logging.getLogger(__name__)
         self._app = None
 
-    def start_batch(self, batch_id: str, app: Optional[Any] = None) -> None:
+    def start_batch(self, batch_id: str, app: Optional[Any] = None, reconcile: bool = False) -> None:
+        """Create every unprocessed row of a batch upstream, then activate it if none failed.
+
+        With ``reconcile`` the upstream batch is first matched against local rows (see
+        ``reconcile_batch``), so a resume does not re-create hospitals whose create
+        succeeded upstream but was not recorded locally.
+
+        While the profiler's batch switch is on, the run is captured with cProfile.
+        """
         self.logger.info(f"Processing batch {batch_id}")
         if app is not None:
             self._app = app
         if self._app is None:
             self._app = current_app._get_current_object()
 
-        with self._app.app_context():
-            client = self._client_factory()
-            batch = self._repository.find_by_batch_id(batch_id)
-            hospitals = batch.get("hospitals", {})
+        profile = self._profiler.start() if self._profiler is not None and self._profiler.batches else None
+        self._metrics.batch_started()
+        try:
+            with self._app.app_context():
+                self._run_batch(batch_id, reconcile)
+        finally:
+            self._metrics.batch_finished()
+            if profile is not None:
+                self._profiler.finish(profile, PROFILE_KIND_BATCH, batch_id)
+
+    def _run_batch(self, batch_id: str, reconcile: bool) -> None:
+        timer = BatchTimer()
+        client = self._client_factory()
+        if reconcile:
+            started = time.monotonic()
+            try:
+                self.reconcile_batch(batch_id, client)
+            except Exception as e:
+                self.logger.warning(f"Could not reconcile batch {batch_id} with the upstream API, resuming from local state: {e}")
+            timer.since(TIMING_RECONCILE, started)
+        batch = self._repository.find_by_batch_id(batch_id)
+        hospitals = batch.get("hospitals", {})
+        waited = queue_wait(batch.get(BATCH_KEY_QUEUED_AT), timer.started)
+        if waited is not None:
+            timer.set(TIMING_QUEUE_WAIT, waited)
+
+        row_log = RowLogSampler(self.logger, batch_id, len(hospitals), every=self._row_log_every, progress_seconds=self._progress_log_seconds)
+        processed_count = 0
+        started = time.monotonic()
+        for index, (hospital_id, hospital) in enumerate(hospitals.items()):
+            processed_count += self._process_hospital(client, batch_id, hospital_id, hospital, row_log, index, timer)
+            row_log.progress(index + 1, index + 1 - processed_count)
+        timer.since(TIMING_CREATE, started)
+        row_log.progress(len(hospitals), len(hospitals) - processed_count, force=True)
+
+        failed_hospitals = 0
+        if processed_count < len(hospitals):
+            failed_hospitals = len(hospitals) - processed_count
+            self.logger.info(f"Failed to create {failed_hospitals} hospitals")
+            self.logger.info(f"Skipping activation of batch {batch_id}")
+            batch_activated = False
+        else:
+            started = time.monotonic()
+            self._activate_batch(client, batch_id, hospitals, timer)
+            timer.since(TIMING_ACTIVATION, started)
+            batch_activated = True
+
+        timer.write(self._repository.update_batch, batch_id, {BATCH_KEY_QUEUED_AT: None})
+        # The finishing write carries the timings, so it is the one write they cannot include
+        self._repository.update_batch_processing_params(batch_id, processed_count, failed_hospitals, time.time(), batch_activated, timer.as_dict())
+
+    def start_job(self, parent_id: str, app: Optional[Any] = None, sub_batch_ids: Optional[List[str]] = None, reconcile: bool = False) -> None:
+        """Process a split upload's sub-batches concurrently, then record the totals on the parent.
+
+        Each sub-batch runs through ``start_batch`` with its own client, upstream
+        ``creation_batch_id`` and activation. ``sub_batch_ids`` limits a resume to the
+        sub-batches that still have work.
+        """
+        if app is not None:
+            self._app = app
+        if self._app is None:
+            self._app = current_app._get_current_object()
+
+        started = time.monotonic()
+        timings: TypingDict[str, float] = {}
+        parent = self._repository.find_by_batch_id(parent_id)
+        waited = queue_wait(parent.get(BATCH_KEY_QUEUED_AT), started)
+        if waited is not None:
+            timings[TIMING_QUEUE_WAIT] = round(waited, 6)
+        if sub_batch_ids is None:
+            sub_batch_ids = parent.get(BATCH_KEY_SUB_BATCH_IDS, [])
+        workers = min(self._sub_batch_workers, len(sub_batch_ids)) or 1
+        self.logger.info(f"Processing job {parent_id}: {len(sub_batch_ids)} sub-batches on {workers} threads")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"job-{parent_id[:8]}") as executor:
+            self._metrics.sub_batches_queued(len(sub_batch_ids))
+            for sub_batch_id in sub_batch_ids:
+                self._repository.update_batch(sub_batch_id, {BATCH_KEY_QUEUED_AT: time.monotonic()})
+            futures = {executor.submit(contextvars.copy_context().run, self._start_queued_sub_batch, sub_batch_id, reconcile): sub_batch_id for sub_batch_id in sub_batch_ids}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"Sub-batch {futures[future]} of job {parent_id} failed: {e}")
+        self._repository.update_batch(parent_id, {BATCH_KEY_QUEUED_AT: None})
+        timings[TIMING_TOTAL] = round(time.monotonic() - started, 6)
+        self._update_job_totals(parent_id, timings)
 
-            processed_count = 0
-            for hospital_id, hospital in hospitals.items():
-                processed_count += self._process_hospital(client, batch_id, hospital_id, hospital)
+    def _start_queued_sub_batch(self, sub_batch_id: str, reconcile: bool) -> None:
+        self._metrics.sub_batch_dequeued()
+        self.start_batch(sub_batch_id, self._app, reconcile)
+
+    def reconcile_batch(self, batch_id: str, client: Optional[Any] = None) -> TypingDict[str, int]:
+        """Mark rows that already exist upstream as created, using one ``get_hospitals_by_batch`` call.
+
+        Upstream hospitals are hashed by normalised name and address; each unprocessed
+        local row (pending, failed, or left processing by an interrupted run) probes that
+        table and claims one matching hospital, skipping upstream ids some row already
+        holds. An upstream 404 means nothing was ever created for the batch, so every
+        row is missing; other upstream failures raise.
+        """
+        client = client or self._client_factory()
+        try:
+            upstream = client.get_hospitals_by_batch(batch_id)
+        except UpstreamBatchNotFound:
+            upstream = []
+        hospitals = self._repository.find_by_batch_id(batch_id).get("hospitals", {})
+        claimed = {hospital.get(HOSPITAL_KEY_HOSPITAL_ID) for hospital in hospitals.values()}
 
-            failed_hospitals = 0
-            if processed_count < len(hospitals):
-                failed_hospitals = len(hospitals) - processed_count
-                self.logger.info(f"Failed to create {failed_hospitals} hospitals")
-                self.logger.info(f"Skipping activation of batch {batch_id}")
-                batch_activated = False
-            else:
-                self._activate_batch(client, batch_id, hospitals)
-                batch_activated = True
+        unmatched: TypingDict[str, List[Any]] = {}
+        for record in upstream:
+            if record.get("id") not in claimed:
+                unmatched.setdefault(hospital_fingerprint(record.get("name"), record.get("address")), []).append(record.get("id"))
 
-            self._repository.update_batch_processing_params(batch_id, processed_count, failed_hospitals, time.time(), batch_activated)
+        matched = missing = 0
+        for hospital_id, hospital in hospitals.items():
+            if hospital.get("status") not in {STATUS_PENDING, STATUS_PROCESSING, STATUS_FAILED}:
+                continue
+            fingerprint = hospital_fingerprint(hospital.get("name"), hospital.get("address"))
+            candidates = unmatched.get(fingerprint)
+            if not candidates:
+                missing += 1
+                continue
+            hospital_api_id = candidates.pop(0)
+            self._repository.update_hospital(batch_id, hospital_id, {"status": STATUS_CREATED, HOSPITAL_KEY_HOSPITAL_ID: hospital_api_id})
+            matched += 1
 
-    def _activate_batch(self, client: Any, batch_id: str, hospitals: TypingDict[str, Any]) -> None:
+        self.logger.info(f"Reconciled batch {batch_id}: {len(upstream)} upstream hospitals, {matched} rows matched, {missing} still missing")
+        return {"upstream_hospitals": len(upstream), "matched": matched, "missing": missing}
+
+    def _update_job_totals(self, parent_id: str, timings: Optional[TypingDict[str, Any]] = None) -> None:
+        parent = self._repository.find_by_batch_id(parent_id)
+        processed = failed = 0
+        activated = True
+        for sub_batch_id in parent.get(BATCH_KEY_SUB_BATCH_IDS, []):
+            sub_batch = self._repository.find_by_batch_id(sub_batch_id)
+            processed += sub_batch.get("processed_hospitals", 0)
+            failed += sub_batch.get("failed_hospitals", 0)
+            activated = activated and bool(sub_batch.get("batch_activated"))
+        self.logger.info(f"Job {parent_id} finished: {processed} processed, {failed} failed, activated={activated}")
+        self._repository.update_batch_processing_params(parent_id, processed, failed, time.time(), activated, timings)
+
+    def _activate_batch(self, client: Any, batch_id: str, hospitals: TypingDict[str, Any], timer: BatchTimer) -> None:
         try:
+            current = self._repository.find_by_batch_id(batch_id).get("hospitals", {})
+            to_activate = [hospital_id for hospital_id in hospitals.keys() if current.get(hospital_id, {}).get("status") != STATUS_LINKED]
+            if not to_activate:
+                self.logger.info(f"All hospitals in batch {batch_id} link to earlier batches; nothing to activate")
+                return
             self.logger.info(f"Activating batch {batch_id}")
             client.activate_batch(batch_id)
-            [self._repository.update_hospital_status(batch_id, hospital_id, "activated") for hospital_id in hospitals.keys()]
+            timer.write(self._mark_activated, batch_id, to_activate)
+            timer.write(self._index_activated, batch_id, current, to_activate)
         except Exception as e:
             self.logger.error(f"Failed to activate batch {batch_id}: {e}")
 
-    def _process_hospital(self, client: Any, batch_id: str, hospital_id: str, hospital: dict) -> int:
+    def _index_activated(self, batch_id: str, hospitals: TypingDict[str, Any], hospital_ids: List[str]) -> None:
+        """Record a batch's hospitals in the cross-batch index once upstream has activated them, so later batches never link to an inactive one."""
+        if self._hospital_index is None:
+            return
+        entries = []
+        for hospital_id in hospital_ids:
+            hospital = hospitals.get(hospital_id, {})
+            hospital_api_id = hospital.get(HOSPITAL_KEY_HOSPITAL_ID)
+            if hospital_api_id is not None and hospital.get("status") in {STATUS_CREATED, STATUS_ACTIVATED}:
+                entries.append((hospital_fingerprint(hospital.get("name"), hospital.get("address")), hospital_api_id, batch_id))
+        self._hospital_index.add_many(entries)
+
+    def _mark_activated(self, batch_id: str, hospital_ids: List[str]) -> None:
+        for hospital_id in hospital_ids:
+            self._repository.update_hospital_status(batch_id, hospital_id, STATUS_ACTIVATED)
+
+    def _process_hospital(self, client: Any, batch_id: str, hospital_id: str, hospital: dict, row_log: RowLogSampler, index: int, timer: BatchTimer) -> int:
         name = hospital.get("name", hospital_id)
-        # Skip hospitals already created/activated
-        if hospital.get("status") in {"created", "activated"}:
-            self.logger.info(f"Skipping already created hospital '{name}' (id: {hospital_id})")
+        # Skip hospitals already created/activated or linked to an earlier batch
+        if hospital.get("status") in {STATUS_CREATED, STATUS_ACTIVATED, STATUS_LINKED}:
+            row_log.row(index, "Skipping already created hospital '%s' (id: %s)", name, hospital_id)
+            return 1
+        fingerprint = hospital_fingerprint(hospital.get("name"), hospital.get("address"))
+        if self._link_existing(batch_id, hospital_id, hospital, fingerprint, row_log, index, timer):
+            self._metrics.row_done(True)
             return 1
         try:
-            self.logger.info(f"Creating hospital '{name}' (id: {hospital_id})")
-            self._repository.update_hospital_status(batch_id, hospital_id, "processing")
-            response = client.create_hospital(hospital, batch_id)
+            row_log.row(index, "Creating hospital '%s' (id: %s)", name, hospital_id)
+            timer.write(self._repository.update_hospital_status, batch_id, hospital_id, "processing")
+            response = timer.upstream(client.create_hospital, hospital, batch_id)
             hospital_api_id = response.get("id")
-            self._repository.update_hospital_status(batch_id, hospital_id, "created")
+            fields = {"status": STATUS_CREATED}
             if hospital_api_id is not None:
-                batch = self._repository.find_by_batch_id(batch_id)
-                batch_hospital = batch["hospitals"].get(hospital_id, {})
-                batch_hospital["hospital_id"] = hospital_api_id
-                batch["hospitals"][hospital_id] = batch_hospital
-                self._repository.save(batch)
+                fields["hospital_id"] = hospital_api_id
+            timer.write(self._repository.update_hospital, batch_id, hospital_id, fields)
+            row_log.row(index, "Created hospital '%s' (id: %s) with upstream ID %s", name, hospital_id, hospital_api_id)
+            self._metrics.row_done(True)
             return 1
         except Exception as e:
-            self.logger.error(f"Failed to create hospital '{name}': {e}")
-            self._repository.update_hospital_status(batch_id, hospital_id, "failed")
+            row_log.failure("Failed to create hospital '%s' (id: %s): %s", name, hospital_id, e)
+            self._metrics.row_done(False)
+            timer.write(self._repository.update_hospital_status, batch_id, hospital_id, "failed")
             return 0
 
+    def _link_existing(self, batch_id: str, hospital_id: str, hospital: dict, fingerprint: str, row_log: RowLogSampler, index: int, timer: BatchTimer) -> bool:
+        """Point a row at a hospital an earlier batch already created instead of creating it again."""
+        if self._hospital_index is None:
+            return False
+        existing = self._hospital_index.find(fingerprint)
+        if existing is None or existing["batch_id"] == batch_id:
+            return False
+        row_log.row(index, "Linking hospital '%s' (id: %s) to existing hospital %s from batch %s", hospital.get("name", hospital_id), hospital_id, existing["hospital_id"], existing["batch_id"])
+        timer.write(self._repository.update_hospital, batch_id, hospital_id, {
+            "status": STATUS_LINKED,
+            "hospital_id": existing["hospital_id"],
+            HOSPITAL_KEY_LINKED_BATCH_ID: existing["batch_id"],
+        })
+        return True
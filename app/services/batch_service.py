@@ -1,6 +1,8 @@
 import uuid
+import contextvars
+import itertools
 import threading
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Collection, TextIO, BinaryIO, Union
 import time
 from flask import current_app
 
@@ -15,59 +17,175 @@ from ..constants import (
     KEY_PROCESSED_COUNT,
     KEY_FAILED_COUNT,
     KEY_HOSPITALS,
+    STATUS_ACTIVATED,
+    STATUS_CREATED_AND_ACTIVATED,
+    STATUS_CREATED,
+    STATUS_LINKED,
+    EXPORT_FORMAT_NDJSON,
+    EXPORT_FORMAT_CSV,
+    KEY_SUB_BATCHES,
+    BATCH_KEY_SUB_BATCH_IDS,
+    BATCH_KEY_PARENT_ID,
+    BATCH_KEY_QUEUED_AT,
+    KEY_TIMINGS,
 )
+from ..utils.batch_timings import TIMING_VALIDATION
 from ..utils.converter import BatchDtoConverter
+from ..utils.export_writer import iter_ndjson, iter_csv
+from ..utils.hospital_columns import HospitalColumns
 
 
 class BatchService:
-    def __init__(self, *, validator, repository, processor) -> None:
+    def __init__(self, *, validator, repository, processor, parallel_validator=None, idempotency=None, reconcile_on_resume: bool = True) -> None:
         self._validator = validator
         self._repository = repository
         self._processor = processor
+        self._parallel_validator = parallel_validator
+        self._idempotency = idempotency
+        self._reconcile_on_resume = reconcile_on_resume
 
-    def bulk_create_hospitals(self, csv_text: str, *, max_hospitals: Optional[int] = None) -> Dict[str, Any]:
-        validation = self._validator.validate_and_parse(csv_text, max_hospitals=max_hospitals)
+    @property
+    def supports_idempotency(self) -> bool:
+        return self._idempotency is not None
+
+    @property
+    def supports_parallel_validation(self) -> bool:
+        return self._parallel_validator is not None
+
+    def _validate_and_parse(self, csv_source: Union[str, TextIO, BinaryIO], *, max_hospitals: Optional[int], parallel: bool, max_errors: Optional[int] = None, error_limit: Optional[int] = None) -> Dict[str, Any]:
+        """Validate text/text streams in-process, or raw byte streams on the process pool when ``parallel``.
+
+        Parsed hospitals come back as ``HospitalColumns``.
+        """
+        validator = self._parallel_validator if parallel and self._parallel_validator is not None else self._validator
+        return validator.validate_and_parse(csv_source, max_hospitals=max_hospitals, max_errors=max_errors, error_limit=error_limit, columnar=True)
+
+    @staticmethod
+    def _error_summary(validation: Dict[str, Any]) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {}
+        for key in ("error_counts", "stopped_early", "errors_truncated"):
+            if key in validation:
+                summary[key] = validation[key]
+        return summary
+
+    def bulk_create_hospitals(self, csv_text: Union[str, TextIO, BinaryIO], *, max_hospitals: Optional[int] = None, parallel: bool = False, idempotency_key: Optional[str] = None, max_errors: Optional[int] = None, error_limit: Optional[int] = None, split: bool = False, max_sub_batches: Optional[int] = None) -> Dict[str, Any]:
+        """Validate the CSV, store a new batch and start processing it in the background.
+
+        With an ``idempotency_key``, a repeat of an upload within the idempotency window
+        returns the batch created by the first upload instead of validating again.
+
+        With ``split``, an upload over ``max_hospitals`` rows becomes a parent job of up to
+        ``max_sub_batches`` sub-batches of ``max_hospitals`` rows each (None: no cap),
+        processed concurrently; the returned ``batch_id`` is the parent's.
+        """
+        batch_id = str(uuid.uuid4())
+        if idempotency_key is not None and self._idempotency is not None:
+            existing_id = self._idempotency.claim(idempotency_key, batch_id)
+            if existing_id is not None:
+                return self._replay_upload(existing_id)
+
+        split = split and bool(max_hospitals)
+        validation_limit = max_hospitals
+        if split:
+            validation_limit = max_hospitals * max_sub_batches if max_sub_batches else None
+        validation_started = time.monotonic()
+        try:
+            validation = self._validate_and_parse(csv_text, max_hospitals=validation_limit, parallel=parallel, max_errors=max_errors, error_limit=error_limit)
+        except Exception:
+            self._release_idempotency_key(idempotency_key, batch_id)
+            raise
         if not validation.get("valid"):
-            return {
-                "ok": False,
-                "status": 400,
-                "body": {
-                    "error": "CSV validation failed",
-                    "errors": validation.get("errors", []),
-                },
+            self._release_idempotency_key(idempotency_key, batch_id)
+            body: Dict[str, Any] = {
+                "error": "CSV validation failed",
+                "errors": validation.get("errors", []),
             }
+            body.update(self._error_summary(validation))
+            return {"ok": False, "status": 400, "body": body}
 
-        hospitals = validation.get("hospitals", [])
+        hospitals: HospitalColumns = validation["hospitals"]
         hospital_count = len(hospitals)
+        timings = {TIMING_VALIDATION: round(time.monotonic() - validation_started, 6)}
 
-        batch_id = str(uuid.uuid4())
-        batch: Batch = BatchDtoConverter.build_initial_batch(batch_id, hospitals)
+        sub_batches: List[Dict[str, Any]] = []
+        if split and hospital_count > max_hospitals:
+            sub_batches = self._create_job(batch_id, hospitals, max_hospitals, timings)
+        else:
+            batch: Batch = BatchDtoConverter.build_initial_batch(batch_id, hospitals)
+            batch[KEY_TIMINGS] = timings
+
+            self._repository.save(batch)
+            batch["start_time"] = time.time()
+            batch[BATCH_KEY_QUEUED_AT] = time.monotonic()
+            self._repository.save(batch)
+            self._run_in_background(self._processor.start_batch, batch_id)
 
-        self._repository.save(batch)
-        batch["start_time"] = time.time()
-        self._repository.save(batch)
+        body = {
+            "batch_id": batch_id,
+            "total_hospitals": hospital_count,
+            "processed_hospitals": 0,
+            "failed_hospitals": 0,
+            "processing_time_seconds": 0.0,
+            "batch_activated": False,
+        }
+        if sub_batches:
+            body[KEY_SUB_BATCHES] = sub_batches
+        body[KEY_HOSPITALS] = [
+            {"row": row, "name": name, "status": "pending"}
+            for row, name in zip(hospitals.rows, hospitals.names)
+        ]
+        if validation.get("duplicates"):
+            body["duplicates"] = validation["duplicates"]
+        return {"ok": True, "status": 202, "body": body}
+
+    def _create_job(self, parent_id: str, hospitals: HospitalColumns, sub_batch_size: int, timings: Dict[str, float]) -> List[Dict[str, Any]]:
+        """Store consecutive row ranges as sub-batches under a parent job and start them; returns a summary per sub-batch."""
+        sub_batch_ids: List[str] = []
+        summaries: List[Dict[str, Any]] = []
+        for start in range(0, len(hospitals), sub_batch_size):
+            rows = hospitals.slice(start, start + sub_batch_size)
+            sub_batch: Batch = BatchDtoConverter.build_initial_batch(str(uuid.uuid4()), rows)
+            sub_batch[BATCH_KEY_PARENT_ID] = parent_id
+            self._repository.save(sub_batch)
+            sub_batch_ids.append(sub_batch["id"])
+            summaries.append({"batch_id": sub_batch["id"], "total_hospitals": len(rows), "first_row": rows.rows[0], "last_row": rows.rows[-1]})
+
+        parent: Batch = BatchDtoConverter.build_parent_batch(parent_id, sub_batch_ids, len(hospitals))
+        parent[KEY_TIMINGS] = timings
+        parent[BATCH_KEY_QUEUED_AT] = time.monotonic()
+        self._repository.save(parent)
+        self._run_in_background(self._processor.start_job, parent_id)
+        return summaries
+
+    @staticmethod
+    def _run_in_background(target, batch_id: str, *args: Any) -> None:
         try:
             app = current_app._get_current_object()
         except Exception:
             app = None
-        threading.Thread(target=self._processor.start_batch, args=(batch_id, app), daemon=True).start()
-
-        return {
-            "ok": True,
-            "status": 202,
-            "body": {
-                "batch_id": batch_id,
-                "total_hospitals": hospital_count,
-                "processed_hospitals": 0,
-                "failed_hospitals": 0,
-                "processing_time_seconds": 0.0,
-                "batch_activated": False,
-                KEY_HOSPITALS: [
-                    {"row": row, "name": data.get("name"), "status": "pending"}
-                    for row, data in hospitals
-                ],
-            },
-        }
+        # Run in a copy of the caller's context so the batch logs under the request's id
+        threading.Thread(target=contextvars.copy_context().run, args=(target, batch_id, app, *args), daemon=True).start()
+
+    def _status_dto(self, batch: Batch) -> Dict[str, Any]:
+        """Status DTO for a batch, aggregating a parent job over its sub-batches."""
+        sub_batch_ids = batch.get(BATCH_KEY_SUB_BATCH_IDS)
+        if not sub_batch_ids:
+            return BatchDtoConverter.to_status_dto(batch)
+        sub_batches = [self._repository.find_by_batch_id(sub_batch_id) for sub_batch_id in sub_batch_ids]
+        return BatchDtoConverter.to_job_status_dto(batch, sub_batches)
+
+    def _release_idempotency_key(self, idempotency_key: Optional[str], batch_id: str) -> None:
+        if idempotency_key is not None and self._idempotency is not None:
+            self._idempotency.release(idempotency_key, batch_id)
+
+    def _replay_upload(self, batch_id: str) -> Dict[str, Any]:
+        try:
+            batch: Batch = self._repository.find_by_batch_id(batch_id)
+        except KeyError:
+            return {"ok": False, "status": 409, "body": {"error": "An identical upload is still being validated", "batch_id": batch_id}}
+        body = self._status_dto(batch)
+        body["idempotent_replay"] = True
+        return {"ok": True, "status": 200, "body": body}
 
     def get_batch_status(self, batch_id: str) -> Dict[str, Any]:
         try:
@@ -75,36 +193,112 @@ class BatchService:
         except KeyError:
             return {"ok": False, "status": 404, "body": {"error": f"Batch {batch_id} not found"}}
 
-        body = BatchDtoConverter.to_status_dto(batch)
+        body = self._status_dto(batch)
         return {"ok": True, "status": 200, "body": body}
 
+    def export_batch(self, batch_id: str, *, fmt: str = EXPORT_FORMAT_NDJSON, statuses: Optional[Collection[str]] = None, chunk_size: int = 500) -> Dict[str, Any]:
+        """Stream per-row results of a batch as NDJSON or CSV, optionally filtered by status.
+
+        On success 'stream' is an iterator of text chunks read from the repository chunk by chunk.
+        """
+        writers = {EXPORT_FORMAT_NDJSON: iter_ndjson, EXPORT_FORMAT_CSV: iter_csv}
+        if fmt not in writers:
+            return {"ok": False, "status": 400, "body": {"error": f"Unsupported export format '{fmt}'; expected one of: {', '.join(writers)}"}}
+
+        wanted = None
+        if statuses:
+            wanted = set(statuses)
+            if STATUS_CREATED_AND_ACTIVATED in wanted:
+                wanted.add(STATUS_ACTIVATED)
+
+        try:
+            sub_batch_ids = self._repository.find_by_batch_id(batch_id).get(BATCH_KEY_SUB_BATCH_IDS) or [batch_id]
+            chunks = itertools.chain.from_iterable([
+                self._repository.iter_hospitals(sub_batch_id, statuses=wanted, chunk_size=chunk_size)
+                for sub_batch_id in sub_batch_ids
+            ])
+        except KeyError:
+            return {"ok": False, "status": 404, "body": {"error": f"Batch {batch_id} not found"}}
+
+        rows = (
+            [BatchDtoConverter.to_hospital_entry(hospital["id"], hospital) for hospital in chunk]
+            for chunk in chunks
+        )
+        return {"ok": True, "status": 200, "stream": writers[fmt](rows)}
+
     def resume_batch(self, batch_id: str) -> Dict[str, Any]:
         try:
             batch: Batch = self._repository.find_by_batch_id(batch_id)
         except KeyError:
             return {"ok": False, "status": 404, "body": {"error": f"Batch {batch_id} not found"}}
 
-        hospitals = batch.get("hospitals", {})
-        total = batch.get("total_hospitals", len(hospitals))
-        processed = sum(1 for h in hospitals.values() if h.get("status") in {"created", "activated"})
-        if processed >= total:
+        sub_batch_ids = batch.get(BATCH_KEY_SUB_BATCH_IDS)
+        if sub_batch_ids:
+            return self._resume_job(batch_id, sub_batch_ids)
+
+        remaining = self._remaining_hospitals(batch)
+        if remaining == 0:
+            return {"ok": False, "status": 409, "body": {"error": "Batch is already completed; cannot resume"}}
+
+        self._repository.update_batch(batch_id, {BATCH_KEY_QUEUED_AT: time.monotonic()})
+        self._run_in_background(self._processor.start_batch, batch_id, self._reconcile_on_resume)
+        return {"ok": True, "status": 202, "body": {"message": "Resume started", "scheduled": remaining}}
+
+    def _resume_job(self, parent_id: str, sub_batch_ids: List[str]) -> Dict[str, Any]:
+        """Resume only the sub-batches of a parent job that still have unprocessed rows."""
+        incomplete: List[str] = []
+        scheduled = 0
+        for sub_batch_id in sub_batch_ids:
+            remaining = self._remaining_hospitals(self._repository.find_by_batch_id(sub_batch_id))
+            if remaining:
+                incomplete.append(sub_batch_id)
+                scheduled += remaining
+        if not incomplete:
             return {"ok": False, "status": 409, "body": {"error": "Batch is already completed; cannot resume"}}
 
+        self._repository.update_batch(parent_id, {BATCH_KEY_QUEUED_AT: time.monotonic()})
+        self._run_in_background(self._processor.start_job, parent_id, incomplete, self._reconcile_on_resume)
+        return {"ok": True, "status": 202, "body": {"message": "Resume started", "scheduled": scheduled, KEY_SUB_BATCHES: incomplete}}
+
+    def reconcile_batch(self, batch_id: str) -> Dict[str, Any]:
+        """Match a batch's unprocessed rows against what the upstream API already holds for it.
+
+        A parent job is reconciled sub-batch by sub-batch and the counts are summed.
+        """
         try:
-            app = current_app._get_current_object()
-        except Exception:
-            app = None
-        threading.Thread(target=self._processor.start_batch, args=(batch_id, app), daemon=True).start()
-        return {"ok": True, "status": 202, "body": {"message": "Resume started", "scheduled": total - processed}}
+            batch: Batch = self._repository.find_by_batch_id(batch_id)
+        except KeyError:
+            return {"ok": False, "status": 404, "body": {"error": f"Batch {batch_id} not found"}}
+
+        totals = {"upstream_hospitals": 0, "matched": 0, "missing": 0}
+        for sub_batch_id in batch.get(BATCH_KEY_SUB_BATCH_IDS) or [batch_id]:
+            try:
+                counts = self._processor.reconcile_batch(sub_batch_id)
+            except Exception as e:
+                return {"ok": False, "status": 502, "body": {"error": f"Could not fetch batch {sub_batch_id} from the Hospital Directory API: {e}"}}
+            for key, value in counts.items():
+                totals[key] += value
+        return {"ok": True, "status": 200, "body": {"batch_id": batch_id, **totals}}
+
+    @staticmethod
+    def _remaining_hospitals(batch: Batch) -> int:
+        hospitals = batch.get("hospitals", {})
+        total = batch.get("total_hospitals", len(hospitals))
+        processed = sum(1 for h in hospitals.values() if h.get("status") in {STATUS_CREATED, STATUS_ACTIVATED, STATUS_LINKED})
+        return max(0, total - processed)
 
-    def validate_hospitals(self, csv_text: str, *, max_hospitals: Optional[int] = None) -> Dict[str, Any]:
+    def validate_hospitals(self, csv_text: Union[str, TextIO, BinaryIO], *, max_hospitals: Optional[int] = None, parallel: bool = False, max_errors: Optional[int] = None, error_limit: Optional[int] = None) -> Dict[str, Any]:
         """Validate and parse the CSV, returning the same shape as the route previously returned."""
-        result = self._validator.validate_and_parse(csv_text, max_hospitals=max_hospitals)
-        return {
+        result = self._validate_and_parse(csv_text, max_hospitals=max_hospitals, parallel=parallel, max_errors=max_errors, error_limit=error_limit)
+        body = {
             "valid": result.get("valid", False),
             "errors": result.get("errors", []),
             "row_count": result.get("row_count", 0),
             "header": result.get("header"),
         }
+        if result.get("duplicates"):
+            body["duplicates"] = result["duplicates"]
+        body.update(self._error_summary(result))
+        return body
 
 
@@ -1,16 +1,199 @@
 import requests
 import logging
+import threading
 import time
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Mapping, Optional, Tuple
+
+from .upstream_metrics import STATUS_ERROR, UpstreamMetrics
+
+if TYPE_CHECKING:
+    from .upstream_recording import TrafficRecorder
+
+OPERATION_CREATE = "create"
+OPERATION_ACTIVATE = "activate"
+OPERATION_GET = "get"
+OPERATION_DELETE = "delete"
+OPERATIONS = (OPERATION_CREATE, OPERATION_ACTIVATE, OPERATION_GET, OPERATION_DELETE)
+
+# Metric labels: method and path template, so batch ids do not multiply the series
+ENDPOINTS = {
+    OPERATION_CREATE: "POST /hospitals/",
+    OPERATION_ACTIVATE: "PATCH /hospitals/batch/{batch_id}/activate",
+    OPERATION_GET: "GET /hospitals/batch/{batch_id}",
+    OPERATION_DELETE: "DELETE /hospitals/batch/{batch_id}",
+}
+
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 30.0
+
+
+class UpstreamDeadlineExceeded(Exception):
+    """The batch's overall deadline passed before an upstream call could be made."""
+
+
+class UpstreamBatchNotFound(Exception):
+    """The Hospital Directory API holds no hospitals under the requested batch id."""
+
+
+def parse_timeouts(spec: str, connect: float = DEFAULT_CONNECT_TIMEOUT, read: float = DEFAULT_READ_TIMEOUT) -> Dict[str, Tuple[float, float]]:
+    """Build per-operation (connect, read) timeouts from defaults plus overrides like ``"activate=3:120,get=2:10"``.
+
+    Raises ValueError on an unknown operation or malformed entry.
+    """
+    timeouts = {operation: (connect, read) for operation in OPERATIONS}
+    for entry in filter(None, (part.strip() for part in (spec or "").split(","))):
+        operation, _, values = entry.partition("=")
+        operation = operation.strip().lower()
+        if operation not in timeouts:
+            raise ValueError(f"Unknown upstream operation '{operation}' in timeouts; expected one of: {', '.join(OPERATIONS)}")
+        connect_value, _, read_value = values.partition(":")
+        timeouts[operation] = (float(connect_value), float(read_value or read))
+    return timeouts
+
+
+class LatencyTracker:
+    """Recent upstream latencies per operation, shared by all clients to pick hedge delays."""
+
+    def __init__(self, window: int = 256, min_samples: int = 20) -> None:
+        self._window = window
+        self._min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(operation)
+            if samples is None:
+                samples = self._samples[operation] = deque(maxlen=self._window)
+            samples.append(seconds)
+
+    def quantile(self, operation: str, q: float) -> Optional[float]:
+        """The ``q`` quantile of recent latencies, or None until ``min_samples`` were recorded."""
+        with self._lock:
+            samples = sorted(self._samples.get(operation, ()))
+        if len(samples) < self._min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def _body_size(body) -> int:
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    return len(body) if isinstance(body, bytes) else 0
+
+
+def _response_sizes(response) -> Tuple[int, int]:
+    """Request and response body sizes in bytes, from the prepared request and the read content."""
+    request = getattr(response, "request", None)
+    sent = _body_size(getattr(request, "body", None))
+    content = getattr(response, "content", None)
+    if isinstance(content, bytes):
+        return sent, len(content)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return sent, int(headers.get("Content-Length", 0))
+    except (TypeError, ValueError):
+        return sent, 0
+
+
+def _close_response(future) -> None:
+    """Release the connection held by a hedged attempt that lost the race."""
+    if future.exception() is None:
+        future.result().close()
+
 
 class HospitalApiClient:
     """Client for interacting with the Hospital Directory API.
+
+    Every call uses a per-operation ``(connect, read)`` timeout, shortened to the time
+    left before ``deadline`` (a ``time.monotonic()`` value, usually set per batch);
+    calls after the deadline raise ``UpstreamDeadlineExceeded`` without being sent.
+    With ``hedge``, ``get_hospitals_by_batch`` sends a second identical request if the
+    first has not answered after the recent p95 latency (``hedge_delay`` until enough
+    samples exist) and returns whichever finishes first. Creates are never hedged.
+    The hedge runs alongside the first attempt, so it takes a session of its own from
+    ``session_factory``; a client given only a ``session`` does not hedge.
+    Every attempt is timed with ``time.monotonic()`` into ``metrics`` by endpoint and
+    status code, with transport errors and body bytes counted alongside. With a
+    ``recorder`` every exchange is also written out for later replay.
     """
 
-    def __init__(self, base_url: str, session: Optional[requests.Session] = None, logger: Optional[logging.Logger] = None):
+    HEDGE_QUANTILE = 0.95
+
+    def __init__(self, base_url: str, session: Optional[requests.Session] = None, logger: Optional[logging.Logger] = None, *, session_factory: Optional[Callable[[], requests.Session]] = None, timeouts: Optional[Mapping[str, Tuple[float, float]]] = None, deadline: Optional[float] = None, hedge: bool = False, hedge_delay: float = 1.0, latency: Optional[LatencyTracker] = None, metrics: Optional[UpstreamMetrics] = None, recorder: Optional["TrafficRecorder"] = None):
         self.base_url = base_url.rstrip("/")
-        self.session = session or requests.Session()
+        self.session_factory = session_factory if session_factory is not None or session is not None else requests.Session
+        self.session = session or self.session_factory()
         self.logger = logger or logging.getLogger(__name__)
+        self.timeouts = parse_timeouts("")
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.deadline = deadline
+        self.hedge = hedge and self.session_factory is not None
+        self.hedge_delay = hedge_delay
+        self.latency = latency or LatencyTracker()
+        self.metrics = metrics or UpstreamMetrics()
+        self.recorder = recorder
+
+    def _timeout(self, operation: str) -> Tuple[float, float]:
+        connect, read = self.timeouts[operation]
+        if self.deadline is None:
+            return connect, read
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise UpstreamDeadlineExceeded(f"Batch deadline exceeded before {operation} request")
+        return min(connect, remaining), min(read, remaining)
+
+    def _send(self, operation: str, method: Callable[..., requests.Response], url: str, **kwargs) -> requests.Response:
+        timeout = self._timeout(operation)
+        endpoint = ENDPOINTS[operation]
+        self.metrics.call_started()
+        start = time.monotonic()
+        try:
+            response = method(url, timeout=timeout, **kwargs)
+        except Exception as e:
+            elapsed = time.monotonic() - start
+            self.metrics.record(endpoint, STATUS_ERROR, elapsed, error=type(e).__name__)
+            if self.recorder is not None:
+                self.recorder.record(operation, method.__name__, url, start, elapsed, request_body=kwargs.get("json"), error=e)
+            raise
+        elapsed = time.monotonic() - start
+        if self.recorder is not None:
+            self.recorder.record(operation, method.__name__, url, start, elapsed, request_body=getattr(getattr(response, "request", None), "body", None), response=response)
+        self.latency.record(operation, elapsed)
+        bytes_sent, bytes_received = _response_sizes(response)
+        status = response.status_code
+        self.metrics.record(endpoint, status, elapsed, bytes_sent=bytes_sent, bytes_received=bytes_received, error=f"http_{status}" if status >= 400 else None)
+        return response
+
+    def _send_hedged(self, operation: str, method: Callable[..., requests.Response], url: str, **kwargs) -> requests.Response:
+        """Send an idempotent request, racing a second copy against a slow first attempt."""
+        if not self.hedge:
+            return self._send(operation, method, url, **kwargs)
+        delay = self.latency.quantile(operation, self.HEDGE_QUANTILE) or self.hedge_delay
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+        try:
+            pending = {executor.submit(self._send, operation, method, url, **kwargs)}
+            done, _ = wait(pending, timeout=delay)
+            if not done:
+                self.logger.debug(f"Hedging {operation} request to {url} after {delay:.3f}s")
+                # Sessions are not shared between threads; the pooled connections behind them are
+                hedge_method = getattr(self.session_factory(), method.__name__)
+                pending.add(executor.submit(self._send, operation, hedge_method, url, **kwargs))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        for loser in pending:
+                            loser.add_done_callback(_close_response)
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            executor.shutdown(wait=False)
     
     def create_hospital(self, hospital_data, batch_id):
         """
@@ -27,10 +210,11 @@ class HospitalApiClient:
             Exception: If the API request fails
         """
         url = f"{self.base_url}/hospitals/"
-        start_time = time.time()
+        start_time = time.monotonic()
         hospital_name = hospital_data.get('name', 'Unknown')
         
-        self.logger.info(f"Creating hospital '{hospital_name}' in batch {batch_id}")
+        # Per-row lines are DEBUG; BatchProcessor samples row progress at INFO
+        self.logger.debug("Creating hospital '%s' in batch %s", hospital_name, batch_id)
         
         payload = {
             'name': hospital_data['name'],
@@ -41,12 +225,12 @@ class HospitalApiClient:
         
         if hospital_data.get('phone'):
             payload['phone'] = hospital_data['phone']
-            self.logger.debug(f"Hospital '{hospital_name}' includes phone number")
+            self.logger.debug("Hospital '%s' includes phone number", hospital_name)
         
         try:
-            self.logger.debug(f"Sending POST request to {url}")
-            response = self.session.post(url, json=payload)
-            elapsed_time = time.time() - start_time
+            self.logger.debug("Sending POST request to %s", url)
+            response = self._send(OPERATION_CREATE, self.session.post, url, json=payload)
+            elapsed_time = time.monotonic() - start_time
             
             if response.status_code != 200:
                 try:
@@ -55,17 +239,16 @@ class HospitalApiClient:
                 except:
                     error_msg = response.text
                 
-                self.logger.error(f"Failed to create hospital '{hospital_name}': {error_msg} (Status: {response.status_code})")
+                self.logger.error("Failed to create hospital '%s': %s (Status: %s)", hospital_name, error_msg, response.status_code)
                 raise Exception(f"Failed to create hospital: {error_msg} (Status: {response.status_code})")
             
             response_data = response.json()
-            hospital_id = response_data.get('id', 'Unknown')
-            self.logger.info(f"Created hospital '{hospital_name}' with ID {hospital_id} in batch {batch_id} ({elapsed_time:.2f}s)")
+            self.logger.debug("Created hospital '%s' with ID %s in batch %s (%.2fs)", hospital_name, response_data.get('id', 'Unknown'), batch_id, elapsed_time)
             return response_data
             
         except requests.exceptions.RequestException as e:
-            elapsed_time = time.time() - start_time
-            self.logger.error(f"Network error creating hospital '{hospital_name}': {str(e)} ({elapsed_time:.2f}s)")
+            elapsed_time = time.monotonic() - start_time
+            self.logger.error("Network error creating hospital '%s': %s (%.2fs)", hospital_name, e, elapsed_time)
             raise Exception(f"Network error creating hospital: {str(e)}")
     
     def activate_batch(self, batch_id):
@@ -82,14 +265,14 @@ class HospitalApiClient:
             Exception: If the API request fails
         """
         url = f"{self.base_url}/hospitals/batch/{batch_id}/activate"
-        start_time = time.time()
+        start_time = time.monotonic()
         
         self.logger.info(f"Activating hospitals in batch {batch_id}")
         
         try:
             self.logger.debug(f"Sending PATCH request to {url}")
-            response = self.session.patch(url)
-            elapsed_time = time.time() - start_time
+            response = self._send(OPERATION_ACTIVATE, self.session.patch, url)
+            elapsed_time = time.monotonic() - start_time
             
             if response.status_code != 200:
                 try:
@@ -111,7 +294,7 @@ class HospitalApiClient:
             return response_data
             
         except requests.exceptions.RequestException as e:
-            elapsed_time = time.time() - start_time
+            elapsed_time = time.monotonic() - start_time
             self.logger.error(f"Network error activating batch {batch_id}: {str(e)} ({elapsed_time:.2f}s)")
             raise Exception(f"Network error activating batch: {str(e)}")
     
@@ -126,17 +309,18 @@ class HospitalApiClient:
             list: List of hospitals in the batch
         
         Raises:
+            UpstreamBatchNotFound: If no hospital was ever created under the batch id
             Exception: If the API request fails
         """
         url = f"{self.base_url}/hospitals/batch/{batch_id}"
-        start_time = time.time()
+        start_time = time.monotonic()
         
         self.logger.info(f"Retrieving hospitals for batch {batch_id}")
         
         try:
             self.logger.debug(f"Sending GET request to {url}")
-            response = self.session.get(url)
-            elapsed_time = time.time() - start_time
+            response = self._send_hedged(OPERATION_GET, self.session.get, url)
+            elapsed_time = time.monotonic() - start_time
             
             if response.status_code != 200:
                 try:
@@ -147,7 +331,7 @@ class HospitalApiClient:
                     
                 if response.status_code == 404:
                     self.logger.error(f"Batch {batch_id} not found when retrieving hospitals ({elapsed_time:.2f}s)")
-                    raise Exception(f"Batch {batch_id} not found")
+                    raise UpstreamBatchNotFound(f"Batch {batch_id} not found")
                 else:
                     self.logger.error(f"Failed to get hospitals in batch {batch_id}: {error_msg} (Status: {response.status_code}, {elapsed_time:.2f}s)")
                     raise Exception(f"Failed to get hospitals in batch: {error_msg} (Status: {response.status_code})")
@@ -158,7 +342,7 @@ class HospitalApiClient:
             return response_data
             
         except requests.exceptions.RequestException as e:
-            elapsed_time = time.time() - start_time
+            elapsed_time = time.monotonic() - start_time
             self.logger.error(f"Network error retrieving hospitals for batch {batch_id}: {str(e)} ({elapsed_time:.2f}s)")
             raise Exception(f"Network error retrieving hospitals: {str(e)}")
     
@@ -176,14 +360,14 @@ class HospitalApiClient:
             Exception: If the API request fails
         """
         url = f"{self.base_url}/hospitals/batch/{batch_id}"
-        start_time = time.time()
+        start_time = time.monotonic()
         
         self.logger.info(f"Deleting hospitals in batch {batch_id}")
         
         try:
             self.logger.debug(f"Sending DELETE request to {url}")
-            response = self.session.delete(url)
-            elapsed_time = time.time() - start_time
+            response = self._send(OPERATION_DELETE, self.session.delete, url)
+            elapsed_time = time.monotonic() - start_time
             
             if response.status_code != 200:
                 try:
@@ -205,7 +389,7 @@ class HospitalApiClient:
             return response_data
             
         except requests.exceptions.RequestException as e:
-            elapsed_time = time.time() - start_time
+            elapsed_time = time.monotonic() - start_time
             self.logger.error(f"Network error deleting batch {batch_id}: {str(e)} ({elapsed_time:.2f}s)")
             raise Exception(f"Network error deleting batch: {str(e)}")
         
\ No newline at end of file
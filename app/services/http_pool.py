@@ -0,0 +1,96 @@
+import logging
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets can use TCP keep-alive probes."""
+
+    def __init__(self, *, tcp_keepalive: bool = True, **kwargs) -> None:
+        self._tcp_keepalive = tcp_keepalive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self._tcp_keepalive:
+            pool_kwargs.setdefault("socket_options", HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)])
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+
+
+class SharedHttpPool:
+    """One process-wide connection pool for every call to the Hospital Directory API.
+
+    ``requests.Session`` keeps cookies and other per-session state, so it is not shared
+    between threads. Instead each client, and each hedged request that runs alongside
+    a client's own, gets its own cheap ``session()`` with the same adapter mounted. The adapter's urllib3 pool manager is thread-safe, so every batch
+    reuses the same warm connections.
+
+    - pool_maxsize: connections kept per upstream host
+    - pool_block: wait for a free connection instead of opening an unpooled one
+    - keep_alive: reuse connections (with TCP keep-alive probes); False sends ``Connection: close``
+    """
+
+    def __init__(self, *, pool_connections: int = 4, pool_maxsize: int = 32, pool_block: bool = False, keep_alive: bool = True, logger: Optional[logging.Logger] = None) -> None:
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.logger = logger or logging.getLogger(__name__)
+        self._adapter = PooledHTTPAdapter(
+            tcp_keepalive=keep_alive,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=0,
+        )
+
+    def session(self) -> requests.Session:
+        session = requests.Session()
+        session.mount("http://", self._adapter)
+        session.mount("https://", self._adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def prewarm(self, base_url: str, connections: int, *, timeout: float = 5.0) -> int:
+        """Open up to ``connections`` pooled connections to ``base_url`` with concurrent HEAD requests.
+
+        Each request occupies its own connection while in flight, so all of them end up
+        idle in the pool. Returns how many succeeded; failures are only logged.
+        """
+        connections = min(max(0, int(connections)), self.pool_maxsize)
+        if not base_url or connections == 0 or not self.keep_alive:
+            return 0
+        url = base_url.rstrip("/") + "/"
+        barrier = threading.Barrier(connections)
+
+        def _open(_):
+            session = self.session()
+            try:
+                barrier.wait(timeout)
+            except threading.BrokenBarrierError:
+                pass
+            try:
+                session.head(url, timeout=timeout).close()
+                return True
+            except requests.RequestException as e:
+                self.logger.warning(f"Could not pre-warm connection to {url}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="http-prewarm") as executor:
+            opened = sum(executor.map(_open, range(connections)))
+        self.logger.info(f"Pre-warmed {opened}/{connections} connections to {url}")
+        return opened
+
+    def prewarm_in_background(self, base_url: str, connections: int, *, timeout: float = 5.0) -> Optional[threading.Thread]:
+        if not base_url or connections <= 0:
+            return None
+        thread = threading.Thread(target=self.prewarm, args=(base_url, connections), kwargs={"timeout": timeout}, name="http-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        self._adapter.close()
@@ -0,0 +1,136 @@
+import collections
+import threading
+import tracemalloc
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..repository.hospital_batch_repository import HospitalBatchRepository
+from ..utils.memory import deep_sizeof
+
+GROUP_BY_CHOICES = ("lineno", "filename", "traceback")
+
+# Allocations made by tracemalloc itself or the import system are noise in every report
+_NOISE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class TracingNotStarted(RuntimeError):
+    pass
+
+
+class MemoryDiagnostics:
+    """Admin-facing wrapper around ``tracemalloc`` plus per-batch footprint estimates.
+
+    Tracing is off until ``start`` is called, since it slows every allocation and
+    costs memory per traced block. Snapshots are kept by id, at most
+    ``max_snapshots`` of them, oldest dropped first; each is filtered of tracemalloc's
+    own and the import system's allocations.
+    """
+
+    def __init__(self, repository: HospitalBatchRepository, *, max_snapshots: int = 4) -> None:
+        self._repository = repository
+        self._snapshots: Deque[Tuple[int, tracemalloc.Snapshot]] = collections.deque(maxlen=max(1, int(max_snapshots)))
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def start(self, frames: int = 1) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        tracemalloc.start(max(1, int(frames)))
+
+    def stop(self) -> None:
+        """Stop tracing; stored snapshots are dropped with the traces they point into."""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        with self._lock:
+            snapshot_ids = [snapshot_id for snapshot_id, _ in self._snapshots]
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "traced_bytes": current,
+            "peak_traced_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            "snapshots": snapshot_ids,
+        }
+
+    def _take(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise TracingNotStarted("tracemalloc is not running; start it first")
+        return tracemalloc.take_snapshot().filter_traces(_NOISE_FILTERS)
+
+    def take_snapshot(self) -> int:
+        snapshot = self._take()
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots.append((snapshot_id, snapshot))
+        return snapshot_id
+
+    def _stored(self, snapshot_id: int) -> tracemalloc.Snapshot:
+        with self._lock:
+            for stored_id, snapshot in self._snapshots:
+                if stored_id == snapshot_id:
+                    return snapshot
+        raise KeyError(snapshot_id)
+
+    def top(self, *, limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """Largest allocation sites in a fresh snapshot."""
+        stats = self._take().statistics(group_by)
+        return [_stat_entry(stat) for stat in stats[:limit]]
+
+    def diff(self, from_id: int, to_id: Optional[int] = None, *, limit: int = 20, group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """Sites whose allocations grew or shrank most between two snapshots; ``to_id`` None compares against now.
+
+        Raises KeyError for an unknown snapshot id.
+        """
+        before = self._stored(from_id)
+        after = self._stored(to_id) if to_id is not None else self._take()
+        stats = after.compare_to(before, group_by)
+        return [
+            {**_stat_entry(stat), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+            for stat in stats[:limit]
+        ]
+
+    def batch_footprints(self, *, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Estimated bytes held by each stored batch, largest first.
+
+        Each batch is measured under the repository lock on its own, so processing
+        threads wait for at most one batch walk at a time.
+        """
+        batches = []
+        for batch_id in self._repository.batch_ids():
+            try:
+                size, rows = self._repository.measure_batch(batch_id, _batch_size)
+            except KeyError:
+                continue
+            batches.append({
+                "batch_id": batch_id,
+                "bytes": size,
+                "stored_hospitals": rows,
+                "bytes_per_hospital": round(size / rows, 1) if rows else None,
+            })
+        batches.sort(key=lambda entry: entry["bytes"], reverse=True)
+        return {
+            "batches": len(batches),
+            "total_bytes": sum(entry["bytes"] for entry in batches),
+            "largest": batches[:limit] if limit else batches,
+        }
+
+
+def _batch_size(batch: Dict[str, Any]) -> Tuple[int, int]:
+    # Rows stored in this record; a parent job's rows live in its sub-batches
+    return deep_sizeof(batch), len(batch.get("hospitals", {}))
+
+
+def _stat_entry(stat: tracemalloc.Statistic) -> Dict[str, Any]:
+    # Tracebacks iterate oldest frame first; report the allocating frame first
+    frames = [f"{frame.filename}:{frame.lineno}" for frame in reversed(stat.traceback)]
+    return {"site": frames[0] if frames else "?", "traceback": frames, "size_bytes": stat.size, "count": stat.count}
@@ -0,0 +1,190 @@
+"""Validate very large CSV uploads in parallel byte ranges on a process pool."""
+import csv
+import io
+import logging
+import mmap
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+from ..constants import (
+    ERROR_CSV_EMPTY_HEADER,
+    ERROR_CSV_INVALID_FORMAT_TEMPLATE,
+    ERROR_MISSING_REQUIRED_COLUMNS,
+)
+from ..utils.fingerprint import hospital_fingerprint
+from ..utils.hospital_columns import HospitalColumns
+from .validation_schema import ColumnRule, compile_schema, count_error_codes, scan_rows
+from .validation_service import HospitalCsvValidator
+
+SPOOL_COPY_BYTES = 1024 * 1024
+
+
+def find_record_boundaries(buf, start: int, end: int, target_bytes: int, max_splits: Optional[int] = None) -> List[int]:
+    """Split ``buf[start:end]`` into ranges of roughly ``target_bytes`` that begin and end on CSV record boundaries.
+
+    A newline only ends a record when an even number of quote characters precedes it
+    (RFC 4180 escapes quotes by doubling them, so quoted newlines always sit at odd parity).
+    Returns offsets ``[start, b1, ..., end]``, with at most ``max_splits`` inner offsets.
+    """
+    bounds = [start]
+    has_quotes = buf.find(b'"', start, end) != -1
+    counted_to = start
+    quotes = 0
+    while bounds[-1] + target_bytes < end and (max_splits is None or len(bounds) <= max_splits):
+        newline = buf.find(b"\n", bounds[-1] + target_bytes, end)
+        while newline != -1 and has_quotes:
+            quotes += buf[counted_to:newline].count(b'"')
+            counted_to = newline
+            if quotes % 2 == 0:
+                break
+            newline = buf.find(b"\n", newline + 1, end)
+        if newline == -1 or newline + 1 >= end:
+            break
+        bounds.append(newline + 1)
+    bounds.append(end)
+    return bounds
+
+
+def _validate_range(path: str, start: int, end: int, header: List[str], schema: Sequence[ColumnRule], collect: bool, max_errors: Optional[int] = None, fingerprint: bool = False) -> Tuple[int, List[Dict[str, Any]], HospitalColumns, Dict[str, int], bool, Optional[List[str]]]:
+    """Process-pool worker: validate one byte range; row numbers are local to the range.
+
+    Parsed hospitals come back as ``HospitalColumns``, which pickle far cheaper than dicts.
+    With ``fingerprint`` each row's duplicate-detection fingerprint is computed here too,
+    so the parent does not hash every row serially.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[start:end].decode("utf-8")
+    columns = HospitalColumns([rule.name for rule in schema])
+    row_validator = compile_schema(schema, [h.lower() for h in header])
+    row_count, errors, error_counts, stopped_early = scan_rows(
+        csv.reader(io.StringIO(text, newline="")),
+        row_validator,
+        on_valid=columns.appender() if collect else None,
+        max_errors=max_errors,
+    )
+    fingerprints = [hospital_fingerprint(name, address) for name, address in zip(columns.names, columns.addresses)] if fingerprint else None
+    return row_count, errors, columns, error_counts, stopped_early, fingerprints
+
+
+class ParallelCsvValidator:
+    """Spool an upload to disk, memory-map it and validate record-aligned chunks on a process pool.
+
+    Produces the same result shape as ``HospitalCsvValidator.validate_and_parse``,
+    with global row numbers and errors in file order.
+    """
+
+    def __init__(self, validator: HospitalCsvValidator, *, workers: Optional[int] = None, chunk_bytes: int = 8 * 1024 * 1024, spool_dir: Optional[str] = None, logger: Optional[logging.Logger] = None) -> None:
+        self._validator = validator
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_bytes = max(1, int(chunk_bytes))
+        self._spool_dir = spool_dir
+        self.logger = logger or logging.getLogger(__name__)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: forking a multi-threaded server can copy held locks into the children
+                self._executor = ProcessPoolExecutor(max_workers=self._workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def spool(self, binary_stream: BinaryIO) -> str:
+        """Copy an upload stream to a temporary file in bounded chunks and return its path."""
+        fd, path = tempfile.mkstemp(prefix="upload-", suffix=".csv", dir=self._spool_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(binary_stream, out, SPOOL_COPY_BYTES)
+        except Exception:
+            os.unlink(path)
+            raise
+        return path
+
+    def validate_and_parse(self, binary_stream: BinaryIO, max_hospitals: Optional[int] = None, *, max_errors: Optional[int] = None, error_limit: Optional[int] = None, columnar: bool = False) -> Dict[str, Any]:
+        path = self.spool(binary_stream)
+        try:
+            return self.validate_file(path, max_hospitals=max_hospitals, max_errors=max_errors, error_limit=error_limit, columnar=columnar)
+        finally:
+            os.unlink(path)
+
+    def validate_file(self, path: str, *, max_hospitals: Optional[int] = None, collect: bool = True, max_errors: Optional[int] = None, error_limit: Optional[int] = None, columnar: bool = False) -> Dict[str, Any]:
+        size = os.path.getsize(path)
+        if size == 0:
+            return {"valid": False, "errors": [{"row": 0, "error": ERROR_CSV_EMPTY_HEADER}], "row_count": 0, "header": None}
+
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end = find_record_boundaries(mm, 0, size, 1, max_splits=1)[1]
+            try:
+                header = next(csv.reader(io.StringIO(mm[:header_end].decode("utf-8"), newline="")))
+            except StopIteration:
+                return {"valid": False, "errors": [{"row": 0, "error": ERROR_CSV_EMPTY_HEADER}], "row_count": 0, "header": None}
+            except csv.Error as e:
+                return {"valid": False, "errors": [{"row": 0, "error": ERROR_CSV_INVALID_FORMAT_TEMPLATE.format(error=str(e))}], "row_count": 0, "header": None}
+
+            header_check = self._validator.check_header(header)
+            if not header_check.get("valid"):
+                return {"valid": False, "errors": [{"row": 0, "error": header_check.get("error")}], "row_count": 0, "header": header_check.get("header")}
+            row_validator = self._validator.compile_row_validator(header)
+            if row_validator is None:
+                return {"valid": False, "errors": [{"row": 0, "error": ERROR_MISSING_REQUIRED_COLUMNS}], "row_count": 0, "header": header}
+
+            bounds = find_record_boundaries(mm, header_end, size, self._chunk_bytes)
+
+        ranges = [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+        self.logger.info(f"Validating {size} bytes in {len(ranges)} chunks on {self._workers} workers")
+
+        executor = self._get_executor()
+        schema = self._validator.schema
+        keep_rows = collect or self._validator.needs_rows
+        fingerprint = self._validator.needs_rows
+        futures = [executor.submit(_validate_range, path, a, b, header, schema, keep_rows, max_errors, fingerprint) for a, b in ranges]
+
+        row_count = 0
+        errors: List[Dict[str, Any]] = []
+        error_counts: Dict[str, int] = {}
+        stopped_early = False
+        hospitals = self._validator.new_columns()
+        fingerprints: Optional[List[str]] = [] if fingerprint else None
+        for index, future in enumerate(futures):
+            chunk_rows, chunk_errors, chunk_columns, chunk_counts, chunk_stopped, chunk_fingerprints = future.result()
+            offset = row_count
+            if max_errors is not None and len(errors) + len(chunk_errors) >= max_errors:
+                # Fail fast: keep errors up to the limit in file order and drop every later chunk
+                chunk_errors = chunk_errors[:max_errors - len(errors)]
+                chunk_rows = chunk_errors[-1]["row"]
+                chunk_counts = count_error_codes(chunk_errors, row_validator.error_codes)
+                stopped_early = True
+            for error in chunk_errors:
+                error["row"] += offset
+            errors.extend(chunk_errors)
+            for code, count in chunk_counts.items():
+                error_counts[code] = error_counts.get(code, 0) + count
+            if keep_rows and not stopped_early:
+                hospitals.extend(chunk_columns, row_offset=offset)
+                if fingerprints is not None:
+                    fingerprints.extend(chunk_fingerprints)
+            row_count += chunk_rows
+            if stopped_early:
+                for pending in futures[index + 1:]:
+                    pending.cancel()
+                break
+
+        result = self._validator.finalize(
+            header, row_count, errors, hospitals if keep_rows else None,
+            max_hospitals=max_hospitals, error_counts=error_counts, stopped_early=stopped_early, max_errors=max_errors,
+            error_limit=error_limit, columnar=columnar, row_validator=row_validator, fingerprints=fingerprints,
+        )
+        if not collect:
+            result.pop("hospitals", None)
+        return result
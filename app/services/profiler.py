@@ -0,0 +1,169 @@
+import cProfile
+import collections
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+PROFILE_KIND_REQUEST = "request"
+PROFILE_KIND_BATCH = "batch"
+
+# Caps the depth of reconstructed stacks; deeper call chains are cut off
+MAX_STACK_DEPTH = 64
+MIN_STACK_SECONDS = 0.000001
+
+logger = logging.getLogger(__name__)
+
+FunctionKey = Tuple[str, int, str]
+
+
+class Profiler:
+    """Opt-in cProfile capture of single requests and batch runs.
+
+    A request is profiled when asked for (header or armed from the admin endpoint);
+    batch runs are profiled while ``batches`` is on. At most ``max_per_minute``
+    profiles start in any 60-second window, so the hooks can stay enabled in
+    production; 0 turns profiling off. Each profile is written to ``output_dir`` as a
+    ``.pstats`` file and a ``.collapsed`` file of folded stacks for flame graph tools,
+    and only the newest ``keep_files`` profiles are kept.
+    """
+
+    def __init__(self, output_dir: str, *, max_per_minute: int = 6, batches: bool = False, keep_files: int = 50) -> None:
+        self.output_dir = output_dir
+        self.max_per_minute = max(0, int(max_per_minute))
+        self.keep_files = max(1, int(keep_files))
+        self._batches = batches
+        self._armed_requests = 0
+        self._started: Deque[float] = collections.deque()
+        self._recent: Deque[str] = collections.deque(maxlen=self.keep_files)
+        self._lock = threading.Lock()
+
+    @property
+    def batches(self) -> bool:
+        return self._batches
+
+    def configure(self, *, batches: Optional[bool] = None, requests: Optional[int] = None) -> None:
+        """Switch batch profiling on or off, and/or arm profiling of the next ``requests`` requests."""
+        with self._lock:
+            if batches is not None:
+                self._batches = bool(batches)
+            if requests is not None:
+                self._armed_requests = max(0, int(requests))
+
+    def wants_request(self, requested: bool) -> bool:
+        """Whether to profile the current request: asked for by header, or an armed request is left."""
+        if requested:
+            return True
+        with self._lock:
+            if self._armed_requests > 0:
+                self._armed_requests -= 1
+                return True
+        return False
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """An enabled profiler for the calling thread, or None when over the rate cap or another profiler is active."""
+        now = time.monotonic()
+        with self._lock:
+            while self._started and now - self._started[0] >= 60.0:
+                self._started.popleft()
+            if len(self._started) >= self.max_per_minute:
+                return None
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Python 3.12+ allows one active profiler per process; a failed start uses no slot
+                logger.warning(f"Could not start profiler: {e}")
+                return None
+            self._started.append(now)
+        return profile
+
+    def finish(self, profile: cProfile.Profile, kind: str, label: str) -> Optional[str]:
+        """Disable ``profile`` and write its pstats and collapsed-stack files; returns the profile id."""
+        profile.disable()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        profile_id = f"{stamp}-{kind}-{re.sub(r'[^A-Za-z0-9.-]+', '_', label).strip('_')[:80]}"
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            base = os.path.join(self.output_dir, profile_id)
+            profile.dump_stats(base + ".pstats")
+            stats = pstats.Stats(profile)
+            with open(base + ".collapsed", "w", encoding="utf-8") as fh:
+                fh.writelines(f"{stack} {value}\n" for stack, value in collapsed_stacks(stats))
+        except OSError as e:
+            logger.error(f"Could not write profile {profile_id}: {e}")
+            return None
+        self._remember(profile_id)
+        logger.info(f"Wrote {kind} profile {profile_id} to {self.output_dir}")
+        return profile_id
+
+    def _remember(self, profile_id: str) -> None:
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen:
+                self._remove(self._recent[0])
+            self._recent.append(profile_id)
+
+    def _remove(self, profile_id: str) -> None:
+        for suffix in (".pstats", ".collapsed"):
+            try:
+                os.remove(os.path.join(self.output_dir, profile_id + suffix))
+            except OSError:
+                pass
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_per_minute": self.max_per_minute,
+                "batches": self._batches,
+                "armed_requests": self._armed_requests,
+                "output_dir": self.output_dir,
+                "recent": list(self._recent),
+            }
+
+
+def _frame_name(func: FunctionKey) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{name}:{line}"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> List[Tuple[str, int]]:
+    """Fold cProfile's caller/callee graph into ``frame;frame;...`` stacks with microsecond weights.
+
+    cProfile keeps only direct caller edges, not whole stacks, so stacks are rebuilt
+    from the roots down and a function's own time is split across its callers in
+    proportion to the cumulative time each caller edge accounts for. This is an
+    approximation: exact for call trees, blurred where a function is shared.
+    """
+    entries: Dict[FunctionKey, Any] = stats.stats  # type: ignore[attr-defined]
+    callees: Dict[FunctionKey, List[Tuple[FunctionKey, float]]] = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        # Normalise over recorded callers, so calls from outside the profile are not lost
+        via_callers = sum(edge[3] for edge in callers.values())
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3] / via_callers if via_callers else 1.0 / len(callers)))
+
+    folded: Dict[str, float] = {}
+
+    def walk(func: FunctionKey, path: Tuple[str, ...], on_path: frozenset, share: float) -> None:
+        frames = path + (_frame_name(func),)
+        own = entries[func][2] * share
+        if own > 0:
+            key = ";".join(frames)
+            folded[key] = folded.get(key, 0.0) + own
+        if len(frames) >= MAX_STACK_DEPTH:
+            return
+        for callee, fraction in callees.get(func, ()):
+            # Skip paths worth under a microsecond so shared helpers do not explode the walk
+            if callee not in on_path and entries[callee][3] * share * fraction >= MIN_STACK_SECONDS:
+                walk(callee, frames, on_path | {callee}, share * fraction)
+
+    for func, entry in entries.items():
+        if not entry[4]:
+            walk(func, (), frozenset({func}), 1.0)
+    return [(stack, round(seconds * 1_000_000)) for stack, seconds in sorted(folded.items()) if seconds >= MIN_STACK_SECONDS]
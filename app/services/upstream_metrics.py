@@ -0,0 +1,74 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from ..utils.histogram import Histogram
+
+STATUS_ERROR = "error"
+
+
+class UpstreamMetrics:
+    """Process-wide counters and latency histograms for Hospital Directory API calls.
+
+    Latencies are kept per ``(endpoint, status)``, where ``status`` is the HTTP status
+    code or ``"error"`` when no response arrived; errors are also counted by exception
+    type. Request and response body bytes are summed per endpoint. Recording is a dict
+    lookup and a few additions under one lock, so every call can be measured.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._bytes_sent: Dict[str, int] = {}
+        self._bytes_received: Dict[str, int] = {}
+        self._in_flight = 0
+
+    def call_started(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def record(self, endpoint: str, status: Any, seconds: float, *, bytes_sent: int = 0, bytes_received: int = 0, error: Optional[str] = None) -> None:
+        key = (endpoint, str(status))
+        with self._lock:
+            self._in_flight -= 1
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram()
+            histogram.observe(seconds)
+            if error:
+                error_key = (endpoint, error)
+                self._errors[error_key] = self._errors.get(error_key, 0) + 1
+            self._bytes_sent[endpoint] = self._bytes_sent.get(endpoint, 0) + bytes_sent
+            self._bytes_received[endpoint] = self._bytes_received.get(endpoint, 0) + bytes_received
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def histograms(self) -> Dict[Tuple[str, str], Histogram]:
+        """Copies of the latency histograms keyed by ``(endpoint, status)``."""
+        with self._lock:
+            return {key: histogram.copy() for key, histogram in self._latency.items()}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-endpoint latency summaries (p50/p95/p99) by status, error counts and byte totals."""
+        with self._lock:
+            endpoints: Dict[str, Dict[str, Any]] = {}
+            for (endpoint, status), histogram in sorted(self._latency.items()):
+                entry = endpoints.setdefault(endpoint, {"calls": 0, "by_status": {}, "errors": {}})
+                entry["calls"] += histogram.count
+                entry["by_status"][status] = histogram.summary()
+            for (endpoint, error), count in sorted(self._errors.items()):
+                endpoints.setdefault(endpoint, {"calls": 0, "by_status": {}, "errors": {}})["errors"][error] = count
+            for endpoint, entry in endpoints.items():
+                entry["bytes_sent"] = self._bytes_sent.get(endpoint, 0)
+                entry["bytes_received"] = self._bytes_received.get(endpoint, 0)
+            return {"in_flight": self._in_flight, "endpoints": endpoints}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latency.clear()
+            self._errors.clear()
+            self._bytes_sent.clear()
+            self._bytes_received.clear()
+
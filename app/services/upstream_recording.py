@@ -0,0 +1,156 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .hospital_api_client import OPERATION_CREATE, OPERATION_ACTIVATE, OPERATION_GET, OPERATION_DELETE
+
+# Transport errors a replay can raise again, by the name they were recorded under
+REPLAYABLE_ERRORS = {
+    cls.__name__: cls
+    for cls in (
+        requests.exceptions.ConnectTimeout,
+        requests.exceptions.ReadTimeout,
+        requests.exceptions.Timeout,
+        requests.exceptions.ConnectionError,
+        requests.exceptions.ChunkedEncodingError,
+    )
+}
+
+
+def operation_for(method: str, path: str) -> Optional[str]:
+    """Which upstream operation a request is, from its method and path."""
+    method = method.upper()
+    path = path.rstrip("/")
+    if method == "POST" and path.endswith("/hospitals"):
+        return OPERATION_CREATE
+    if method == "PATCH" and path.endswith("/activate"):
+        return OPERATION_ACTIVATE
+    if "/hospitals/batch/" in path + "/":
+        return {"GET": OPERATION_GET, "DELETE": OPERATION_DELETE}.get(method)
+    return None
+
+
+def _text(body: Any) -> Optional[str]:
+    if isinstance(body, bytes):
+        return body.decode("utf-8", errors="replace")
+    if isinstance(body, (dict, list)):
+        return json.dumps(body)
+    return body if isinstance(body, str) else None
+
+
+class TrafficRecorder:
+    """Append every upstream exchange to a JSON-lines file, with its timing.
+
+    Each line holds the operation, method and path, request body, response status,
+    content type and body (or the transport error), the call's duration and its start
+    offset from the beginning of the recording. Safe to share between threads.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def record(self, operation: str, method: str, url: str, started: float, elapsed: float, *, request_body: Any = None, response: Optional[requests.Response] = None, error: Optional[BaseException] = None) -> None:
+        entry: Dict[str, Any] = {
+            "operation": operation,
+            "method": method.upper(),
+            "path": urlsplit(url).path,
+            "offset": round(started - self._started, 6),
+            "elapsed": round(elapsed, 6),
+            "request_body": _text(request_body),
+        }
+        if error is not None:
+            entry["error"] = {"type": type(error).__name__, "message": str(error)}
+        else:
+            headers = getattr(response, "headers", None) or {}
+            entry["status"] = response.status_code
+            entry["content_type"] = headers.get("Content-Type", "application/json")
+            entry["body"] = response.text
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def load_recording(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayAdapter(BaseAdapter):
+    """A requests transport that answers from a recording instead of the network.
+
+    Requests are matched to recorded exchanges of the same operation in recorded order,
+    cycling when a run needs more than were captured; batch ids in paths do not need to
+    match. Each answer is delayed by its recorded duration times ``speed`` (``1.0`` the
+    original timing, ``0.5`` twice as fast, ``0`` no delay) and recorded transport errors
+    are raised again. Mount it on a session to replay a run offline.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], *, speed: float = 1.0) -> None:
+        super().__init__()
+        self.speed = max(0.0, speed)
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        for entry in entries:
+            self._entries[entry["operation"]].append(entry)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, *, speed: float = 1.0) -> "ReplayAdapter":
+        return cls(load_recording(path), speed=speed)
+
+    def _next(self, operation: Optional[str]) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._entries.get(operation)
+            if not entries:
+                raise requests.exceptions.ConnectionError(f"No recorded exchange to replay for operation '{operation}'")
+            entry = entries.popleft()
+            entries.append(entry)
+            return entry
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, timeout: Any = None, verify: Any = True, cert: Any = None, proxies: Any = None) -> requests.Response:
+        entry = self._next(operation_for(request.method, urlsplit(request.url).path))
+        delay = entry.get("elapsed", 0.0) * self.speed
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.exceptions.ReadTimeout(f"Replayed response took {delay:.3f}s, longer than the {read_timeout}s read timeout", request=request)
+        if delay > 0:
+            time.sleep(delay)
+
+        error = entry.get("error")
+        if error:
+            raise REPLAYABLE_ERRORS.get(error["type"], requests.exceptions.ConnectionError)(error["message"], request=request)
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict({"Content-Type": entry.get("content_type", "application/json")})
+        response._content = (entry.get("body") or "").encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=delay)
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def replay_session(adapter: ReplayAdapter) -> requests.Session:
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,176 @@
+"""Declarative column schema for hospital CSV rows, compiled once per header."""
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..constants import (
+    ERROR_NAME_REQUIRED,
+    ERROR_ADDRESS_REQUIRED,
+    ERROR_PHONE_INVALID,
+    ERROR_ROW_FEW_COLUMNS,
+    ERROR_FIELD_TOO_LONG_TEMPLATE,
+    ERROR_CODE_ROW_TOO_SHORT,
+    MAX_NAME_LENGTH,
+    MAX_ADDRESS_LENGTH,
+)
+
+
+@dataclass(frozen=True)
+class ColumnRule:
+    """How one CSV column is cleaned and checked.
+
+    - required: value must be non-empty after cleaning
+    - strip: trim surrounding whitespace
+    - remove_chars: characters deleted before matching (e.g. phone separators)
+    - pattern: full-match regex for non-empty values
+    - max_length: upper bound on the cleaned value
+    """
+    name: str
+    required: bool = False
+    strip: bool = True
+    remove_chars: str = ""
+    pattern: Optional[str] = None
+    max_length: Optional[int] = None
+    required_error: Optional[str] = None
+    invalid_error: Optional[str] = None
+
+
+HOSPITAL_SCHEMA: Tuple[ColumnRule, ...] = (
+    ColumnRule("name", required=True, max_length=MAX_NAME_LENGTH, required_error=ERROR_NAME_REQUIRED),
+    ColumnRule("address", required=True, max_length=MAX_ADDRESS_LENGTH, required_error=ERROR_ADDRESS_REQUIRED),
+    ColumnRule("phone", remove_chars=" ()-.", pattern=r"\d{10}", invalid_error=ERROR_PHONE_INVALID),
+)
+
+
+class CompiledRowValidator:
+    """Per-row validator/parser with column indexes, regexes and translate tables resolved up front."""
+
+    def __init__(self, rules: Sequence[ColumnRule], indexes: Sequence[Optional[int]]) -> None:
+        self._columns = []
+        for rule, index in zip(rules, indexes):
+            if index is None:
+                continue
+            self._columns.append((
+                rule.name,
+                index,
+                rule.required,
+                rule.strip,
+                str.maketrans("", "", rule.remove_chars) if rule.remove_chars else None,
+                re.compile(rule.pattern).fullmatch if rule.pattern else None,
+                rule.max_length,
+                rule.required_error or f"{rule.name} is required and cannot be empty",
+                rule.invalid_error or f"{rule.name} is invalid",
+                ERROR_FIELD_TOO_LONG_TEMPLATE.format(column=rule.name, max_length=rule.max_length) if rule.max_length else None,
+            ))
+        required = [index for rule, index in zip(rules, indexes) if rule.required and index is not None]
+        self.min_columns = max(required) + 1 if required else 0
+        self.error_codes: Dict[str, str] = {ERROR_ROW_FEW_COLUMNS: ERROR_CODE_ROW_TOO_SHORT}
+        for key, _, _, _, _, _, _, required_error, invalid_error, too_long_error in self._columns:
+            self.error_codes[required_error] = f"{key}_required"
+            self.error_codes[invalid_error] = f"{key}_invalid"
+            if too_long_error:
+                self.error_codes[too_long_error] = f"{key}_too_long"
+
+    def validate(self, row: List[str]) -> Tuple[Optional[Dict[str, Any]], Sequence[str]]:
+        """Return (hospital, ()) for a valid row or (None, errors) otherwise."""
+        row_len = len(row)
+        if row_len < self.min_columns:
+            return None, [ERROR_ROW_FEW_COLUMNS]
+
+        hospital: Dict[str, Any] = {}
+        errors: Optional[List[str]] = None
+        for key, index, required, strip, table, match, max_length, required_error, invalid_error, too_long_error in self._columns:
+            if index < row_len:
+                value = row[index]
+                if strip:
+                    value = value.strip()
+            else:
+                value = ""
+            if not value:
+                if required:
+                    if errors is None:
+                        errors = []
+                    errors.append(required_error)
+                continue
+            if table is not None:
+                value = value.translate(table)
+            if match is not None and match(value) is None:
+                if errors is None:
+                    errors = []
+                errors.append(invalid_error)
+            elif max_length is not None and len(value) > max_length:
+                if errors is None:
+                    errors = []
+                errors.append(too_long_error)
+            else:
+                hospital[key] = value
+
+        if errors:
+            return None, errors
+        return hospital, ()
+
+    def parse(self, row: List[str]) -> Optional[Dict[str, Any]]:
+        """Extract cleaned values without checking them; None if the row is too short."""
+        if len(row) < self.min_columns:
+            return None
+        hospital: Dict[str, Any] = {}
+        row_len = len(row)
+        for key, index, _, strip, table, _, _, _, _, _ in self._columns:
+            if index >= row_len:
+                continue
+            value = row[index].strip() if strip else row[index]
+            if table is not None:
+                value = value.translate(table)
+            if value:
+                hospital[key] = value
+        return hospital
+
+
+def scan_rows(rows: Iterable[List[str]], row_validator: CompiledRowValidator, *, on_valid: Optional[Callable[[int, Dict[str, Any]], None]] = None, max_errors: Optional[int] = None) -> Tuple[int, List[Dict[str, Any]], Dict[str, int], bool]:
+    """The one row loop shared by sequential and parallel validation.
+
+    Validates each row, hands valid ones to ``on_valid(row_number, hospital)`` and
+    counts errors by code. Stops after ``max_errors`` failing rows when set.
+    Returns (row_count, errors, error_counts, stopped_early).
+    """
+    validate = row_validator.validate
+    codes = row_validator.error_codes
+    errors: List[Dict[str, Any]] = []
+    error_counts: Dict[str, int] = {}
+    row_count = 0
+    for row_count, row in enumerate(rows, start=1):
+        hospital, row_errors = validate(row)
+        if row_errors:
+            errors.append({"row": row_count, "error": "; ".join(row_errors)})
+            for message in row_errors:
+                code = codes.get(message, "invalid")
+                error_counts[code] = error_counts.get(code, 0) + 1
+            if max_errors is not None and len(errors) >= max_errors:
+                return row_count, errors, error_counts, True
+        elif on_valid is not None:
+            on_valid(row_count, hospital)
+    return row_count, errors, error_counts, False
+
+
+def count_error_codes(errors: List[Dict[str, Any]], codes: Dict[str, str]) -> Dict[str, int]:
+    """Count error codes for a truncated list of row errors (messages are joined with '; ')."""
+    counts: Dict[str, int] = {}
+    for error in errors:
+        for message in error["error"].split("; "):
+            code = codes.get(message, "invalid")
+            counts[code] = counts.get(code, 0) + 1
+    return counts
+
+
+def resolve_indexes(rules: Sequence[ColumnRule], header: Optional[Sequence[str]] = None) -> List[Optional[int]]:
+    """Map each rule to its column index: by case-insensitive header name, or by position when no header is given."""
+    if header is None:
+        return list(range(len(rules)))
+    positions: Dict[str, int] = {}
+    for index, column in enumerate(header):
+        positions.setdefault(column.strip().lower(), index)
+    return [positions.get(rule.name.lower()) for rule in rules]
+
+
+def compile_schema(rules: Sequence[ColumnRule] = HOSPITAL_SCHEMA, header: Optional[Sequence[str]] = None) -> CompiledRowValidator:
+    return CompiledRowValidator(rules, resolve_indexes(rules, header))
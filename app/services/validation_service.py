@@ -1,11 +1,7 @@
 import csv
 import io
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Sequence, Tuple, Optional, TextIO, Union
 from ..constants import (
-    ERROR_NAME_REQUIRED,
-    ERROR_ADDRESS_REQUIRED,
-    ERROR_PHONE_INVALID,
-    ERROR_ROW_FEW_COLUMNS,
     ERROR_MISSING_REQUIRED_COLUMNS,
     ERROR_CSV_MIN_COLUMNS,
     ERROR_EXPECTED_COLUMN_TEMPLATE,
@@ -14,57 +10,117 @@ from ..constants import (
     ERROR_CSV_INVALID_GENERIC,
     ERROR_MAX_HOSPITALS_EXCEEDED_TEMPLATE,
     ERROR_NO_HOSPITAL_ROWS,
+    ERROR_DUPLICATE_ROW_TEMPLATE,
+    ERROR_CODE_DUPLICATE_ROW,
+    ERROR_CODE_NO_ROWS,
+    ERROR_CODE_MAX_HOSPITALS_EXCEEDED,
+    DUPLICATE_MODE_ALLOW,
+    DUPLICATE_MODE_FLAG,
+    DUPLICATE_MODE_COLLAPSE,
 )
+from ..utils.fingerprint import hospital_fingerprint
+from ..utils.streams import DecompressionError
+from ..utils.hospital_columns import HospitalColumns
+from .validation_schema import HOSPITAL_SCHEMA, ColumnRule, CompiledRowValidator, compile_schema, count_error_codes, scan_rows
 
 
 class HospitalCsvValidator:
     """Validate hospital CSV structure and provide diagnostics.
+
+    Row rules come from a declarative column schema (see ``validation_schema``),
+    compiled once per header into a single per-row validator that drives both
+    validation and parsing.
+
+    Rows with the same normalised name and address are handled per ``duplicate_mode``:
+    ``allow`` keeps them, ``flag`` reports them as row errors and ``collapse`` keeps
+    the first occurrence and lists the rest under ``duplicates``.
     """
 
     REQUIRED_COLUMNS = ["name", "address"]
     OPTIONAL_COLUMNS = ["phone"]
 
+    DUPLICATE_MODES = (DUPLICATE_MODE_ALLOW, DUPLICATE_MODE_FLAG, DUPLICATE_MODE_COLLAPSE)
+
+    def __init__(self, schema: Tuple[ColumnRule, ...] = HOSPITAL_SCHEMA, *, duplicate_mode: str = DUPLICATE_MODE_FLAG) -> None:
+        if duplicate_mode not in self.DUPLICATE_MODES:
+            raise ValueError(f"Unknown duplicate mode '{duplicate_mode}'; expected one of: {', '.join(self.DUPLICATE_MODES)}")
+        self._schema = schema
+        self._duplicate_mode = duplicate_mode
+        self._rules = {rule.name: compile_schema((rule,), None) for rule in schema}
+
+    def _read_header(self, csv_source: Union[str, TextIO]) -> Tuple[List[str], csv.reader]:
+        """Read and return header and a reader positioned at first data row.
 
-    def _read_header(self, csv_text: str) -> Tuple[List[str], csv.reader]:
-        """Read and return header and a reader positioned at first data row."""
-        stream = io.StringIO(csv_text)
+        Accepts CSV text or a text stream; streams are consumed lazily row by row.
+        """
+        stream = io.StringIO(csv_source) if isinstance(csv_source, str) else csv_source
         reader = csv.reader(stream)
         header = next(reader)
         return header, reader
 
-    def validate_header(self, csv_text: str) -> Dict[str, Any]:
-        """Validate the CSV header for required/optional columns in order.
+    @property
+    def schema(self) -> Tuple[ColumnRule, ...]:
+        return self._schema
 
-        Returns { valid, error?, header? }.
-        """
-        try:
-            header, _ = self._read_header(csv_text)
+    @property
+    def needs_rows(self) -> bool:
+        """Whether parsed rows are needed even when only validating (duplicate detection)."""
+        return self._duplicate_mode != DUPLICATE_MODE_ALLOW
+
+    def check_header(self, header: List[str]) -> Dict[str, Any]:
+        """Check an already-read header row; returns { valid, error?, header? }."""
+        if len(header) < len(self.REQUIRED_COLUMNS):
+            return {
+                "valid": False,
+                "error": ERROR_CSV_MIN_COLUMNS,
+            }
 
-            if len(header) < len(self.REQUIRED_COLUMNS):
+        expected = self.REQUIRED_COLUMNS + self.OPTIONAL_COLUMNS
+        for index, column in enumerate(header[: len(expected)]):
+            if column.lower() != expected[index].lower():
                 return {
                     "valid": False,
-                    "error": ERROR_CSV_MIN_COLUMNS,
+                    "error": ERROR_EXPECTED_COLUMN_TEMPLATE.format(index=index+1, expected=expected[index], actual=column),
                 }
 
-            expected = self.REQUIRED_COLUMNS + self.OPTIONAL_COLUMNS
-            for index, column in enumerate(header[: len(expected)]):
-                if column.lower() != expected[index].lower():
-                    return {
-                        "valid": False,
-                        "error": ERROR_EXPECTED_COLUMN_TEMPLATE.format(index=index+1, expected=expected[index], actual=column),
-                    }
+        return {
+            "valid": True,
+            "header": header,
+        }
 
-            return {
-                "valid": True,
-                "header": header,
-            }
+    def compile_row_validator(self, header: List[str]) -> Optional[CompiledRowValidator]:
+        """Compile the schema against a header; None if a required column is missing."""
+        lower_header = [h.lower() for h in header]
+        if any(column not in lower_header for column in self.REQUIRED_COLUMNS):
+            return None
+        return compile_schema(self._schema, lower_header)
+
+    def new_columns(self) -> HospitalColumns:
+        """Empty columnar container with one column per schema rule."""
+        return HospitalColumns([rule.name for rule in self._schema])
+
+    def _scan_rows(self, reader, row_validator: CompiledRowValidator, collect: bool, max_errors: Optional[int] = None) -> Tuple[int, List[Dict[str, Any]], HospitalColumns, Dict[str, int], bool]:
+        """Validate every row (see ``scan_rows``) and keep parsed hospitals as columns if ``collect``."""
+        hospitals = self.new_columns()
+        on_valid = hospitals.appender() if collect else None
+        row_count, errors, error_counts, stopped_early = scan_rows(reader, row_validator, on_valid=on_valid, max_errors=max_errors)
+        return row_count, errors, hospitals, error_counts, stopped_early
+
+    def validate_header(self, csv_text: str) -> Dict[str, Any]:
+        """Validate the CSV header for required/optional columns in order.
+
+        Returns { valid, error?, header? }.
+        """
+        try:
+            header, _ = self._read_header(csv_text)
+            return self.check_header(header)
         except StopIteration:
             return {"valid": False, "error": ERROR_CSV_EMPTY_HEADER}
         except Exception as e:
             return {"valid": False, "error": ERROR_CSV_INVALID_FORMAT_TEMPLATE.format(error=str(e))}
 
     def validate_rows(self, csv_text: str) -> Dict[str, Any]:
-        """Validate data rows for required fields and phone format.
+        """Validate data rows against the schema without checking header order.
 
         - name and address must be present and non-empty
         - phone (if provided) must be exactly 10 digits
@@ -73,39 +129,15 @@ class HospitalCsvValidator:
         """
         try:
             header, reader = self._read_header(csv_text)
-            errors: List[Dict[str, Any]] = []
-
-            lower_header = [h.lower() for h in header]
-            try:
-                name_idx = lower_header.index("name")
-                address_idx = lower_header.index("address")
-            except ValueError:
+            row_validator = self.compile_row_validator(header)
+            if row_validator is None:
                 return {
                     "valid": False,
                     "errors": [{"row": 0, "error": ERROR_MISSING_REQUIRED_COLUMNS}],
                     "row_count": 0,
                 }
-            phone_idx: Optional[int] = lower_header.index("phone") if "phone" in lower_header else None
-
-            row_count = 0
-            for row_number, row in enumerate(reader, start=1):
-                row_count += 1
-                row_errors: List[str] = []
-
-                if len(row) <= address_idx:
-                    row_errors.append(ERROR_ROW_FEW_COLUMNS)
-                else:
-                    name_error = self.validate_name(row[name_idx])
-                    if name_error:
-                        row_errors.append(name_error)
-
-                    address_error = self.validate_address(row[address_idx])
-                    if address_error:
-                        row_errors.append(address_error)
-
-                if row_errors:
-                    errors.append({"row": row_number, "error": "; ".join(row_errors)})
 
+            row_count, errors, _, _, _ = self._scan_rows(reader, row_validator, collect=False)
             is_valid = len(errors) == 0 and row_count > 0
             if row_count == 0:
                 errors.append({"row": 0, "error": ERROR_NO_HOSPITAL_ROWS})
@@ -119,51 +151,40 @@ class HospitalCsvValidator:
         except Exception as e:
             return {"valid": False, "errors": [{"row": 0, "error": str(e)}]}
 
-    def validate_all(self, csv_text: str, max_hospitals: Optional[int] = None) -> Dict[str, Any]:
+    def validate_all(self, csv_text: Union[str, TextIO], max_hospitals: Optional[int] = None, *, max_errors: Optional[int] = None, error_limit: Optional[int] = None) -> Dict[str, Any]:
         """Run both header and row validations and combine results."""
-        header_result = self.validate_header(csv_text)
-        if not header_result.get("valid"):
-            return {
-                "valid": False,
-                "errors": [{"row": 0, "error": header_result.get("error", "Invalid header")}],
-                "header": header_result.get("header"),
-                "row_count": 0,
-            }
+        result = self._validate(csv_text, max_hospitals=max_hospitals, collect=False, max_errors=max_errors, error_limit=error_limit)
+        result.pop("hospitals", None)
+        return result
 
-        rows_result = self.validate_rows(csv_text)
-        combined = {
-            "valid": rows_result.get("valid", False),
-            "errors": rows_result.get("errors", []),
-            "header": header_result.get("header"),
-            "row_count": rows_result.get("row_count", 0),
-        }
-        if combined["valid"] and combined.get("row_count", 0) == 0:
-            combined["valid"] = False
-            combined.setdefault("errors", []).append({"row": 0, "error": ERROR_NO_HOSPITAL_ROWS})
-        if combined["valid"] and max_hospitals is not None:
-            count = combined.get("row_count", 0)
-            if count > max_hospitals:
-                combined["valid"] = False
-                combined.setdefault("errors", []).append({
-                    "row": 0,
-                    "error": ERROR_MAX_HOSPITALS_EXCEEDED_TEMPLATE.format(count=count, max_allowed=max_hospitals),
-                })
-        return combined
-
-    def validate_and_parse(self, csv_text: str, max_hospitals: Optional[int] = None) -> Dict[str, Any]:
+    def validate_and_parse(self, csv_text: Union[str, TextIO], max_hospitals: Optional[int] = None, *, max_errors: Optional[int] = None, error_limit: Optional[int] = None, columnar: bool = False) -> Dict[str, Any]:
         """Single-pass validation that also parses hospitals on success.
 
-        Returns { valid, errors, row_count, header, hospitals? }.
-        When valid is True, 'hospitals' is a list of (row_number, hospital_dict).
+        Accepts CSV text or a text stream (see ``open_text_stream``); a stream is read
+        once, row by row, so only the parsed hospitals are kept in memory.
+
+        ``max_errors`` stops scanning after that many failing rows, flagged duplicates
+        included (the result then has ``stopped_early`` and a partial ``row_count``);
+        ``error_limit`` caps the errors returned (``errors_truncated``). ``error_counts``
+        always covers every error found.
+
+        Returns { valid, errors, row_count, header, hospitals?, error_counts?, stopped_early?, errors_truncated? }.
+        When valid is True, 'hospitals' is a list of (row_number, hospital_dict), or
+        a ``HospitalColumns`` with ``columnar``.
         """
+        return self._validate(csv_text, max_hospitals=max_hospitals, collect=True, max_errors=max_errors, error_limit=error_limit, columnar=columnar)
+
+    def _validate(self, csv_text: Union[str, TextIO], *, max_hospitals: Optional[int], collect: bool, max_errors: Optional[int] = None, error_limit: Optional[int] = None, columnar: bool = False) -> Dict[str, Any]:
         try:
             header, reader = self._read_header(csv_text)
         except StopIteration:
-            return {"valid": False, "errors": [{"row": 0, "error": ERROR_CSV_EMPTY_HEADER}], "row_count": 0}
+            return {"valid": False, "errors": [{"row": 0, "error": ERROR_CSV_EMPTY_HEADER}], "row_count": 0, "header": None}
+        except (UnicodeDecodeError, DecompressionError):
+            raise
         except Exception as e:
-            return {"valid": False, "errors": [{"row": 0, "error": ERROR_CSV_INVALID_FORMAT_TEMPLATE.format(error=str(e))}], "row_count": 0}
+            return {"valid": False, "errors": [{"row": 0, "error": ERROR_CSV_INVALID_FORMAT_TEMPLATE.format(error=str(e))}], "row_count": 0, "header": None}
 
-        header_check = self.validate_header(csv_text)
+        header_check = self.check_header(header)
         if not header_check.get("valid"):
             return {
                 "valid": False,
@@ -172,66 +193,107 @@ class HospitalCsvValidator:
                 "header": header_check.get("header"),
             }
 
-        lower_header = [h.lower() for h in header]
-        try:
-            name_idx = lower_header.index("name")
-            address_idx = lower_header.index("address")
-        except ValueError:
+        row_validator = self.compile_row_validator(header)
+        if row_validator is None:
             return {
                 "valid": False,
                 "errors": [{"row": 0, "error": ERROR_MISSING_REQUIRED_COLUMNS}],
                 "row_count": 0,
                 "header": header,
             }
-        phone_idx: Optional[int] = lower_header.index("phone") if "phone" in lower_header else None
-
-        errors: List[Dict[str, Any]] = []
-        hospitals: List[Tuple[int, Dict[str, Any]]] = []
-        row_count = 0
-        for row_number, row in enumerate(reader, start=1):
-            row_count += 1
-            row_errors: List[str] = []
-
-            if len(row) <= address_idx:
-                row_errors.append(ERROR_ROW_FEW_COLUMNS)
-            else:
-                name_error = self.validate_name(row[name_idx])
-                if name_error:
-                    row_errors.append(name_error)
-
-                address_error = self.validate_address(row[address_idx])
-                if address_error:
-                    row_errors.append(address_error)
-
-            if row_errors:
-                errors.append({"row": row_number, "error": "; ".join(row_errors)})
-            else:
-                hospital: Dict[str, Any] = {
-                    "name": row[name_idx].strip(),
-                    "address": row[address_idx].strip(),
-                }
-                if phone_idx is not None and len(row) > phone_idx and row[phone_idx].strip():
-                    hospital["phone"] = row[phone_idx].strip()
-                hospitals.append((row_number, hospital))
+
+        keep_rows = collect or self.needs_rows
+        row_count, errors, hospitals, error_counts, stopped_early = self._scan_rows(reader, row_validator, keep_rows, max_errors)
+        return self.finalize(
+            header, row_count, errors, hospitals if keep_rows else None,
+            max_hospitals=max_hospitals, error_counts=error_counts, stopped_early=stopped_early, max_errors=max_errors,
+            error_limit=error_limit, columnar=columnar, row_validator=row_validator,
+        )
+
+    def find_duplicates(self, hospitals: HospitalColumns, fingerprints: Optional[Sequence[str]] = None) -> List[Dict[str, int]]:
+        """Return [{row, duplicate_of}] for every row whose name+address repeats an earlier row.
+
+        ``fingerprints`` are the rows' precomputed ``hospital_fingerprint`` values, if any.
+        """
+        if fingerprints is None:
+            fingerprints = [hospital_fingerprint(name, address) for name, address in zip(hospitals.names, hospitals.addresses)]
+        first_rows: Dict[str, int] = {}
+        duplicates: List[Dict[str, int]] = []
+        for row, fingerprint in zip(hospitals.rows, fingerprints):
+            first = first_rows.setdefault(fingerprint, row)
+            if first != row:
+                duplicates.append({"row": row, "duplicate_of": first})
+        return duplicates
+
+    def _apply_duplicate_mode(self, errors: List[Dict[str, Any]], hospitals: HospitalColumns, fingerprints: Optional[Sequence[str]] = None) -> Tuple[List[Dict[str, Any]], HospitalColumns, List[Dict[str, int]]]:
+        if self._duplicate_mode == DUPLICATE_MODE_ALLOW:
+            return errors, hospitals, []
+        duplicates = self.find_duplicates(hospitals, fingerprints)
+        if not duplicates:
+            return errors, hospitals, []
+        if self._duplicate_mode == DUPLICATE_MODE_FLAG:
+            errors = errors + [
+                {"row": d["row"], "error": ERROR_DUPLICATE_ROW_TEMPLATE.format(row=d["duplicate_of"])}
+                for d in duplicates
+            ]
+            errors.sort(key=lambda e: e["row"])
+            return errors, hospitals, duplicates
+        return errors, hospitals.without_rows({d["row"] for d in duplicates}), duplicates
+
+    def finalize(self, header: List[str], row_count: int, errors: List[Dict[str, Any]], hospitals: Optional[HospitalColumns], *, max_hospitals: Optional[int] = None, error_counts: Optional[Dict[str, int]] = None, stopped_early: bool = False, max_errors: Optional[int] = None, error_limit: Optional[int] = None, columnar: bool = False, row_validator: Optional[CompiledRowValidator] = None, fingerprints: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Apply file-level rules (duplicates, non-empty, size limit) to scanned rows and build the result.
+
+        ``row_validator`` is the one the rows were scanned with; it is compiled from
+        ``header`` if not given and needed. ``fingerprints``, one per row of ``hospitals``,
+        spare duplicate detection from hashing every row again.
+        """
+        error_counts = dict(error_counts or {})
+        duplicates: List[Dict[str, int]] = []
+        if hospitals is not None:
+            errors, hospitals, duplicates = self._apply_duplicate_mode(errors, hospitals, fingerprints)
+            if self._duplicate_mode == DUPLICATE_MODE_FLAG and duplicates:
+                error_counts[ERROR_CODE_DUPLICATE_ROW] = len(duplicates)
+                if max_errors is not None and len(errors) >= max_errors:
+                    # Flagged rows are failing rows too: stop where the scan would have
+                    errors = errors[:max_errors]
+                    row_count = errors[-1]["row"]
+                    codes = dict((row_validator or self.compile_row_validator(header)).error_codes)
+                    codes.update({ERROR_DUPLICATE_ROW_TEMPLATE.format(row=d["duplicate_of"]): ERROR_CODE_DUPLICATE_ROW for d in duplicates})
+                    error_counts = count_error_codes(errors, codes)
+                    stopped_early = True
+                duplicates = []
 
         result: Dict[str, Any] = {
-            "valid": len(errors) == 0 and row_count > 0,
+            "valid": len(errors) == 0 and row_count > 0 and not stopped_early,
             "errors": errors,
             "row_count": row_count,
             "header": header,
         }
+        if duplicates:
+            result["duplicates"] = duplicates
         if row_count == 0:
             result.setdefault("errors", []).append({"row": 0, "error": ERROR_NO_HOSPITAL_ROWS})
+            error_counts[ERROR_CODE_NO_ROWS] = 1
 
-        if result["valid"] and max_hospitals is not None and row_count > max_hospitals:
+        hospital_count = row_count - len(duplicates)
+        if result["valid"] and max_hospitals is not None and hospital_count > max_hospitals:
             result["valid"] = False
             result.setdefault("errors", []).append({
                 "row": 0,
-                "error": ERROR_MAX_HOSPITALS_EXCEEDED_TEMPLATE.format(count=row_count, max_allowed=max_hospitals),
+                "error": ERROR_MAX_HOSPITALS_EXCEEDED_TEMPLATE.format(count=hospital_count, max_allowed=max_hospitals),
             })
+            error_counts[ERROR_CODE_MAX_HOSPITALS_EXCEEDED] = 1
+
+        if error_counts:
+            result["error_counts"] = error_counts
+        if stopped_early:
+            result["stopped_early"] = True
+        if error_limit is not None and len(result["errors"]) > error_limit:
+            result["errors"] = result["errors"][:error_limit]
+            result["errors_truncated"] = True
 
-        if result["valid"]:
-            result["hospitals"] = hospitals
+        if result["valid"] and hospitals is not None:
+            result["hospitals"] = hospitals if columnar else hospitals.to_tuples()
 
         return result
 
@@ -248,14 +310,14 @@ class HospitalCsvValidator:
         return {"valid": False, "error": top_error}
 
     def validate_name(self, name_value: str) -> Optional[str]:
-        value = name_value.strip() if name_value is not None else ""
-        if not value:
-            return ERROR_NAME_REQUIRED
-        return None
+        return self._validate_field("name", name_value)
 
     def validate_address(self, address_value: str) -> Optional[str]:
-        value = address_value.strip() if address_value is not None else ""
-        if not value:
-            return ERROR_ADDRESS_REQUIRED
-        return None
+        return self._validate_field("address", address_value)
+
+    def validate_phone(self, phone_value: str) -> Optional[str]:
+        return self._validate_field("phone", phone_value)
 
+    def _validate_field(self, column: str, value: Optional[str]) -> Optional[str]:
+        _, errors = self._rules[column].validate([value if value is not None else ""])
+        return errors[0] if errors else None
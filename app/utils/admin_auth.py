@@ -0,0 +1,11 @@
+import hmac
+
+from flask import current_app, request
+
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+
+
+def admin_token_valid() -> bool:
+    """True only when ``ADMIN_TOKEN`` is configured and the request's ``X-Admin-Token`` header matches it."""
+    expected = current_app.config.get('ADMIN_TOKEN')
+    return bool(expected) and hmac.compare_digest(request.headers.get(ADMIN_TOKEN_HEADER, ''), expected)
@@ -0,0 +1,71 @@
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .histogram import Histogram
+
+TIMING_VALIDATION = "validation_seconds"
+TIMING_QUEUE_WAIT = "queue_wait_seconds"
+TIMING_RECONCILE = "reconcile_seconds"
+TIMING_CREATE = "create_seconds"
+TIMING_UPSTREAM_CREATE = "upstream_create"
+TIMING_ACTIVATION = "activation_seconds"
+TIMING_REPOSITORY_WRITE = "repository_write_seconds"
+TIMING_TOTAL = "total_seconds"
+
+
+class BatchTimer:
+    """Monotonic phase timings for one batch run.
+
+    Phases use ``time.monotonic``, so wall-clock adjustments do not skew them.
+    Repository writes are timed call by call and summed; upstream create calls go into
+    a histogram so the status DTO can report p50/p95/max per row. Used by one thread.
+    """
+
+    __slots__ = ("_phases", "_started", "_upstream", "_repository_seconds")
+
+    def __init__(self) -> None:
+        self._phases: Dict[str, float] = {}
+        self._started = time.monotonic()
+        self._upstream = Histogram()
+        self._repository_seconds = 0.0
+
+    @property
+    def started(self) -> float:
+        return self._started
+
+    def set(self, name: str, seconds: float) -> None:
+        self._phases[name] = seconds
+
+    def since(self, name: str, started: float) -> None:
+        """Record ``name`` as the time elapsed since the ``time.monotonic`` value ``started``."""
+        self._phases[name] = time.monotonic() - started
+
+    def write(self, fn: Callable[..., Any], *args: Any) -> Any:
+        started = time.monotonic()
+        try:
+            return fn(*args)
+        finally:
+            self._repository_seconds += time.monotonic() - started
+
+    def upstream(self, fn: Callable[..., Any], *args: Any) -> Any:
+        started = time.monotonic()
+        try:
+            return fn(*args)
+        finally:
+            self._upstream.observe(time.monotonic() - started)
+
+    def as_dict(self) -> Dict[str, Any]:
+        timings: Dict[str, Any] = {name: round(seconds, 6) for name, seconds in self._phases.items()}
+        if self._upstream.count:
+            summary = self._upstream.summary()
+            timings[TIMING_UPSTREAM_CREATE] = {key: summary[key] for key in ("count", "p50", "p95", "max")}
+        timings[TIMING_REPOSITORY_WRITE] = round(self._repository_seconds, 6)
+        timings[TIMING_TOTAL] = round(time.monotonic() - self._started, 6)
+        return timings
+
+
+def queue_wait(queued_at: Optional[float], until: Optional[float] = None) -> Optional[float]:
+    """Seconds from a ``time.monotonic`` queued mark to ``until`` (default: now), or None without a mark."""
+    if not queued_at:
+        return None
+    return max(0.0, (time.monotonic() if until is None else until) - float(queued_at))
@@ -1,4 +1,4 @@
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Sequence, Tuple, Union
 
 import time
 from ..constants import (
@@ -7,6 +7,7 @@ from ..constants import (
     STATUS_PROCESSING,
     STATUS_ACTIVATED,
     STATUS_CREATED_AND_ACTIVATED,
+    STATUS_LINKED,
     KEY_STATUS,
     KEY_TOTAL_HOSPITALS,
     KEY_PROCESSED_COUNT,
@@ -14,22 +15,34 @@ from ..constants import (
     KEY_HOSPITALS,
     KEY_BATCH_ACTIVATED,
     KEY_PROCESSING_TIME_SECONDS,
+    KEY_SUB_BATCHES,
+    KEY_PARENT_BATCH_ID,
+    BATCH_KEY_SUB_BATCH_IDS,
+    BATCH_KEY_PARENT_ID,
+    KEY_TIMINGS,
 )
+from ..repository.hospital_table import HospitalTable
+from .hospital_columns import HospitalColumns
 
 
 class BatchDtoConverter:
     @staticmethod
-    def build_initial_batch(batch_id: str, hospitals: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+    def build_initial_batch(batch_id: str, hospitals: Union[HospitalColumns, List[Tuple[int, Dict[str, Any]]]]) -> Dict[str, Any]:
+        """New batch record; columnar hospitals are stored as a ``HospitalTable`` without building per-row dicts."""
         hospital_count = len(hospitals)
-        hospitals_map: Dict[str, Dict[str, Any]] = {}
-        for row_number, data in hospitals:
-            hospital_id = str(row_number)
-            hospital_entry: Dict[str, Any] = {
-                "id": hospital_id,
-                "status": "pending",
-            }
-            hospital_entry.update(data)
-            hospitals_map[hospital_id] = hospital_entry
+        hospitals_map: Union[HospitalTable, Dict[str, Dict[str, Any]]]
+        if isinstance(hospitals, HospitalColumns):
+            hospitals_map = HospitalTable(hospitals)
+        else:
+            hospitals_map = {}
+            for row_number, data in hospitals:
+                hospital_id = str(row_number)
+                hospital_entry: Dict[str, Any] = {
+                    "id": hospital_id,
+                    "status": "pending",
+                }
+                hospital_entry.update(data)
+                hospitals_map[hospital_id] = hospital_entry
 
         now = time.time()
         return {
@@ -43,6 +56,33 @@ class BatchDtoConverter:
             "hospitals": hospitals_map,
         }
 
+    @staticmethod
+    def build_parent_batch(batch_id: str, sub_batch_ids: List[str], total_hospitals: int) -> Dict[str, Any]:
+        """A split upload's parent job: no rows of its own, just the ids of its sub-batches."""
+        return {
+            "id": batch_id,
+            "total_hospitals": total_hospitals,
+            "processed_hospitals": 0,
+            "failed_hospitals": 0,
+            "start_time": time.time(),
+            "end_time": 0.0,
+            "batch_activated": False,
+            "hospitals": {},
+            BATCH_KEY_SUB_BATCH_IDS: list(sub_batch_ids),
+        }
+
+    @staticmethod
+    def to_hospital_entry(hospital_id: str, hospital: Dict[str, Any]) -> Dict[str, Any]:
+        """Per-row result shared by the status DTO and the export stream; always carries every key."""
+        status = hospital.get("status")
+        return {
+            "row": int(hospital_id) if str(hospital_id).isdigit() else hospital_id,
+            "name": hospital.get("name"),
+            "status": STATUS_CREATED_AND_ACTIVATED if status == STATUS_ACTIVATED else status,
+            "hospital_id": hospital.get("hospital_id"),
+            "error": hospital.get("error"),
+        }
+
     @staticmethod
     def to_status_dto(batch: Dict[str, Any]) -> Dict[str, Any]:
         hospitals_dict: Dict[str, Dict[str, Any]] = batch.get("hospitals", {})
@@ -53,20 +93,16 @@ class BatchDtoConverter:
         hospitals_list: List[Dict[str, Any]] = []
         for hospital_id, hospital in hospitals_dict.items():
             status = hospital.get("status")
-            if status == STATUS_CREATED:
+            if status == STATUS_CREATED or status == STATUS_LINKED:
                 processed += 1
             elif status == STATUS_FAILED:
                 failed += 1
 
-            entry: Dict[str, Any] = {
-                "row": int(hospital_id) if str(hospital_id).isdigit() else hospital_id,
-                "name": hospital.get("name"),
-                "status": STATUS_CREATED_AND_ACTIVATED if status == STATUS_ACTIVATED else status,
-            }
-            if hospital.get("hospital_id") is not None:
-                entry["hospital_id"] = hospital.get("hospital_id")
-            if hospital.get("error"):
-                entry["error"] = hospital.get("error")
+            entry = BatchDtoConverter.to_hospital_entry(hospital_id, hospital)
+            if entry.get("hospital_id") is None:
+                entry.pop("hospital_id")
+            if not entry.get("error"):
+                entry.pop("error")
             hospitals_list.append(entry)
 
         try:
@@ -74,25 +110,72 @@ class BatchDtoConverter:
         except Exception:
             hospitals_list.sort(key=lambda x: str(x["row"]))
 
-        start_time = float(batch.get("start_time", 0.0) or 0.0)
-        end_time = float(batch.get("end_time", 0.0) or 0.0)
         is_done = total > 0 and (processed + failed) >= total
-        if start_time > 0.0:
-            if is_done and end_time > start_time:
-                processing_time_seconds = end_time - start_time
-            else:
-                processing_time_seconds = max(0.0, time.time() - start_time)
-        else:
-            processing_time_seconds = 0.0
-
-        return {
+        dto: Dict[str, Any] = {
             "batch_id": batch.get("id"),
             KEY_TOTAL_HOSPITALS: total,
             KEY_PROCESSED_COUNT: processed,
             KEY_FAILED_COUNT: failed,
-            KEY_PROCESSING_TIME_SECONDS: processing_time_seconds,
+            KEY_PROCESSING_TIME_SECONDS: BatchDtoConverter._processing_time(batch.get("start_time"), batch.get("end_time"), is_done),
             KEY_BATCH_ACTIVATED: bool(batch.get("batch_activated", False)),
             KEY_HOSPITALS: hospitals_list,
         }
+        if batch.get(BATCH_KEY_PARENT_ID):
+            dto[KEY_PARENT_BATCH_ID] = batch[BATCH_KEY_PARENT_ID]
+        if batch.get(KEY_TIMINGS):
+            dto[KEY_TIMINGS] = dict(batch[KEY_TIMINGS])
+        return dto
+
+    @staticmethod
+    def to_job_status_dto(parent: Dict[str, Any], sub_batches: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """Aggregate a split upload's sub-batches into one status DTO for the parent job.
+
+        Sub-batches hold consecutive row ranges, so concatenating their rows keeps file order.
+        """
+        sub_dtos = [BatchDtoConverter.to_status_dto(sub) for sub in sub_batches]
+        total = sum(dto[KEY_TOTAL_HOSPITALS] for dto in sub_dtos)
+        processed = sum(dto[KEY_PROCESSED_COUNT] for dto in sub_dtos)
+        failed = sum(dto[KEY_FAILED_COUNT] for dto in sub_dtos)
+        is_done = total > 0 and (processed + failed) >= total
+        end_time = max((float(sub.get("end_time", 0.0) or 0.0) for sub in sub_batches), default=0.0)
+        dto: Dict[str, Any] = {
+            "batch_id": parent.get("id"),
+            KEY_TOTAL_HOSPITALS: total,
+            KEY_PROCESSED_COUNT: processed,
+            KEY_FAILED_COUNT: failed,
+            KEY_PROCESSING_TIME_SECONDS: BatchDtoConverter._processing_time(parent.get("start_time"), end_time, is_done),
+            KEY_BATCH_ACTIVATED: bool(sub_dtos) and all(dto[KEY_BATCH_ACTIVATED] for dto in sub_dtos),
+            KEY_SUB_BATCHES: [
+                BatchDtoConverter._sub_batch_summary(dto)
+                for dto in sub_dtos
+            ],
+            KEY_HOSPITALS: [entry for dto in sub_dtos for entry in dto[KEY_HOSPITALS]],
+        }
+        if parent.get(KEY_TIMINGS):
+            dto[KEY_TIMINGS] = dict(parent[KEY_TIMINGS])
+        return dto
+
+    @staticmethod
+    def _sub_batch_summary(dto: Dict[str, Any]) -> Dict[str, Any]:
+        summary = {
+            "batch_id": dto["batch_id"],
+            KEY_TOTAL_HOSPITALS: dto[KEY_TOTAL_HOSPITALS],
+            KEY_PROCESSED_COUNT: dto[KEY_PROCESSED_COUNT],
+            KEY_FAILED_COUNT: dto[KEY_FAILED_COUNT],
+            KEY_BATCH_ACTIVATED: dto[KEY_BATCH_ACTIVATED],
+        }
+        if KEY_TIMINGS in dto:
+            summary[KEY_TIMINGS] = dto[KEY_TIMINGS]
+        return summary
+
+    @staticmethod
+    def _processing_time(start_time: Any, end_time: Any, is_done: bool) -> float:
+        start_time = float(start_time or 0.0)
+        end_time = float(end_time or 0.0)
+        if start_time <= 0.0:
+            return 0.0
+        if is_done and end_time > start_time:
+            return end_time - start_time
+        return max(0.0, time.time() - start_time)
 
 
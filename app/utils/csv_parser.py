@@ -1,33 +1,41 @@
 import csv
 import io
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, TextIO, Union
+
+from ..services.validation_schema import HOSPITAL_SCHEMA, compile_schema
+from .hospital_columns import HospitalColumns
 
 
 class CsvHospitalParser:
     """Parse hospitals from CSV text into a structured list.
+
+    Columns are taken by position and cleaned with the same compiled schema the
+    validator uses; rows with fewer than the required columns are skipped.
     """
 
-    def parse_hospitals(self, csv_text: str) -> List[Tuple[int, Dict[str, Any]]]:
-        stream = io.StringIO(csv_text)
+    def __init__(self) -> None:
+        self._row_parser = compile_schema(HOSPITAL_SCHEMA)
+
+    def parse_hospitals(self, csv_text: Union[str, TextIO]) -> List[Tuple[int, Dict[str, Any]]]:
+        return self.parse_columns(csv_text).to_tuples()
+
+    def parse_columns(self, csv_text: Union[str, TextIO]) -> HospitalColumns:
+        """Parse into parallel row/name/address/phone lists, ready for ``build_initial_batch``."""
+        stream = io.StringIO(csv_text) if isinstance(csv_text, str) else csv_text
         reader = csv.reader(stream)
+        columns = HospitalColumns([rule.name for rule in HOSPITAL_SCHEMA])
 
         try:
             next(reader)
         except StopIteration:
-            return []
+            return columns
 
-        hospitals: List[Tuple[int, Dict[str, Any]]] = []
+        parse = self._row_parser.parse
+        append = columns.appender()
         for row_index, row in enumerate(reader, start=1):
-            if len(row) < 2:
+            hospital = parse(row)
+            if hospital is None:
                 continue
-            hospital: Dict[str, Any] = {
-                "name": row[0],
-                "address": row[1]
-            }
-            if len(row) > 2 and row[2]:
-                hospital["phone"] = row[2]
-            hospitals.append((row_index, hospital))
-
-        return hospitals
-
+            append(row_index, hospital)
 
+        return columns
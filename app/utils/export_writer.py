@@ -0,0 +1,30 @@
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+EXPORT_COLUMNS = ["row", "name", "status", "hospital_id", "error"]
+
+
+def iter_ndjson(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """Serialize chunks of export rows as newline-delimited JSON, one string per chunk."""
+    dumps = json.dumps
+    for chunk in chunks:
+        yield "".join(dumps(entry) + "\n" for entry in chunk)
+
+
+def iter_csv(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """Serialize chunks of export rows as CSV with a header row, one string per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [entry.get(column) if entry.get(column) is not None else "" for column in EXPORT_COLUMNS]
+            for entry in chunk
+        )
+        yield buffer.getvalue()
@@ -0,0 +1,13 @@
+import hashlib
+from typing import Optional
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Case-fold and collapse whitespace so trivially different spellings compare equal."""
+    return " ".join((value or "").split()).casefold()
+
+
+def hospital_fingerprint(name: Optional[str], address: Optional[str]) -> str:
+    """Stable hash of a hospital's normalised name and address, used to spot duplicates."""
+    key = normalize_text(name) + "\x1f" + normalize_text(address)
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,80 @@
+import bisect
+import math
+from typing import Dict, List, Optional, Sequence
+
+# Upper bounds in seconds; wide enough for a fast local upstream and a slow cold start alike
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram: constant memory and an O(log buckets) ``observe``.
+
+    ``counts[i]`` counts observations ``<= bounds[i]``, exclusive of lower buckets; the
+    last count is the overflow bucket. Not thread-safe; owners hold their own lock.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total", "min", "max")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def copy(self) -> "Histogram":
+        clone = Histogram(self.bounds)
+        clone.counts = list(self.counts)
+        clone.count = self.count
+        clone.total = self.total
+        clone.min = self.min
+        clone.max = self.max
+        return clone
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the ``q`` quantile by interpolating inside its bucket, clamped to the observed range."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(estimate, self.min), self.max)
+            seen += bucket_count
+        return self.max
+
+    def cumulative_counts(self) -> List[int]:
+        """Counts of observations ``<= bound`` for every bound plus +Inf, as Prometheus expects."""
+        out, running = [], 0
+        for bucket_count in self.counts:
+            running += bucket_count
+            out.append(running)
+        return out
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "min": round(self.min, 6) if self.count else None,
+            "max": round(self.max, 6) if self.count else None,
+            "p50": _rounded(self.quantile(0.5)),
+            "p95": _rounded(self.quantile(0.95)),
+            "p99": _rounded(self.quantile(0.99)),
+        }
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 6)
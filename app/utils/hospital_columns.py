@@ -0,0 +1,88 @@
+from typing import Any, Collection, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_COLUMN_KEYS = ("name", "address", "phone")
+
+
+class HospitalColumns:
+    """Parsed hospitals as parallel lists: ``rows`` plus one list per column, in file order.
+
+    A missing optional value is stored as None. Building, slicing and storing a batch
+    from this shape needs no per-row dicts; ``to_tuples`` converts to the
+    ``[(row_number, hospital_dict)]`` shape for callers that want it.
+    """
+
+    __slots__ = ("rows", "columns")
+
+    def __init__(self, keys: Sequence[str] = DEFAULT_COLUMN_KEYS) -> None:
+        self.rows: List[int] = []
+        self.columns: Dict[str, List[Optional[str]]] = {key: [] for key in keys}
+
+    @property
+    def names(self) -> List[Optional[str]]:
+        return self.columns["name"]
+
+    @property
+    def addresses(self) -> List[Optional[str]]:
+        return self.columns["address"]
+
+    @property
+    def phones(self) -> List[Optional[str]]:
+        return self.columns["phone"]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def appender(self):
+        """Return ``append(row_number, hospital_dict)`` with the list methods bound once."""
+        append_row = self.rows.append
+        appenders = [(key, values.append) for key, values in self.columns.items()]
+
+        def append(row_number: int, hospital: Dict[str, Any]) -> None:
+            append_row(row_number)
+            for key, append_value in appenders:
+                append_value(hospital.get(key))
+
+        return append
+
+    def extend(self, other: "HospitalColumns", row_offset: int = 0) -> None:
+        """Append another chunk's rows, shifting its row numbers by ``row_offset``."""
+        self.rows.extend([row + row_offset for row in other.rows] if row_offset else other.rows)
+        for key, values in self.columns.items():
+            values.extend(other.columns[key])
+
+    def slice(self, start: int, stop: int) -> "HospitalColumns":
+        part = HospitalColumns(tuple(self.columns))
+        part.rows = self.rows[start:stop]
+        part.columns = {key: values[start:stop] for key, values in self.columns.items()}
+        return part
+
+    def without_rows(self, excluded: Collection[int]) -> "HospitalColumns":
+        keep = [index for index, row in enumerate(self.rows) if row not in excluded]
+        kept = HospitalColumns(tuple(self.columns))
+        kept.rows = [self.rows[index] for index in keep]
+        kept.columns = {key: [values[index] for index in keep] for key, values in self.columns.items()}
+        return kept
+
+    def hospital(self, index: int) -> Dict[str, Any]:
+        """The row at ``index`` as a dict, omitting absent values."""
+        hospital: Dict[str, Any] = {}
+        for key, values in self.columns.items():
+            value = values[index]
+            if value is not None:
+                hospital[key] = value
+        return hospital
+
+    def iter_tuples(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        for index, row in enumerate(self.rows):
+            yield row, self.hospital(index)
+
+    def to_tuples(self) -> List[Tuple[int, Dict[str, Any]]]:
+        return list(self.iter_tuples())
+
+    @classmethod
+    def from_tuples(cls, hospitals: Sequence[Tuple[int, Dict[str, Any]]], keys: Sequence[str] = DEFAULT_COLUMN_KEYS) -> "HospitalColumns":
+        columns = cls(keys)
+        append = columns.appender()
+        for row, hospital in hospitals:
+            append(row, hospital)
+        return columns
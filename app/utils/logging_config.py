@@ -1,35 +1,142 @@
 import os
+import atexit
+import copy
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
-from flask import has_request_context, request
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from contextvars import ContextVar, Token
+from typing import Dict, Optional
+
+LOG_QUEUE_POLICY_BLOCK = "block"
+LOG_QUEUE_POLICY_DROP = "drop"
+LOG_QUEUE_POLICIES = (LOG_QUEUE_POLICY_BLOCK, LOG_QUEUE_POLICY_DROP)
+
+_listener = None
+
+
+LOG_CONTEXT_FIELDS = ('request_id', 'method', 'url', 'remote_addr')
+_EMPTY_LOG_CONTEXT = dict.fromkeys(LOG_CONTEXT_FIELDS)
+
+# Request details for log records, captured once per request by the middleware. Threads
+# started with ``contextvars.copy_context().run`` inherit it, so a request's background
+# batch work logs under the same request id.
+_log_context: ContextVar[Dict[str, Optional[str]]] = ContextVar('log_context', default=_EMPTY_LOG_CONTEXT)
+
+
+def set_log_context(**fields) -> Token:
+    """Set the log context for the current request or task; pass the token to ``reset_log_context``."""
+    context = dict(_EMPTY_LOG_CONTEXT)
+    context.update(fields)
+    return _log_context.set(context)
+
+
+def reset_log_context(token: Token) -> None:
+    _log_context.reset(token)
+
+
+def get_log_context() -> Dict[str, Optional[str]]:
+    return _log_context.get()
+
+
+def add_request_context(record):
+    """Copy the current log context onto a log record, once."""
+    if not hasattr(record, 'request_id'):
+        record.__dict__.update(_log_context.get())
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the captured request context to every record passing through a handler."""
+
+    def filter(self, record):
+        add_request_context(record)
+        return True
+
 
 class RequestFormatter(logging.Formatter):
     """Custom formatter to include request details in log records"""
     
     def format(self, record):
-        if has_request_context():
-            record.url = request.url
-            record.remote_addr = request.remote_addr
-            record.method = request.method
-            if hasattr(request, 'id'):
-                record.request_id = request.id
-            else:
-                record.request_id = '-'
-        else:
-            record.url = None
-            record.remote_addr = None
-            record.method = None
-            record.request_id = None
-            
+        add_request_context(record)
         return super().format(record)
 
+
+class BoundedQueueHandler(QueueHandler):
+    """Hand records to a bounded queue so logging threads never wait on handler I/O.
+
+    Install ``RequestContextFilter`` on it so request details are captured in the
+    logging thread; the listener formats records later on its own thread. When the
+    queue is full, the ``block`` policy waits for room and ``drop`` discards the
+    record; drops are counted and reported as a warning once the queue has room again.
+    """
+
+    def __init__(self, log_queue, policy=LOG_QUEUE_POLICY_BLOCK):
+        if policy not in LOG_QUEUE_POLICIES:
+            raise ValueError(f"Unknown log queue policy '{policy}'; expected one of: {', '.join(LOG_QUEUE_POLICIES)}")
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+        self._reported_drops = 0
+        self._drop_lock = threading.Lock()
+
+    def prepare(self, record):
+        # The listener is in-process, so only the arguments are merged now (they may
+        # change later); time formatting and tracebacks are left to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.policy == LOG_QUEUE_POLICY_BLOCK:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+            return
+        self._report_drops()
+
+    def _report_drops(self):
+        with self._drop_lock:
+            unreported = self.dropped - self._reported_drops
+            if not unreported:
+                return
+            self._reported_drops = self.dropped
+        notice = logging.LogRecord(__name__, logging.WARNING, __file__, 0, "Log queue full; dropped %d records", (unreported,), None)
+        try:
+            self.queue.put_nowait(self.prepare(notice))
+        except queue.Full:
+            pass
+
+
+class FlushingQueueListener(QueueListener):
+    """QueueListener whose stop waits for room in a full queue instead of failing."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def shutdown_logging():
+    """Stop the queue listener, writing out every record still queued."""
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
 def configure_logging(app):
     """Configure application logging
     
     Args:
         app: Flask application instance
     """
+    global _listener
+    shutdown_logging()
     log_level = app.config.get('LOG_LEVEL', 'INFO')
     log_format = '%(asctime)s [%(levelname)s] [%(request_id)s] %(remote_addr)s - %(method)s %(url)s - %(name)s - %(message)s'
     simple_format = '%(asctime)s [%(levelname)s] %(name)s - %(message)s'
@@ -43,9 +150,10 @@ def configure_logging(app):
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
     
+    handlers = []
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter if app.config.get('ENV') == 'production' else simple_formatter)
-    root_logger.addHandler(console_handler)
+    handlers.append(console_handler)
     
     log_dir = app.config.get('LOG_DIR', 'logs')
     if not os.path.exists(log_dir):
@@ -61,7 +169,7 @@ def configure_logging(app):
             backupCount=10
         )
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
         
         error_handler = RotatingFileHandler(
             os.path.join(log_dir, 'error.log'),
@@ -70,7 +178,21 @@ def configure_logging(app):
         )
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(formatter)
-        root_logger.addHandler(error_handler)
+        handlers.append(error_handler)
+
+    queue_size = app.config.get('LOG_QUEUE_SIZE', 10000)
+    if queue_size > 0:
+        # Handlers run on the listener thread; hot paths only enqueue records
+        log_queue = queue.Queue(maxsize=queue_size)
+        queue_handler = BoundedQueueHandler(log_queue, policy=app.config.get('LOG_QUEUE_POLICY', LOG_QUEUE_POLICY_BLOCK))
+        queue_handler.addFilter(RequestContextFilter())
+        root_logger.addHandler(queue_handler)
+        _listener = FlushingQueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            handler.addFilter(RequestContextFilter())
+            root_logger.addHandler(handler)
     
     app.logger.setLevel(log_level)
     
@@ -78,3 +200,6 @@ def configure_logging(app):
     logging.getLogger('urllib3').setLevel(logging.WARNING)
     
     app.logger.info(f"Logging configured with level: {log_level}")
+
+
+atexit.register(shutdown_logging)
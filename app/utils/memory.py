@@ -0,0 +1,40 @@
+import sys
+import types
+from typing import Any, List
+
+# Shared by every object of their kind, so never part of one object's footprint
+_SKIP_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Approximate bytes held by ``obj`` and everything reachable from it.
+
+    Follows dict items, list/tuple/set members, instance ``__dict__`` and
+    ``__slots__``, counting each object once. Objects shared with other structures
+    are counted in full, so per-object figures can overlap; the walk is iterative,
+    so deep structures do not hit the recursion limit.
+    """
+    seen = set()
+    stack: List[Any] = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SKIP_TYPES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, (str, bytes, bytearray, int, float, bool)) or current is None:
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        else:
+            if hasattr(current, "__dict__"):
+                stack.append(vars(current))
+            for cls in type(current).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if hasattr(current, slot):
+                        stack.append(getattr(current, slot))
+    return total
@@ -0,0 +1,44 @@
+"""Minimal Prometheus text exposition (format 0.0.4) for in-process counters."""
+from typing import Dict, Iterable, List, Tuple
+
+from .histogram import Histogram
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Dict[str, str]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def add_metric(lines: List[str], name: str, kind: str, help_text: str, samples: Iterable[Tuple[Labels, float]]) -> None:
+    """Append a counter or gauge with one sample per label set."""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+
+def add_histogram(lines: List[str], name: str, help_text: str, histograms: Iterable[Tuple[Labels, Histogram]]) -> None:
+    """Append a histogram family: cumulative ``_bucket`` series plus ``_sum`` and ``_count``."""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, histogram in histograms:
+        bounds = list(histogram.bounds) + [float("inf")]
+        for bound, count in zip(bounds, histogram.cumulative_counts()):
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(float(bound))})} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(float(histogram.total))}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
@@ -0,0 +1,42 @@
+import logging
+import time
+from typing import Any
+
+
+class RowLogSampler:
+    """Per-row logging policy for one batch run.
+
+    Row messages go out at INFO for every ``every``-th row only (all rows when
+    ``every`` is 1, none when 0) and at DEBUG otherwise; failures are always logged.
+    ``progress`` emits a one-line summary at most every ``progress_seconds``. Messages
+    take ``%``-style arguments, so skipped rows cost an integer check rather than a
+    formatted string.
+    """
+
+    __slots__ = ("logger", "batch_id", "total", "every", "progress_seconds", "_started", "_last_progress", "_debug")
+
+    def __init__(self, logger: logging.Logger, batch_id: str, total: int, *, every: int = 100, progress_seconds: float = 10.0) -> None:
+        self.logger = logger
+        self.batch_id = batch_id
+        self.total = total
+        self.every = max(0, int(every))
+        self.progress_seconds = progress_seconds
+        self._started = self._last_progress = time.monotonic()
+        self._debug = logger.isEnabledFor(logging.DEBUG)
+
+    def row(self, index: int, msg: str, *args: Any) -> None:
+        if self.every > 0 and index % self.every == 0:
+            self.logger.info(msg, *args)
+        elif self._debug:
+            self.logger.debug(msg, *args)
+
+    def failure(self, msg: str, *args: Any) -> None:
+        self.logger.error(msg, *args)
+
+    def progress(self, done: int, failed: int, *, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.progress_seconds:
+            return
+        self._last_progress = now
+        elapsed = now - self._started
+        self.logger.info("Batch %s progress: %d/%d rows done, %d failed (%.1f rows/s)", self.batch_id, done, self.total, failed, done / elapsed if elapsed > 0 else 0.0)
@@ -0,0 +1,183 @@
+import codecs
+import hashlib
+import io
+import zlib
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, TextIO
+
+GZIP_READ_BYTES = 64 * 1024
+# Output below this size is never treated as a decompression bomb, whatever the ratio
+DECOMPRESSION_RATIO_FLOOR_BYTES = 1024 * 1024
+DEFAULT_MAX_DECOMPRESSION_RATIO = 100
+
+
+class DecompressionError(OSError):
+    """A compressed upload is corrupt or truncated.
+
+    An OSError like ``gzip.BadGzipFile``, not a ValueError: form parsers treat
+    ValueError as malformed input and silently drop the body.
+    """
+
+
+class DecompressionBombError(DecompressionError):
+    """A compressed upload expands beyond the allowed decompression ratio."""
+
+
+class GzipDecompressingReader(io.RawIOBase):
+    """Read-only raw stream that gunzips another byte stream on the fly.
+
+    Compressed input is pulled in ``GZIP_READ_BYTES`` chunks and each read returns at
+    most the requested number of decompressed bytes, so neither side is ever held whole.
+    Concatenated gzip members are decoded back to back. Once output passes
+    ``DECOMPRESSION_RATIO_FLOOR_BYTES``, it may not exceed ``max_ratio`` times the
+    compressed bytes consumed so far (``None`` or 0 disables the guard).
+    The wrapped stream is not closed with this one.
+    """
+
+    def __init__(self, raw: BinaryIO, *, max_ratio: Optional[float] = DEFAULT_MAX_DECOMPRESSION_RATIO) -> None:
+        self._raw = raw
+        self._max_ratio = max_ratio
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._pending = b""
+        self._eof = False
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def _read(self, size: int) -> bytes:
+        if size <= 0:
+            return b""
+        while not self._eof:
+            if not self._pending:
+                chunk = self._raw.read(GZIP_READ_BYTES)
+                if not chunk:
+                    self._eof = True
+                    if not self._decompressor.eof:
+                        raise DecompressionError("Compressed upload is truncated")
+                    break
+                self.compressed_bytes += len(chunk)
+                self._pending = chunk
+            try:
+                data = self._decompressor.decompress(self._pending, size)
+            except zlib.error as e:
+                raise DecompressionError(f"Upload is not valid gzip data: {e}") from None
+            self._pending = self._decompressor.unconsumed_tail
+            if self._decompressor.eof and (self._decompressor.unused_data or self._pending):
+                self._pending = self._decompressor.unused_data + self._pending
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if data:
+                self.decompressed_bytes += len(data)
+                self._check_ratio()
+                return data
+        return b""
+
+    def _check_ratio(self) -> None:
+        if not self._max_ratio or self.decompressed_bytes <= DECOMPRESSION_RATIO_FLOOR_BYTES:
+            return
+        if self.decompressed_bytes > self.compressed_bytes * self._max_ratio:
+            raise DecompressionBombError(
+                f"Compressed upload expands more than {self._max_ratio:g}x; refusing to decompress it"
+            )
+
+
+class ReadableStream(io.RawIOBase):
+    """Raw stream view of a file-like object that only implements ``read``/``seek``/``tell``.
+
+    ``tempfile.SpooledTemporaryFile`` gained ``readable``, ``readinto`` and ``seekable``
+    only in Python 3.11, and ``io.TextIOWrapper`` needs them. The wrapped object is
+    not closed with this one.
+    """
+
+    def __init__(self, raw: BinaryIO) -> None:
+        self._raw = raw
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seekable(self) -> bool:
+        return hasattr(self._raw, "seek") and hasattr(self._raw, "tell")
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._raw.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+
+def as_io_stream(binary_stream: BinaryIO) -> BinaryIO:
+    """``binary_stream`` itself if it implements the ``io`` reader interface, else a buffered adapter over it."""
+    if hasattr(binary_stream, "readable") and hasattr(binary_stream, "seekable"):
+        return binary_stream
+    return io.BufferedReader(ReadableStream(binary_stream))
+
+
+def stream_size(binary_stream: BinaryIO) -> Optional[int]:
+    """Bytes left in a seekable stream from its current position, which is kept; None for non-seekable streams."""
+    if not as_io_stream(binary_stream).seekable():
+        return None
+    start = binary_stream.tell()
+    binary_stream.seek(0, io.SEEK_END)
+    size = binary_stream.tell() - start
+    binary_stream.seek(start)
+    return size
+
+
+def open_gzip_stream(binary_stream: BinaryIO, *, max_ratio: Optional[float] = DEFAULT_MAX_DECOMPRESSION_RATIO) -> BinaryIO:
+    """Wrap a gzip-compressed byte stream in a buffered, incrementally decompressing reader."""
+    return io.BufferedReader(GzipDecompressingReader(binary_stream, max_ratio=max_ratio), GZIP_READ_BYTES)
+
+
+@contextmanager
+def open_text_stream(binary_stream: BinaryIO, encoding: str = "utf-8") -> Iterator[TextIO]:
+    """Decode an uploaded byte stream incrementally as CSV-ready text.
+
+    Bytes are decoded chunk by chunk while the csv reader consumes lines, so the
+    upload never exists as one decoded string. The underlying stream is detached,
+    not closed, when the block exits. Decoding errors surface as UnicodeDecodeError
+    at the point they are read.
+    """
+    text_stream = io.TextIOWrapper(as_io_stream(binary_stream), encoding=encoding, newline="")
+    try:
+        yield text_stream
+    finally:
+        text_stream.detach()
+
+
+def content_hash(binary_stream: BinaryIO, *, gzipped: bool = False, max_ratio: Optional[float] = DEFAULT_MAX_DECOMPRESSION_RATIO) -> Optional[str]:
+    """SHA-256 of an upload's normalised CSV content, read line by line.
+
+    Normalisation drops a UTF-8 BOM, surrounding whitespace on each line, line-ending
+    differences and blank lines, so re-saved copies of the same file hash equal.
+    With ``gzipped`` the decompressed content is hashed, so a compressed copy hashes
+    equal to the plain file. The stream is rewound afterwards; None is returned for
+    non-seekable streams.
+    """
+    if not as_io_stream(binary_stream).seekable():
+        return None
+    start = binary_stream.tell()
+    lines = open_gzip_stream(binary_stream, max_ratio=max_ratio) if gzipped else binary_stream
+    digest = hashlib.sha256()
+    first = True
+    for line in lines:
+        if first:
+            if line.startswith(codecs.BOM_UTF8):
+                line = line[len(codecs.BOM_UTF8):]
+            first = False
+        line = line.strip()
+        if line:
+            digest.update(line)
+            digest.update(b"\n")
+    binary_stream.seek(start)
+    return digest.hexdigest()
@@ -1,9 +1,12 @@
+import logging
 import time
 from flask import Flask
 
 from app.services.batch_processor import BatchProcessor
 from app.repository.hospital_batch_repository import HospitalBatchRepository
 from app.services.hospital_api_client import HospitalApiClient
+from app.services.profiler import Profiler
+from app.utils.fingerprint import hospital_fingerprint
 
 
 class DummyClient(HospitalApiClient):
@@ -44,3 +47,158 @@ def test_processor_processes_each_hospital():
         assert fetched["hospitals"]["h2"]["status"] in {"processing", "created", "failed", "activated"}
 
 
+
+
+def test_processor_links_hospitals_created_by_earlier_batch():
+    from app.repository.hospital_index import HospitalIndexRepository
+
+    class CountingClient(DummyClient):
+        calls = []
+
+        def create_hospital(self, hospital_data, batch_id):
+            self.calls.append((hospital_data["name"], batch_id))
+            return super().create_hospital(hospital_data, batch_id)
+
+    app = Flask(__name__)
+    repo = HospitalBatchRepository()
+    index = HospitalIndexRepository()
+    processor = BatchProcessor(client_factory=lambda: CountingClient(), repository=repo, hospital_index=index)
+
+    def batch(batch_id, names):
+        return {
+            "id": batch_id,
+            "total_hospitals": len(names),
+            "hospitals": {
+                str(i): {"id": str(i), "name": n, "address": "addr", "status": "pending"}
+                for i, n in enumerate(names, start=1)
+            },
+        }
+
+    with app.app_context():
+        repo.save(batch("b1", ["A"]))
+        processor.start_batch("b1")
+        repo.save(batch("b2", ["a ", "B"]))
+        processor.start_batch("b2")
+
+        fetched = repo.find_by_batch_id("b2")
+        assert fetched["hospitals"]["1"]["status"] == "linked"
+        assert fetched["hospitals"]["1"]["hospital_id"] == "api-A"
+        assert fetched["hospitals"]["1"]["linked_batch_id"] == "b1"
+        assert fetched["hospitals"]["2"]["status"] == "activated"
+        assert CountingClient.calls == [("A", "b1"), ("B", "b2")]
+
+
+def test_processor_does_not_link_to_hospitals_whose_batch_failed_activation():
+    from app.repository.hospital_index import HospitalIndexRepository
+
+    class FlakyActivationClient(DummyClient):
+        calls = []
+
+        def create_hospital(self, hospital_data, batch_id):
+            self.calls.append((hospital_data["name"], batch_id))
+            return super().create_hospital(hospital_data, batch_id)
+
+        def activate_batch(self, batch_id):
+            if batch_id == "b1":
+                raise RuntimeError("activation failed")
+            return super().activate_batch(batch_id)
+
+    app = Flask(__name__)
+    repo = HospitalBatchRepository()
+    index = HospitalIndexRepository()
+    processor = BatchProcessor(client_factory=lambda: FlakyActivationClient(), repository=repo, hospital_index=index)
+
+    with app.app_context():
+        for batch_id in ("b1", "b2"):
+            repo.save({
+                "id": batch_id,
+                "total_hospitals": 1,
+                "hospitals": {"1": {"id": "1", "name": "A", "address": "addr", "status": "pending"}},
+            })
+            processor.start_batch(batch_id)
+
+        assert repo.find_by_batch_id("b1")["hospitals"]["1"]["status"] == "created"
+        fetched = repo.find_by_batch_id("b2")["hospitals"]["1"]
+        assert fetched["status"] == "activated"
+        assert "linked_batch_id" not in fetched
+        assert FlakyActivationClient.calls == [("A", "b1"), ("A", "b2")]
+        assert index.find(hospital_fingerprint("A", "addr")) == {"hospital_id": "api-A", "batch_id": "b2"}
+
+
+def test_resume_reconciles_rows_created_upstream_before_resending():
+    class UpstreamClient(DummyClient):
+        created = []
+
+        def get_hospitals_by_batch(self, batch_id):
+            return [
+                {"id": 7, "name": "a", "address": " ADDR "},
+                {"id": 8, "name": "A", "address": "addr"},
+                {"id": 9, "name": "Known", "address": "addr"},
+            ]
+
+        def create_hospital(self, hospital_data, batch_id):
+            self.created.append(hospital_data["name"])
+            return super().create_hospital(hospital_data, batch_id)
+
+    app = Flask(__name__)
+    repo = HospitalBatchRepository()
+    processor = BatchProcessor(client_factory=lambda: UpstreamClient(), repository=repo)
+    repo.save({
+        "id": "b1",
+        "total_hospitals": 4,
+        "hospitals": {
+            "1": {"id": "1", "name": "Known", "address": "addr", "status": "created", "hospital_id": 9},
+            "2": {"id": "2", "name": "A", "address": "addr", "status": "failed"},
+            "3": {"id": "3", "name": "A", "address": "addr", "status": "pending"},
+            "4": {"id": "4", "name": "B", "address": "addr", "status": "failed"},
+        },
+    })
+    with app.app_context():
+        processor.start_batch("b1", reconcile=True)
+
+    hospitals = repo.find_by_batch_id("b1")["hospitals"]
+    assert {hospitals["2"]["hospital_id"], hospitals["3"]["hospital_id"]} == {7, 8}
+    assert UpstreamClient.created == ["B"]
+    assert all(h["status"] == "activated" for h in hospitals.values())
+
+
+def test_row_logs_are_sampled_but_failures_always_logged(caplog):
+    class FlakyClient(DummyClient):
+        def create_hospital(self, hospital_data, batch_id):
+            if hospital_data["name"] == "H5":
+                raise Exception("upstream said no")
+            return super().create_hospital(hospital_data, batch_id)
+
+    app = Flask(__name__)
+    repo = HospitalBatchRepository()
+    processor = BatchProcessor(client_factory=lambda: FlakyClient(), repository=repo, logger=logging.getLogger("test.rows"), row_log_every=4)
+    repo.save({
+        "id": "b1",
+        "total_hospitals": 10,
+        "hospitals": {str(i): {"id": str(i), "name": f"H{i}", "address": "addr", "status": "pending"} for i in range(10)},
+    })
+    with caplog.at_level(logging.INFO, logger="test.rows"), app.app_context():
+        processor.start_batch("b1")
+
+    messages = [r.getMessage() for r in caplog.records if r.name == "test.rows"]
+    assert [m for m in messages if m.startswith("Creating hospital")] == [f"Creating hospital 'H{i}' (id: {i})" for i in (0, 4, 8)]
+    assert "Failed to create hospital 'H5' (id: 5): upstream said no" in messages
+    assert any(m.startswith("Batch b1 progress: 10/10 rows done, 1 failed") for m in messages)
+
+
+def test_batch_run_is_profiled_when_switched_on(tmp_path):
+    app = Flask(__name__)
+    repo = HospitalBatchRepository()
+    profiler = Profiler(str(tmp_path), batches=False)
+    processor = BatchProcessor(client_factory=lambda: DummyClient(), repository=repo, profiler=profiler)
+    for batch_id in ("b1", "b2"):
+        repo.save({"id": batch_id, "total_hospitals": 1, "hospitals": {"1": {"id": "1", "name": "A", "address": "x", "status": "pending"}}})
+
+    processor.start_batch("b1", app)
+    assert profiler.state()["recent"] == []
+
+    profiler.configure(batches=True)
+    processor.start_batch("b2", app)
+    [profile_id] = profiler.state()["recent"]
+    assert profile_id.endswith("-batch-b2")
+    assert "batch_processor.py:_run_batch" in (tmp_path / f"{profile_id}.collapsed").read_text()
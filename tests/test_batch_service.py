@@ -133,3 +133,123 @@ def test_resume_batch_schedules_processing():
         assert result["body"]["scheduled"] == 2  
 
 
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_bulk_create_hospitals_splits_oversized_upload_into_sub_batches():
+    app = make_app()
+    service = app.extensions[EXT_BATCH_SERVICE]
+    repo: HospitalBatchRepository = app.extensions[EXT_BATCH_REPOSITORY]
+    csv_text = "name,address\n" + "".join(f"H{i},addr {i}\n" for i in range(1, 8))
+    with app.app_context():
+        assert service.bulk_create_hospitals(csv_text, max_hospitals=3)["status"] == 400
+        assert service.bulk_create_hospitals(csv_text, max_hospitals=3, split=True, max_sub_batches=2)["status"] == 400
+
+        result = service.bulk_create_hospitals(csv_text, max_hospitals=3, split=True)
+        assert result["status"] == 202
+        body = result["body"]
+        assert body["total_hospitals"] == 7
+        assert [(s["first_row"], s["last_row"]) for s in body["sub_batches"]] == [(1, 3), (4, 6), (7, 7)]
+        parent_id = body["batch_id"]
+        assert _wait_until(lambda: repo.find_by_batch_id(parent_id)["end_time"] > 0)
+
+        status = service.get_batch_status(parent_id)["body"]
+        assert status["batch_activated"] is True
+        assert [h["row"] for h in status["hospitals"]] == list(range(1, 8))
+        assert all(h["status"] == "created_and_activated" for h in status["hospitals"])
+        assert [s["total_hospitals"] for s in status["sub_batches"]] == [3, 3, 1]
+
+        sub_id = body["sub_batches"][1]["batch_id"]
+        sub_status = service.get_batch_status(sub_id)["body"]
+        assert sub_status["parent_batch_id"] == parent_id
+        assert [h["row"] for h in sub_status["hospitals"]] == [4, 5, 6]
+
+
+def test_status_reports_phase_timings():
+    app = make_app()
+    service = app.extensions[EXT_BATCH_SERVICE]
+    repo: HospitalBatchRepository = app.extensions[EXT_BATCH_REPOSITORY]
+    csv_text = "name,address\n" + "".join(f"H{i},addr {i}\n" for i in range(1, 8))
+    with app.app_context():
+        batch_id = service.bulk_create_hospitals(csv_text)["body"]["batch_id"]
+        # The first snapshot that reads as finished already carries the run's timings
+        seen = []
+        assert _wait_until(lambda: seen.append(repo.find_by_batch_id(batch_id)) or seen[-1]["end_time"] > 0)
+        assert {"create_seconds", "repository_write_seconds", "total_seconds"} <= set(seen[-1]["timings"])
+        timings = service.get_batch_status(batch_id)["body"]["timings"]
+        assert set(timings) == {"validation_seconds", "queue_wait_seconds", "create_seconds", "upstream_create", "activation_seconds", "repository_write_seconds", "total_seconds"}
+        assert timings["upstream_create"]["count"] == 7
+        assert timings["upstream_create"]["p50"] <= timings["upstream_create"]["p95"] <= timings["upstream_create"]["max"]
+        assert timings["create_seconds"] + timings["activation_seconds"] <= timings["total_seconds"]
+
+        parent_id = service.bulk_create_hospitals(csv_text, max_hospitals=3, split=True)["body"]["batch_id"]
+        seen = []
+        assert _wait_until(lambda: seen.append(repo.find_by_batch_id(parent_id)) or seen[-1]["end_time"] > 0)
+        assert "total_seconds" in seen[-1]["timings"]
+        status = service.get_batch_status(parent_id)["body"]
+        assert {"validation_seconds", "queue_wait_seconds", "total_seconds"} <= set(status["timings"])
+        assert [s["timings"]["upstream_create"]["count"] for s in status["sub_batches"]] == [3, 3, 1]
+        assert all("queue_wait_seconds" in s["timings"] for s in status["sub_batches"])
+
+
+def test_resume_job_only_resumes_incomplete_sub_batches():
+    app = make_app()
+    service = app.extensions[EXT_BATCH_SERVICE]
+    repo: HospitalBatchRepository = app.extensions[EXT_BATCH_REPOSITORY]
+    repo.save({"id": "s1", "parent_id": "p", "total_hospitals": 1, "hospitals": {"1": {"id": "1", "name": "A", "status": "activated"}}})
+    repo.save({"id": "s2", "parent_id": "p", "total_hospitals": 2, "hospitals": {
+        "2": {"id": "2", "name": "B", "address": "x", "status": "failed"},
+        "3": {"id": "3", "name": "C", "address": "y", "status": "created"},
+    }})
+    repo.save({"id": "p", "total_hospitals": 3, "hospitals": {}, "sub_batch_ids": ["s1", "s2"]})
+    with app.app_context():
+        result = service.resume_batch("p")
+        assert result["status"] == 202
+        assert result["body"]["scheduled"] == 1
+        assert result["body"]["sub_batches"] == ["s2"]
+        assert _wait_until(lambda: repo.find_by_batch_id("p").get("end_time", 0) > 0)
+        assert repo.find_by_batch_id("s2")["hospitals"]["2"]["status"] == "activated"
+        assert service.resume_batch("p")["status"] == 409
+
+
+def test_reconcile_batch_reports_matches_and_upstream_failures(monkeypatch):
+    app = make_app()
+    service = app.extensions[EXT_BATCH_SERVICE]
+    repo: HospitalBatchRepository = app.extensions[EXT_BATCH_REPOSITORY]
+    repo.save({"id": "b1", "total_hospitals": 2, "hospitals": {
+        "1": {"id": "1", "name": "A", "address": "x", "status": "failed"},
+        "2": {"id": "2", "name": "B", "address": "y", "status": "pending"},
+    }})
+    with app.app_context():
+        # DummyClient has no base_url, so the real get_hospitals_by_batch fails
+        assert service.reconcile_batch("b1")["status"] == 502
+
+        monkeypatch.setattr(DummyClient, "get_hospitals_by_batch", lambda self, batch_id: [{"id": 5, "name": "A", "address": "x"}])
+        result = service.reconcile_batch("b1")
+        assert result["body"] == {"batch_id": "b1", "upstream_hospitals": 1, "matched": 1, "missing": 1}
+        assert repo.find_by_batch_id("b1")["hospitals"]["1"] == {"id": "1", "name": "A", "address": "x", "status": "created", "hospital_id": 5}
+        assert service.reconcile_batch("nope")["status"] == 404
+
+
+def test_reconcile_batch_matches_rows_left_processing(monkeypatch):
+    app = make_app()
+    service = app.extensions[EXT_BATCH_SERVICE]
+    repo: HospitalBatchRepository = app.extensions[EXT_BATCH_REPOSITORY]
+    # A run interrupted between the upstream create and the local status write
+    repo.save({"id": "b2", "total_hospitals": 1, "hospitals": {
+        "1": {"id": "1", "name": "A", "address": "x", "status": "processing"},
+    }})
+    monkeypatch.setattr(DummyClient, "get_hospitals_by_batch", lambda self, batch_id: [{"id": 7, "name": "A", "address": "x"}])
+    with app.app_context():
+        result = service.reconcile_batch("b2")
+    assert result["body"] == {"batch_id": "b2", "upstream_hospitals": 1, "matched": 1, "missing": 0}
+    assert repo.find_by_batch_id("b2")["hospitals"]["1"]["status"] == "created"
+    assert repo.find_by_batch_id("b2")["hospitals"]["1"]["hospital_id"] == 7
@@ -0,0 +1,40 @@
+import json
+
+from tools.benchmarks import compare, main, run_benchmarks, synthetic_csv
+from app.services.validation_service import HospitalCsvValidator
+
+
+def test_synthetic_csv_is_valid():
+    result = HospitalCsvValidator().validate_and_parse(synthetic_csv(50), columnar=True)
+    assert result["valid"] and result["row_count"] == 50
+
+
+def test_every_benchmark_runs_and_reports():
+    results = run_benchmarks([200], repeat=1, threads=(1, 2), workers=(1,))
+    names = [(r["name"], r["params"].get("threads")) for r in results]
+    assert names == [
+        ("validator.validate_and_parse", None),
+        ("parallel_validator.validate_file", None),
+        ("parallel_validator.validate_file", None),
+        ("converter.build_initial_batch", None),
+        ("converter.to_status_dto", None),
+        ("repository.contention", 1),
+        ("repository.contention", 2),
+        ("processor.fake_client", None),
+        ("processor.http_client", None),
+    ]
+    assert all(r["size"] == 200 and r["per_second"] > 0 for r in results)
+    assert [(r["params"]["columnar"], r["chunks"]) for r in results if r["name"].startswith("parallel")] == [(True, 1), (False, 1)]
+    assert run_benchmarks([200], repeat=1, only=["processor"], processor_max_rows=100) == []
+
+
+def test_results_file_can_be_compared(tmp_path, capsys):
+    baseline = tmp_path / "before.json"
+    main(["--sizes", "100", "--repeat", "1", "--only", "converter", "--output", str(baseline)])
+    main(["--sizes", "100", "--repeat", "1", "--only", "converter", "--output", str(tmp_path / "after.json"), "--compare", str(baseline)])
+    assert "converter.to_status_dto[100]" in capsys.readouterr().out
+
+    before = json.loads(baseline.read_text())
+    assert before["environment"]["python"]
+    rows = compare(before["results"], before["results"])
+    assert [row["change"] for row in rows] == [0.0, 0.0]
@@ -65,3 +65,19 @@ def test_to_status_dto_counts_and_sorting():
     assert h10.get("hospital_id") == "api-10"
 
 
+
+
+def test_build_initial_batch_from_columns_matches_tuple_input():
+    from app.repository.hospital_table import HospitalTable
+    from app.utils.hospital_columns import HospitalColumns
+
+    hospitals = [
+        (1, {"name": "A", "address": "addrA", "phone": "1234567890"}),
+        (3, {"name": "B", "address": "addrB"}),
+    ]
+    batch = BatchDtoConverter.build_initial_batch("b-1", HospitalColumns.from_tuples(hospitals))
+
+    assert isinstance(batch["hospitals"], HospitalTable)
+    assert batch["total_hospitals"] == 2
+    assert batch["hospitals"] == BatchDtoConverter.build_initial_batch("b-1", hospitals)["hospitals"]
+    assert list(batch["hospitals"]) == ["1", "3"]
@@ -19,3 +19,12 @@ def test_csv_parser_ignores_rows_with_few_columns():
     assert len(hospitals) == 1
     assert hospitals[0][1]["name"] == "A"
 
+
+
+def test_csv_parser_parse_columns():
+    parser = CsvHospitalParser()
+    columns = parser.parse_columns("name,address,phone\nA,addr,(555) 123-4567\nonlyname\nB,addr2,\n")
+    assert columns.rows == [1, 3]
+    assert columns.names == ["A", "B"]
+    assert columns.addresses == ["addr", "addr2"]
+    assert columns.phones == ["5551234567", None]
@@ -1,7 +1,14 @@
 import json
+import threading
+import time
 from types import SimpleNamespace
 
-from app.services.hospital_api_client import HospitalApiClient
+import pytest
+import requests
+
+from app.services.upstream_metrics import UpstreamMetrics
+from app.utils.histogram import Histogram
+from app.services.hospital_api_client import HospitalApiClient, LatencyTracker, UpstreamDeadlineExceeded, parse_timeouts
 
 
 class DummyResponse:
@@ -16,22 +23,22 @@ class DummyResponse:
 
 class DummySession:
     def __init__(self):
-        self.last = SimpleNamespace(method=None, url=None, json=None)
+        self.last = SimpleNamespace(method=None, url=None, json=None, timeout=None)
 
-    def post(self, url, json):
-        self.last = SimpleNamespace(method="POST", url=url, json=json)
+    def post(self, url, json, timeout=None):
+        self.last = SimpleNamespace(method="POST", url=url, json=json, timeout=timeout)
         return DummyResponse(200, {"id": "api-1"})
 
-    def patch(self, url):
-        self.last = SimpleNamespace(method="PATCH", url=url, json=None)
+    def patch(self, url, timeout=None):
+        self.last = SimpleNamespace(method="PATCH", url=url, json=None, timeout=timeout)
         return DummyResponse(200, {"activated_hospitals": ["x"]})
 
-    def get(self, url):
-        self.last = SimpleNamespace(method="GET", url=url, json=None)
+    def get(self, url, timeout=None):
+        self.last = SimpleNamespace(method="GET", url=url, json=None, timeout=timeout)
         return DummyResponse(200, [{"id": "api-1"}])
 
-    def delete(self, url):
-        self.last = SimpleNamespace(method="DELETE", url=url, json=None)
+    def delete(self, url, timeout=None):
+        self.last = SimpleNamespace(method="DELETE", url=url, json=None, timeout=timeout)
         return DummyResponse(200, {"deleted_count": 1})
 
 
@@ -58,3 +65,124 @@ def test_delete_batch_success():
     resp = client.delete_batch("b1")
     assert resp.get("deleted_count") == 1
 
+
+
+def test_each_operation_uses_its_configured_timeouts():
+    session = DummySession()
+    client = HospitalApiClient(base_url="http://x", session=session, timeouts=parse_timeouts("activate=1:120", connect=2, read=10))
+    client.create_hospital({"name": "A", "address": "addr"}, "b1")
+    assert session.last.timeout == (2, 10)
+    client.activate_batch("b1")
+    assert session.last.timeout == (1, 120)
+    with pytest.raises(ValueError):
+        parse_timeouts("upsert=1:2")
+
+
+def test_deadline_caps_timeouts_and_stops_calls_once_passed():
+    session = DummySession()
+    client = HospitalApiClient(base_url="http://x", session=session, deadline=time.monotonic() + 5)
+    client.get_hospitals_by_batch("b1")
+    assert session.last.timeout[1] <= 5
+
+    session.last = None
+    client.deadline = time.monotonic() - 1
+    with pytest.raises(UpstreamDeadlineExceeded):
+        client.create_hospital({"name": "A", "address": "addr"}, "b1")
+    assert session.last is None
+
+
+class SlowFirstSession(DummySession):
+    def __init__(self, first_delay):
+        super().__init__()
+        self.first_delay = first_delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if call == 1:
+            time.sleep(self.first_delay)
+            return DummyResponse(200, [{"id": "slow"}])
+        return DummyResponse(200, [{"id": "hedge"}])
+
+
+def test_hedged_get_returns_second_attempt_when_first_is_slow():
+    session = SlowFirstSession(first_delay=1.0)
+    client = HospitalApiClient(base_url="http://x", session=session, session_factory=lambda: session, hedge=True, hedge_delay=0.05)
+    start = time.monotonic()
+    assert client.get_hospitals_by_batch("b1") == [{"id": "hedge"}]
+    assert time.monotonic() - start < 0.5
+    assert session.calls == 2
+
+
+def test_hedged_get_uses_its_own_session():
+    primary = SlowFirstSession(first_delay=1.0)
+    hedges = []
+
+    def session_factory():
+        hedges.append(DummySession())
+        return hedges[-1]
+
+    client = HospitalApiClient(base_url="http://x", session=primary, session_factory=session_factory, hedge=True, hedge_delay=0.05)
+    assert client.get_hospitals_by_batch("b1") == [{"id": "api-1"}]
+    assert primary.calls == 1
+    assert len(hedges) == 1 and hedges[0].last.method == "GET"
+
+    assert HospitalApiClient(base_url="http://x", session=primary, hedge=True).hedge is False
+
+
+def test_hedge_delay_follows_recent_p95_latency():
+    latency = LatencyTracker(min_samples=20)
+    for i in range(100):
+        latency.record("get", i / 1000)
+    assert latency.quantile("get", 0.95) == pytest.approx(0.095)
+    assert latency.quantile("create", 0.95) is None
+
+    session = SlowFirstSession(first_delay=0.02)
+    client = HospitalApiClient(base_url="http://x", session=session, session_factory=lambda: session, hedge=True, hedge_delay=0.001, latency=latency)
+    assert client.get_hospitals_by_batch("b1") == [{"id": "slow"}]
+    assert session.calls == 1
+
+
+class FailingSession(DummySession):
+    def post(self, url, json, timeout=None):
+        raise requests.exceptions.ConnectTimeout("slow connect")
+
+    def delete(self, url, timeout=None):
+        return DummyResponse(503, text="unavailable")
+
+
+def test_calls_are_recorded_per_endpoint_and_status():
+    metrics = UpstreamMetrics()
+    client = HospitalApiClient(base_url="http://x", session=DummySession(), metrics=metrics)
+    client.create_hospital({"name": "A", "address": "addr"}, "b1")
+    client.create_hospital({"name": "B", "address": "addr"}, "b1")
+    client.get_hospitals_by_batch("b1")
+
+    failing = HospitalApiClient(base_url="http://x", session=FailingSession(), metrics=metrics)
+    with pytest.raises(Exception):
+        failing.create_hospital({"name": "C", "address": "addr"}, "b1")
+    with pytest.raises(Exception):
+        failing.delete_batch("b1")
+
+    snapshot = metrics.snapshot()
+    create = snapshot["endpoints"]["POST /hospitals/"]
+    assert create["calls"] == 3
+    assert create["by_status"]["200"]["count"] == 2
+    assert create["by_status"]["error"]["count"] == 1
+    assert create["errors"] == {"ConnectTimeout": 1}
+    assert snapshot["endpoints"]["GET /hospitals/batch/{batch_id}"]["by_status"]["200"]["p99"] is not None
+    assert snapshot["endpoints"]["DELETE /hospitals/batch/{batch_id}"]["errors"] == {"http_503": 1}
+    assert snapshot["in_flight"] == 0
+
+
+def test_histogram_quantiles_stay_within_bucket_and_observed_range():
+    histogram = Histogram(bounds=(0.1, 1.0))
+    for value in [0.05] * 90 + [0.5] * 9 + [3.0]:
+        histogram.observe(value)
+    assert 0.05 <= histogram.quantile(0.5) <= 0.1
+    assert 0.1 <= histogram.quantile(0.95) <= 1.0
+    assert histogram.quantile(1.0) == 3.0
+    assert histogram.cumulative_counts() == [90, 99, 100]
@@ -53,6 +53,16 @@ def test_update_hospital_status_single_thread():
     assert repo.find_by_batch_id(batch_id)["hospitals"]["h1"]["status"] == "done"
 
 
+def test_end_state_write_merges_timings():
+    repo = HospitalBatchRepository()
+    batch_id = repo.save({**_make_batch(1), "timings": {"validation_seconds": 0.5}})["id"]
+
+    repo.update_batch_processing_params(batch_id, 1, 0, 123.0, True, {"total_seconds": 2.0})
+    batch = repo.find_by_batch_id(batch_id)
+    assert (batch["end_time"], batch["batch_activated"]) == (123.0, True)
+    assert batch["timings"] == {"validation_seconds": 0.5, "total_seconds": 2.0}
+
+
 def test_concurrent_updates_different_hospitals():
     repo = HospitalBatchRepository()
     batch = repo.save(_make_batch(10))
@@ -108,3 +118,63 @@ def test_concurrent_updates_same_hospital_race():
 
 
 
+
+
+def test_iter_hospitals_chunks_and_filters():
+    repo = HospitalBatchRepository()
+    batch = _make_batch(5)
+    batch["hospitals"]["h2"]["status"] = "failed"
+    batch["hospitals"]["h4"]["status"] = "failed"
+    batch_id = repo.save(batch)["id"]
+
+    chunks = list(repo.iter_hospitals(batch_id, chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+
+    failed = [h["id"] for c in repo.iter_hospitals(batch_id, statuses={"failed"}, chunk_size=2) for h in c]
+    assert failed == ["h2", "h4"]
+
+
+def test_iter_hospitals_unknown_batch_raises_eagerly():
+    repo = HospitalBatchRepository()
+    with pytest.raises(KeyError):
+        repo.iter_hospitals("missing")
+
+
+def test_columnar_batch_rows_are_built_on_first_use_and_copies_are_isolated():
+    from app.utils.converter import BatchDtoConverter
+    from app.utils.hospital_columns import HospitalColumns
+
+    columns = HospitalColumns.from_tuples([(i, {"name": f"H{i}", "address": f"{i} Main St"}) for i in range(1, 1001)])
+    repo = HospitalBatchRepository()
+    batch_id = repo.save(BatchDtoConverter.build_initial_batch("cols", columns))["id"]
+
+    repo.update_hospital(batch_id, "7", {"status": "created", "hospital_id": 70})
+    fetched = repo.find_by_batch_id(batch_id)
+    assert len(fetched["hospitals"]) == 1000
+    assert fetched["hospitals"]["7"] == {"id": "7", "status": "created", "name": "H7", "address": "7 Main St", "hospital_id": 70}
+    assert fetched["hospitals"]["8"]["status"] == "pending"
+
+    fetched["hospitals"]["8"]["status"] = "failed"
+    assert repo.find_by_batch_id(batch_id)["hospitals"]["8"]["status"] == "pending"
+    with pytest.raises(KeyError):
+        fetched["hospitals"]["1001"]
+    assert [h["id"] for chunk in repo.iter_hospitals(batch_id, statuses={"created"}) for h in chunk] == ["7"]
+
+
+def test_contended_lock_waits_are_reported():
+    import threading
+    import time
+
+    waits = []
+    repo = HospitalBatchRepository(lock_wait_observer=waits.append)
+    repo.save({"id": "b1", "total_hospitals": 0, "hospitals": {}})
+    repo.find_by_batch_id("b1")
+    assert waits == []
+
+    repo._lock.acquire()
+    reader = threading.Thread(target=repo.find_by_batch_id, args=("b1",))
+    reader.start()
+    time.sleep(0.05)
+    repo._lock.release()
+    reader.join()
+    assert len(waits) == 1 and waits[0] >= 0.04
@@ -0,0 +1,33 @@
+from app.repository.hospital_index import HospitalIndexRepository
+from app.utils.fingerprint import hospital_fingerprint
+
+
+def test_fingerprint_normalises_case_and_whitespace():
+    assert hospital_fingerprint(" Alpha  Clinic", "1 Main St ") == hospital_fingerprint("alpha clinic", "1 MAIN  st")
+    assert hospital_fingerprint("Alpha", "1 Main St") != hospital_fingerprint("Alpha", "2 Main St")
+
+
+def test_index_persists_across_instances(tmp_path):
+    path = str(tmp_path / "index" / "hospitals.jsonl")
+    index = HospitalIndexRepository(path)
+    index.add("fp1", "api-1", "b1")
+    index.add("fp1", "api-2", "b2")
+
+    reloaded = HospitalIndexRepository(path)
+    assert reloaded.find("fp1") == {"hospital_id": "api-1", "batch_id": "b1"}
+    assert reloaded.find("missing") is None
+    assert len(reloaded) == 1
+
+
+def test_add_many_writes_new_entries_once(tmp_path):
+    path = str(tmp_path / "hospitals.jsonl")
+    index = HospitalIndexRepository(path)
+    index.add("fp1", "api-1", "b1")
+    assert index.add_many([("fp1", "api-9", "b2"), ("fp2", "api-2", "b2"), ("fp2", "api-3", "b2"), ("fp3", "api-4", "b2")]) == 2
+    assert index.add_many([]) == 0
+
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+    reloaded = HospitalIndexRepository(path)
+    assert reloaded.find("fp1") == {"hospital_id": "api-1", "batch_id": "b1"}
+    assert reloaded.find("fp2") == {"hospital_id": "api-2", "batch_id": "b2"}
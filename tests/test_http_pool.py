@@ -0,0 +1,56 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.http_pool import SharedHttpPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, body=b"ok"):
+        self.server.peers.add(self.client_address)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_GET = _reply
+    do_HEAD = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.peers = set()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_sessions_share_prewarmed_connections(server):
+    pool = SharedHttpPool(pool_maxsize=3)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    assert pool.prewarm(url, 3) == 3
+    warmed = set(server.peers)
+    assert 1 <= len(warmed) <= 3
+
+    for _ in range(5):
+        assert pool.session().get(url + "/x", timeout=5).text == "ok"
+    assert server.peers == warmed
+    pool.close()
+
+
+def test_prewarm_is_skipped_without_base_url_or_keep_alive(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    assert SharedHttpPool().prewarm(None, 4) == 0
+    assert SharedHttpPool(keep_alive=False).prewarm(url, 4) == 0
+    assert SharedHttpPool(keep_alive=False).session().headers["Connection"] == "close"
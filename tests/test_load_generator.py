@@ -0,0 +1,72 @@
+import json
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+from app import create_app
+from app.config import Config
+from tools.load_generator import LoadGenerator, LoadProfile, main, percentiles, synthetic_upload
+from tools.mock_hospital_api import MockProfile, create_mock_app, parse_latencies
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(app):
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def _api(serve, tmp_path, upstream_profile):
+    config = type("LoadConfig", (Config,), {
+        "HOSPITAL_API_BASE_URL": serve(create_mock_app(upstream_profile)),
+        "HTTP_PREWARM_CONNECTIONS": 0,
+        "IDEMPOTENCY_WINDOW_SECONDS": 0,
+        "LOG_DIR": str(tmp_path),
+    })
+    return serve(create_app(config)) + "/api/v1"
+
+
+def test_percentiles_use_nearest_rank():
+    stats = percentiles([float(v) for v in range(1, 101)])
+    assert (stats["count"], stats["p50"], stats["p95"], stats["max"]) == (100, 50.0, 95.0, 100.0)
+    assert percentiles([])["p50"] is None
+
+
+def test_synthetic_uploads_are_unique_per_upload():
+    first, second = synthetic_upload("run", 1, 3), synthetic_upload("run", 2, 3)
+    assert first.count(b"\n") == 4 and first != second
+
+
+def test_load_run_resumes_failed_rows_until_activated(serve, tmp_path):
+    base_url = _api(serve, tmp_path, MockProfile(latency=parse_latencies(["0.001"]), error_rate=0.2, seed=7))
+    profile = LoadProfile(base_url=base_url, rows=10, uploads=4, rate=50, concurrency=4, poll_interval=0.05, batch_timeout=20, max_resumes=20)
+    report = LoadGenerator(profile, log=lambda message: None).run()
+
+    assert report["outcomes"] == {"activated": 4}
+    assert report["requests"]["upload"]["count"] == 4 and report["requests"]["upload"]["errors"] == {}
+    assert report["requests"]["status"]["p50"] > 0
+    assert sum(batch["resumes"] for batch in report["batches"]) == report["requests"].get("resume", {}).get("count", 0)
+    assert report["time_to_activation_seconds"]["count"] == 4
+    assert report["server_rows_per_second"]["count"] == 4
+    # A resumed batch reports the timings of its last run, which only created the rows that had failed
+    assert all(batch["server_timings"]["upstream_create"]["count"] >= 1 for batch in report["batches"])
+
+
+def test_cli_writes_report_and_fails_on_rejected_uploads(serve, tmp_path, capsys):
+    base_url = _api(serve, tmp_path, MockProfile(latency=parse_latencies(["0"])))
+    output = tmp_path / "load.json"
+    assert main(["--base-url", base_url, "--rows", "5", "--uploads", "2", "--rate", "0", "--poll-interval", "0.05", "--quiet", "--output", str(output)]) == 0
+    assert json.loads(output.read_text())["outcomes"] == {"activated": 2}
+    assert "time to activation" in capsys.readouterr().out
+
+    # Over MAX_HOSPITALS_PER_BATCH without --split: every upload is rejected with 400
+    assert main(["--base-url", base_url, "--rows", "50", "--uploads", "1", "--quiet"]) == 1
@@ -0,0 +1,94 @@
+import logging
+import os
+import queue
+import time
+
+from app import create_app
+from app.config import Config
+import threading
+
+from flask import request
+
+from app.services.batch_service import BatchService
+from app.utils.logging_config import BoundedQueueHandler, FlushingQueueListener, RequestContextFilter, get_log_context, shutdown_logging
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        time.sleep(0.001)
+        self.messages.append(record.getMessage())
+
+
+def _record(message):
+    return logging.LogRecord("test", logging.INFO, __file__, 0, message, None, None)
+
+
+def test_drop_policy_counts_and_reports_dropped_records():
+    log_queue = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue, policy="drop")
+    for i in range(5):
+        handler.handle(_record(f"row {i}"))
+    assert handler.dropped == 3
+    assert [log_queue.get_nowait().getMessage() for _ in range(2)] == ["row 0", "row 1"]
+
+    handler.handle(_record("row 5"))
+    assert [log_queue.get_nowait().getMessage() for _ in range(2)] == ["row 5", "Log queue full; dropped 3 records"]
+
+
+def test_block_policy_loses_nothing_and_stop_flushes():
+    log_queue = queue.Queue(maxsize=4)
+    sink = ListHandler()
+    listener = FlushingQueueListener(log_queue, sink)
+    listener.start()
+    handler = BoundedQueueHandler(log_queue, policy="block")
+    for i in range(50):
+        handler.handle(_record(f"row {i}"))
+    listener.stop()
+    assert sink.messages == [f"row {i}" for i in range(50)]
+
+
+class QueuedLoggingConfig(Config):
+    LOG_QUEUE_SIZE = 100
+
+
+def test_create_app_routes_logging_through_the_queue(tmp_path):
+    QueuedLoggingConfig.LOG_DIR = str(tmp_path)
+    app = create_app(QueuedLoggingConfig)
+    root_handlers = logging.getLogger().handlers
+    assert len(root_handlers) == 1 and isinstance(root_handlers[0], BoundedQueueHandler)
+
+    with app.test_request_context("/api/v1/health"):
+        app.preprocess_request()
+        logging.getLogger("app.test").error("queued line")
+    shutdown_logging()
+    with open(os.path.join(tmp_path, "app.log")) as fh:
+        log_text = fh.read()
+    assert "queued line" in log_text and "/api/v1/health" in log_text
+    with open(os.path.join(tmp_path, "error.log")) as fh:
+        assert "queued line" in fh.read()
+
+
+def test_request_context_is_captured_once_and_follows_background_work():
+    app = create_app()
+    seen = {}
+    done = threading.Event()
+
+    def background(batch_id, app_, *args):
+        seen["context"] = get_log_context()
+        done.set()
+
+    with app.test_request_context("/api/v1/hospitals/bulk", method="POST"):
+        app.preprocess_request()
+        record = logging.LogRecord("t", logging.INFO, __file__, 0, "m", None, None)
+        RequestContextFilter().filter(record)
+        assert (record.request_id, record.method, record.url) == (request.id, "POST", "http://localhost/api/v1/hospitals/bulk")
+        BatchService._run_in_background(background, "b1")
+        request_id = request.id
+
+    assert done.wait(5)
+    assert seen["context"]["request_id"] == request_id
+    assert get_log_context()["request_id"] is None
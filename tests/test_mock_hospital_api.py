@@ -0,0 +1,97 @@
+import io
+import random
+import threading
+import time
+
+import pytest
+import requests
+from werkzeug.serving import make_server
+
+from app import create_app
+from app.config import Config
+from app.constants import EXT_BATCH_REPOSITORY
+from app.services.hospital_api_client import HospitalApiClient, UpstreamBatchNotFound
+from tools.mock_hospital_api import MockProfile, create_mock_app, parse_latencies, parse_latency
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(profile=None):
+        server = make_server("127.0.0.1", 0, create_mock_app(profile), threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_latency_specs():
+    rng = random.Random(1)
+    assert parse_latency("0.25")(rng) == 0.25
+    assert 0.1 <= parse_latency("uniform:0.1:0.2")(rng) <= 0.2
+    assert parse_latency("normal:0:1")(rng) >= 0
+    assert parse_latency("lognormal:0.05:0.5")(rng) > 0
+    assert set(parse_latencies(["0.01", "activate=exp:1"])) == {"default", "activate"}
+    for bad in ("gamma:1:2", "uniform:1", "fast"):
+        with pytest.raises(ValueError):
+            parse_latency(bad)
+    with pytest.raises(ValueError):
+        parse_latencies(["upsert=0.1"])
+
+
+def test_real_client_round_trip(mock_server):
+    client = HospitalApiClient(mock_server())
+    created = client.create_hospital({"name": "A", "address": "addr", "phone": "1"}, "b1")
+    client.create_hospital({"name": "B", "address": "addr"}, "b1")
+    assert [h["id"] for h in client.get_hospitals_by_batch("b1")] == [created["id"], created["id"] + 1]
+    assert client.activate_batch("b1")["activated_count"] == 2
+    assert all(h["active"] for h in client.get_hospitals_by_batch("b1"))
+    assert client.delete_batch("b1")["deleted_count"] == 2
+    with pytest.raises(UpstreamBatchNotFound):
+        client.get_hospitals_by_batch("b1")
+
+
+def test_faults_are_injected(mock_server):
+    base_url = mock_server(MockProfile(error_rate=1.0, error_status=500))
+    with pytest.raises(Exception, match="Status: 500"):
+        HospitalApiClient(base_url).create_hospital({"name": "A", "address": "addr"}, "b1")
+
+    base_url = mock_server(MockProfile(rate_limit=0.01, burst=1, retry_after=7))
+    assert requests.get(f"{base_url}/hospitals/batch/x").status_code == 404
+    throttled = requests.get(f"{base_url}/hospitals/batch/x")
+    assert throttled.status_code == 429 and throttled.headers["Retry-After"] == "7"
+    assert requests.get(f"{base_url}/stats").json()["throttled"] == 1
+
+    # Each trickled chunk arrives inside the read timeout, so only the total time shows it
+    base_url = mock_server(MockProfile(slow_loris_rate=1.0, slow_loris_seconds=0.5))
+    start = time.monotonic()
+    HospitalApiClient(base_url, timeouts={"create": (1.0, 0.3)}).create_hospital({"name": "A", "address": "addr"}, "b1")
+    assert time.monotonic() - start >= 0.45
+    with pytest.raises(Exception, match="Network error"):
+        HospitalApiClient(base_url, timeouts={"create": (1.0, 0.01)}).create_hospital({"name": "A", "address": "addr"}, "b1")
+
+
+class MockUpstreamConfig(Config):
+    HTTP_PREWARM_CONNECTIONS = 0
+    IDEMPOTENCY_WINDOW_SECONDS = 0
+
+
+def test_bulk_upload_end_to_end_against_mock(mock_server):
+    MockUpstreamConfig.HOSPITAL_API_BASE_URL = mock_server(MockProfile(latency=parse_latencies(["0.001"])))
+    app = create_app(MockUpstreamConfig)
+    csv_bytes = b"name,address\n" + b"".join(f"H{i},addr {i}\n".encode() for i in range(5))
+    response = app.test_client().post("/api/v1/hospitals/bulk", data={"file": (io.BytesIO(csv_bytes), "h.csv")}, content_type="multipart/form-data")
+    assert response.status_code == 202
+    batch_id = response.get_json()["batch_id"]
+
+    repo = app.extensions[EXT_BATCH_REPOSITORY]
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline and not repo.find_by_batch_id(batch_id).get("batch_activated"):
+        time.sleep(0.02)
+    hospitals = repo.find_by_batch_id(batch_id)["hospitals"]
+    assert all(h["status"] == "activated" and h["hospital_id"] for h in hospitals.values())
+    assert len(requests.get(f"{MockUpstreamConfig.HOSPITAL_API_BASE_URL}/hospitals/batch/{batch_id}").json()) == 5
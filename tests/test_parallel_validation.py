@@ -0,0 +1,119 @@
+import io
+
+import pytest
+
+from app import create_app
+from app.config import Config
+from app.services.parallel_validation import ParallelCsvValidator, find_record_boundaries
+from app.services.validation_service import HospitalCsvValidator
+
+
+def _csv_bytes(rows: int) -> bytes:
+    lines = ["name,address,phone"]
+    for i in range(1, rows + 1):
+        if i % 7 == 0:
+            lines.append(f'"Clinic {i}","{i} Main St\nSuite ""B""",555123{i % 10000:04d}')
+        elif i % 11 == 0:
+            lines.append(f",{i} Main St,")
+        else:
+            lines.append(f"Hospital {i},{i} Main St,")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def test_find_record_boundaries_skips_quoted_newlines():
+    data = b'a,b\n"x\ny",z\n"p\n\nq",r\nlast,row\n'
+    bounds = find_record_boundaries(data, 0, len(data), 1)
+    assert bounds == [0, 4, 12, 21, len(data)]
+    assert find_record_boundaries(data, 0, len(data), 1, max_splits=1) == [0, 4, len(data)]
+
+
+@pytest.fixture
+def parallel_validator():
+    validator = ParallelCsvValidator(HospitalCsvValidator(), workers=2, chunk_bytes=64)
+    yield validator
+    validator.shutdown()
+
+
+def test_parallel_matches_sequential_rows_and_errors(parallel_validator):
+    raw = _csv_bytes(120)
+    sequential = HospitalCsvValidator().validate_and_parse(raw.decode("utf-8"))
+    parallel = parallel_validator.validate_and_parse(io.BytesIO(raw))
+
+    assert parallel["row_count"] == sequential["row_count"] == 120
+    assert parallel["errors"] == sequential["errors"]
+    assert [e["row"] for e in parallel["errors"]] == [r for r in range(1, 121) if r % 11 == 0 and r % 7 != 0]
+    assert parallel["valid"] is False
+
+
+def test_parallel_parses_valid_file_with_global_row_numbers(parallel_validator):
+    raw = b"name,address\n" + b"".join(f'"H {i}","line1\nline2"\n'.encode() for i in range(1, 41))
+    result = parallel_validator.validate_and_parse(io.BytesIO(raw))
+    assert result["valid"] is True
+    assert [row for row, _ in result["hospitals"]] == list(range(1, 41))
+    assert result["hospitals"][39][1] == {"name": "H 40", "address": "line1\nline2"}
+
+
+def test_parallel_rejects_bad_header_and_empty_file(parallel_validator):
+    assert parallel_validator.validate_and_parse(io.BytesIO(b""))["valid"] is False
+    result = parallel_validator.validate_and_parse(io.BytesIO(b"bad,header\nA,b\n"))
+    assert result["valid"] is False and result["errors"][0]["row"] == 0
+
+
+def test_validate_route_uses_parallel_mode_above_threshold():
+    class ParallelConfig(Config):
+        PARALLEL_VALIDATION_MIN_BYTES = 1
+        PARALLEL_VALIDATION_WORKERS = 1
+
+    app = create_app(ParallelConfig)
+    client = app.test_client()
+    data = {'file': (io.BytesIO(b"name,address,phone\nA,addr,1234567890\nB,addr,\n"), 'h.csv')}
+    resp = client.post('/api/v1/hospitals/validate', data=data, content_type='multipart/form-data')
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body['valid'] is True and body['row_count'] == 2
+
+
+def test_validate_route_uses_parallel_mode_for_gzip_encoded_request(monkeypatch):
+    import gzip
+    from werkzeug.test import EnvironBuilder
+    from app.constants import EXT_BATCH_SERVICE
+
+    class ParallelConfig(Config):
+        PARALLEL_VALIDATION_MIN_BYTES = 1
+        PARALLEL_VALIDATION_WORKERS = 1
+
+    app = create_app(ParallelConfig)
+    parallel = app.extensions[EXT_BATCH_SERVICE]._parallel_validator
+    calls = []
+    original = parallel.validate_and_parse
+    monkeypatch.setattr(parallel, "validate_and_parse", lambda *args, **kwargs: calls.append(1) or original(*args, **kwargs))
+
+    environ = EnvironBuilder(method='POST', data={'file': (io.BytesIO(_csv_bytes(20)), 'h.csv')}).get_environ()
+    body = gzip.compress(environ['wsgi.input'].read())
+    resp = app.test_client().post('/api/v1/hospitals/validate', data=body, headers={'Content-Encoding': 'gzip', 'Content-Type': environ['CONTENT_TYPE']})
+    assert resp.status_code == 200
+    assert resp.get_json()['row_count'] == 20
+    assert calls == [1]
+
+
+def test_parallel_fail_fast_matches_sequential(parallel_validator):
+    raw = _csv_bytes(120)
+    sequential = HospitalCsvValidator().validate_and_parse(raw.decode("utf-8"), max_errors=4)
+    parallel = parallel_validator.validate_and_parse(io.BytesIO(raw), max_errors=4)
+    for key in ("errors", "row_count", "error_counts", "stopped_early"):
+        assert parallel[key] == sequential[key]
+
+
+@pytest.mark.parametrize("mode", ["flag", "collapse"])
+def test_parallel_duplicates_across_chunks_match_sequential(mode):
+    rows = [f"Hospital {i % 15},{i % 15} Main St,\n" for i in range(40)]
+    raw = ("name,address,phone\n" + "".join(rows)).encode("utf-8")
+    sequential = HospitalCsvValidator(duplicate_mode=mode).validate_and_parse(raw.decode("utf-8"))
+    validator = ParallelCsvValidator(HospitalCsvValidator(duplicate_mode=mode), workers=2, chunk_bytes=64)
+    try:
+        parallel = validator.validate_and_parse(io.BytesIO(raw))
+    finally:
+        validator.shutdown()
+    for key in ("valid", "errors", "row_count", "duplicates", "hospitals"):
+        assert parallel.get(key) == sequential.get(key)
+    assert len(parallel["errors"] if mode == "flag" else parallel["duplicates"]) == 25
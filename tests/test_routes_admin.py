@@ -0,0 +1,144 @@
+import pstats
+
+from app import create_app
+from app.config import Config
+from app.constants import EXT_UPSTREAM_METRICS, EXT_BATCH_REPOSITORY
+from app.services import profiler as profiler_module
+from app.services.profiler import Profiler
+from app.services.validation_service import HospitalCsvValidator
+from app.utils.converter import BatchDtoConverter
+
+
+class TokenConfig(Config):
+    ADMIN_TOKEN = "s3cret"
+
+
+ADMIN = {"X-Admin-Token": "s3cret"}
+
+
+def test_upstream_metrics_endpoint_reports_and_resets():
+    app = create_app(TokenConfig)
+    metrics = app.extensions[EXT_UPSTREAM_METRICS]
+    metrics.call_started()
+    metrics.record("POST /hospitals/", 200, 0.2, bytes_sent=40, bytes_received=60)
+    client = app.test_client()
+
+    body = client.get("/api/v1/admin/upstream-metrics?reset=true", headers=ADMIN).get_json()
+    endpoint = body["endpoints"]["POST /hospitals/"]
+    assert endpoint["calls"] == 1
+    assert endpoint["by_status"]["200"]["p50"] == 0.2
+    assert endpoint["bytes_sent"] == 40 and endpoint["bytes_received"] == 60
+
+    assert client.get("/api/v1/admin/upstream-metrics", headers=ADMIN).get_json()["endpoints"] == {}
+
+
+def test_admin_endpoints_require_configured_token():
+    client = create_app(TokenConfig).test_client()
+    assert client.get("/api/v1/admin/upstream-metrics").status_code == 401
+    assert client.get("/api/v1/admin/upstream-metrics", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert client.get("/api/v1/admin/upstream-metrics", headers=ADMIN).status_code == 200
+
+
+def test_admin_endpoints_are_not_served_without_a_token():
+    client = create_app().test_client()
+    assert client.get("/api/v1/admin/upstream-metrics").status_code == 404
+    assert client.get("/api/v1/admin/profiling", headers={"X-Admin-Token": ""}).status_code == 404
+    assert client.post("/api/v1/admin/profiling", json={"requests": 5}).status_code == 404
+
+
+def _profiling_app(tmp_path, **settings):
+    config = type("ProfilingConfig", (TokenConfig,), {"LOG_DIR": str(tmp_path), **settings})
+    return create_app(config)
+
+
+def test_profile_header_writes_pstats_and_collapsed_stacks(tmp_path):
+    client = _profiling_app(tmp_path).test_client()
+    assert "X-Profile-Id" not in client.get("/api/v1/").headers
+
+    response = client.get("/api/v1/", headers={"X-Profile": "1", **ADMIN})
+    profile_id = response.headers["X-Profile-Id"]
+    assert "-request-GET_api_v1" in profile_id
+    assert pstats.Stats(str(tmp_path / "profiles" / f"{profile_id}.pstats")).total_calls > 0
+    stacks = (tmp_path / "profiles" / f"{profile_id}.collapsed").read_text().splitlines()
+    assert stacks and all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+    assert client.get("/api/v1/admin/profiling", headers=ADMIN).get_json()["recent"] == [profile_id]
+
+
+def test_profiling_is_rate_capped_and_armed_from_admin_endpoint(tmp_path):
+    client = _profiling_app(tmp_path, PROFILE_MAX_PER_MINUTE=2).test_client()
+    assert client.post("/api/v1/admin/profiling", json={"requests": -1}, headers=ADMIN).status_code == 400
+
+    state = client.post("/api/v1/admin/profiling", json={"requests": 3, "batches": True}, headers=ADMIN).get_json()
+    assert state["armed_requests"] == 3 and state["batches"] is True
+    profiled = [client.get("/api/v1/").headers.get("X-Profile-Id") for _ in range(3)]
+    assert profiled[0] and profiled[1] and profiled[2] is None
+    assert len(list((tmp_path / "profiles").glob("*.pstats"))) == 2
+
+
+def test_failed_profiler_start_uses_no_rate_cap_slot(tmp_path, monkeypatch):
+    class BusyProfile:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    profiler = Profiler(str(tmp_path), max_per_minute=1)
+    monkeypatch.setattr(profiler_module.cProfile, "Profile", BusyProfile)
+    assert profiler.start() is None
+    monkeypatch.undo()
+
+    profile = profiler.start()
+    assert profile is not None
+    profile.disable()
+    assert profiler.start() is None
+
+
+def test_profile_header_needs_admin_token(tmp_path):
+    client = _profiling_app(tmp_path).test_client()
+    assert "X-Profile-Id" not in client.get("/api/v1/", headers={"X-Profile": "1"}).headers
+    assert "X-Profile-Id" in client.get("/api/v1/", headers={"X-Profile": "1", **ADMIN}).headers
+
+    unconfigured = _profiling_app(tmp_path, ADMIN_TOKEN=None).test_client()
+    for headers in ({"X-Profile": "1"}, {"X-Profile": "1", "X-Admin-Token": ""}):
+        assert "X-Profile-Id" not in unconfigured.get("/api/v1/", headers=headers).headers
+
+
+def test_memory_endpoints_trace_diff_and_estimate_batches():
+    app = create_app(TokenConfig)
+    client = app.test_client()
+    client.environ_base["HTTP_X_ADMIN_TOKEN"] = "s3cret"
+    csv_text = "name,address\n" + "".join(f"H{i},addr {i}\n" for i in range(1, 201))
+    app.extensions[EXT_BATCH_REPOSITORY].save(BatchDtoConverter.build_initial_batch("b1", HospitalCsvValidator().validate_and_parse(csv_text, columnar=True)["hospitals"]))
+
+    batches = client.get("/api/v1/admin/memory/batches").get_json()
+    assert batches["batches"] == 1
+    assert batches["largest"][0]["batch_id"] == "b1" and batches["largest"][0]["stored_hospitals"] == 200
+    assert batches["largest"][0]["bytes"] > 200 * 20
+
+    assert client.get("/api/v1/admin/memory/top").status_code == 409
+    assert client.post("/api/v1/admin/memory/tracing", json={"enabled": True, "frames": 0}).status_code == 400
+    try:
+        assert client.post("/api/v1/admin/memory/tracing", json={"enabled": True, "frames": 3}).get_json()["tracing"] is True
+        first = client.post("/api/v1/admin/memory/snapshots").get_json()["snapshot_id"]
+        retained = [bytearray(4096) for _ in range(200)]
+        sites = client.get("/api/v1/admin/memory/diff", query_string={"from": first, "limit": 5}).get_json()["sites"]
+        assert sites[0]["site"].startswith(__file__) and sites[0]["size_diff_bytes"] >= 200 * 4096
+        top = client.get("/api/v1/admin/memory/top?limit=3&group_by=traceback").get_json()["sites"]
+        assert len(top) == 3 and top[0]["size_bytes"] > 0
+        assert client.get("/api/v1/admin/memory/diff?from=99").status_code == 404
+        assert client.get("/api/v1/admin/memory/top?group_by=module").status_code == 400
+        del retained
+    finally:
+        assert client.post("/api/v1/admin/memory/tracing", json={"enabled": False}).get_json()["snapshots"] == []
+
+
+def test_memory_endpoints_are_not_served_without_a_token():
+    client = create_app().test_client()
+    assert client.get("/api/v1/admin/memory").status_code == 404
+    assert client.post("/api/v1/admin/memory/tracing", json={"enabled": True}).status_code == 404
+    assert client.post("/api/v1/admin/memory/snapshots").status_code == 404
+    assert client.get("/api/v1/admin/memory/top").status_code == 404
+    assert client.get("/api/v1/admin/memory/diff?from=1").status_code == 404
+    assert client.get("/api/v1/admin/memory/batches").status_code == 404
+
+    guarded = create_app(TokenConfig).test_client()
+    assert guarded.get("/api/v1/admin/memory/batches").status_code == 401
+    assert guarded.post("/api/v1/admin/memory/tracing", json={"enabled": True}, headers={"X-Admin-Token": "wrong"}).status_code == 401
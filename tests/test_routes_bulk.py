@@ -4,11 +4,33 @@ import json
 import pytest
 
 from app import create_app
-from app.constants import EXT_BATCH_REPOSITORY, EXT_BATCH_SERVICE, KEY_TOTAL_HOSPITALS
+from app.services.hospital_api_client import HospitalApiClient, UpstreamBatchNotFound
+from app.constants import EXT_BATCH_PROCESSOR, EXT_BATCH_REPOSITORY, EXT_BATCH_SERVICE, KEY_TOTAL_HOSPITALS
 
 
-def test_post_bulk_success(monkeypatch):
+class DummyClient(HospitalApiClient):
+    def __init__(self):
+        pass
+
+    def create_hospital(self, hospital_data, batch_id):
+        return {"id": f"api-{hospital_data.get('name','x')}"}
+
+    def activate_batch(self, batch_id):
+        return {"activated_hospitals": []}
+
+    def get_hospitals_by_batch(self, batch_id):
+        return []
+
+
+def make_app(monkeypatch):
+    """create_app() with the batch processor talking to DummyClient instead of the network."""
     app = create_app()
+    monkeypatch.setattr(app.extensions[EXT_BATCH_PROCESSOR], "_client_factory", DummyClient)
+    return app
+
+
+def test_post_bulk_success(monkeypatch):
+    app = make_app(monkeypatch)
     client = app.test_client()
 
     data = {
@@ -28,7 +50,7 @@ def test_post_bulk_success(monkeypatch):
 
 
 def test_post_bulk_bad_file(monkeypatch):
-    app = create_app()
+    app = make_app(monkeypatch)
     client = app.test_client()
 
     data = {
@@ -40,8 +62,8 @@ def test_post_bulk_bad_file(monkeypatch):
     assert 'errors' in body or 'error' in body
 
 
-def test_post_bulk_zero_rows_returns_400():
-    app = create_app()
+def test_post_bulk_zero_rows_returns_400(monkeypatch):
+    app = make_app(monkeypatch)
     client = app.test_client()
 
     # Valid header, but no data rows
@@ -54,8 +76,8 @@ def test_post_bulk_zero_rows_returns_400():
     assert 'errors' in body or 'error' in body
 
 
-def test_get_status_success():
-    app = create_app()
+def test_get_status_success(monkeypatch):
+    app = make_app(monkeypatch)
     client = app.test_client()
 
     data = {
@@ -102,4 +124,131 @@ def test_post_resume_completed_conflict(monkeypatch):
     assert resp.status_code == 409
 
 
+def test_post_reconcile_marks_rows_already_created_upstream(monkeypatch):
+    app = make_app(monkeypatch)
+    client = app.test_client()
+    app.extensions[EXT_BATCH_REPOSITORY].save({
+        "id": "b7",
+        "total_hospitals": 2,
+        "hospitals": {
+            "1": {"id": "1", "name": "A", "address": "x", "status": "failed"},
+            "2": {"id": "2", "name": "B", "address": "y", "status": "pending"},
+        },
+    })
+
+    def unreachable(self, batch_id):
+        raise ConnectionError("upstream down")
+
+    monkeypatch.setattr(DummyClient, "get_hospitals_by_batch", unreachable)
+    assert client.post('/api/v1/hospitals/batch/b7/reconcile').status_code == 502
+
+    def never_created(self, batch_id):
+        raise UpstreamBatchNotFound(f"Batch {batch_id} not found")
+
+    monkeypatch.setattr(DummyClient, "get_hospitals_by_batch", never_created)
+    resp = client.post('/api/v1/hospitals/batch/b7/reconcile')
+    assert resp.status_code == 200
+    assert resp.get_json() == {"batch_id": "b7", "upstream_hospitals": 0, "matched": 0, "missing": 2}
+
+    monkeypatch.setattr(DummyClient, "get_hospitals_by_batch", lambda self, batch_id: [{"id": 5, "name": "A", "address": "x"}])
+    resp = client.post('/api/v1/hospitals/batch/b7/reconcile')
+    assert resp.status_code == 200
+    assert resp.get_json() == {"batch_id": "b7", "upstream_hospitals": 1, "matched": 1, "missing": 1}
+    assert app.extensions[EXT_BATCH_REPOSITORY].find_by_batch_id("b7")["hospitals"]["1"]["status"] == "created"
+
+    assert client.post('/api/v1/hospitals/batch/missing/reconcile').status_code == 404
+
+
+
+
+
+def test_post_bulk_repeat_upload_returns_existing_batch(monkeypatch):
+    app = make_app(monkeypatch)
+    client = app.test_client()
+
+    def upload(content, key=None):
+        headers = {'Idempotency-Key': key} if key else {}
+        data = {'file': (io.BytesIO(content), 'h.csv')}
+        return client.post('/api/v1/hospitals/bulk', data=data, content_type='multipart/form-data', headers=headers)
+
+    first = upload(b"name,address\nA,addr\nB,addr\n")
+    assert first.status_code == 202
+    batch_id = first.get_json()['batch_id']
+
+    repeat = upload(b"\xef\xbb\xbfname,address\r\nA,addr\r\n\r\nB,addr\r\n")
+    assert repeat.status_code == 200
+    body = repeat.get_json()
+    assert body['batch_id'] == batch_id
+    assert body['idempotent_replay'] is True
+    assert body['total_hospitals'] == 2
+
+    keyed = upload(b"name,address\nA,addr\nB,addr\n", key='client-retry-1')
+    assert keyed.status_code == 202
+    assert keyed.get_json()['batch_id'] != batch_id
+    assert upload(b"name,address\nA,addr\nB,addr\n", key='client-retry-1').get_json()['batch_id'] == keyed.get_json()['batch_id']
+
+
+def test_post_bulk_repeat_with_other_options_is_not_replayed(monkeypatch):
+    app = make_app(monkeypatch)
+    client = app.test_client()
+    content = b"name,address\nA,addr\nB,addr\n"
+
+    def upload(query=''):
+        data = {'file': (io.BytesIO(content), 'h.csv')}
+        return client.post(f'/api/v1/hospitals/bulk{query}', data=data, content_type='multipart/form-data')
+
+    first = upload()
+    assert first.status_code == 202
+    fail_fast = upload('?fail_fast=true')
+    assert fail_fast.status_code == 202
+    assert fail_fast.get_json()['batch_id'] != first.get_json()['batch_id']
+    # fail_fast=true resolves to max_errors=1, so both spellings share a key
+    assert upload('?max_errors=1').get_json()['batch_id'] == fail_fast.get_json()['batch_id']
+    split = upload('?split=true')
+    assert split.status_code == 202
+    assert split.get_json()['batch_id'] not in {first.get_json()['batch_id'], fail_fast.get_json()['batch_id']}
+    assert upload().get_json()['idempotent_replay'] is True
+
+
+def test_post_bulk_rejected_upload_is_not_remembered(monkeypatch):
+    app = make_app(monkeypatch)
+    client = app.test_client()
+
+    for _ in range(2):
+        data = {'file': (io.BytesIO(b"bad,header\nA\n"), 'h.csv')}
+        resp = client.post('/api/v1/hospitals/bulk', data=data, content_type='multipart/form-data')
+        assert resp.status_code == 400
+
+
+def test_post_bulk_gzipped_upload_matches_plain_upload(monkeypatch):
+    import gzip
+    app = make_app(monkeypatch)
+    client = app.test_client()
+    content = b"name,address\nA,addr\nB,addr\n"
+
+    first = client.post('/api/v1/hospitals/bulk', data={'file': (io.BytesIO(gzip.compress(content)), 'h.csv.gz')}, content_type='multipart/form-data')
+    assert first.status_code == 202
+    assert first.get_json()['total_hospitals'] == 2
+
+    repeat = client.post('/api/v1/hospitals/bulk', data={'file': (io.BytesIO(content), 'h.csv')}, content_type='multipart/form-data')
+    assert repeat.status_code == 200
+    assert repeat.get_json()['batch_id'] == first.get_json()['batch_id']
+
+
+def test_post_bulk_split_query_param_creates_parent_job(monkeypatch):
+    app = make_app(monkeypatch)
+    app.config['MAX_HOSPITALS_PER_BATCH'] = 2
+    client = app.test_client()
+    content = b"name,address\nA,addr\nB,addr\nC,addr\n"
+
+    resp = client.post('/api/v1/hospitals/bulk', data={'file': (io.BytesIO(content), 'h.csv')}, content_type='multipart/form-data')
+    assert resp.status_code == 400
+
+    resp = client.post('/api/v1/hospitals/bulk?split=true', data={'file': (io.BytesIO(content), 'h.csv')}, content_type='multipart/form-data')
+    assert resp.status_code == 202
+    body = resp.get_json()
+    assert [s['total_hospitals'] for s in body['sub_batches']] == [2, 1]
 
+    status = client.get(f"/api/v1/hospitals/batch/{body['batch_id']}/status").get_json()
+    assert status['total_hospitals'] == 3
+    assert len(status['sub_batches']) == 2
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+
+from app import create_app
+from app.constants import EXT_BATCH_REPOSITORY
+
+
+def _seed(app):
+    with app.app_context():
+        repo = app.extensions[EXT_BATCH_REPOSITORY]
+        repo.save({
+            "id": "b1",
+            "total_hospitals": 3,
+            "hospitals": {
+                "2": {"id": "2", "name": "B", "status": "failed", "error": "boom"},
+                "1": {"id": "1", "name": "A", "status": "activated", "hospital_id": 11},
+                "3": {"id": "3", "name": "C, Inc", "status": "pending"},
+            },
+        })
+
+
+def test_export_ndjson_in_row_order():
+    app = create_app()
+    _seed(app)
+    client = app.test_client()
+
+    resp = client.get('/api/v1/hospitals/batch/b1/export')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [r["row"] for r in rows] == [1, 2, 3]
+    assert rows[0] == {"row": 1, "name": "A", "status": "created_and_activated", "hospital_id": 11, "error": None}
+    assert rows[1]["error"] == "boom"
+
+
+def test_export_csv_with_status_filter():
+    app = create_app()
+    _seed(app)
+    client = app.test_client()
+
+    resp = client.get('/api/v1/hospitals/batch/b1/export?format=csv&status=failed,pending')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    assert rows[0] == ["row", "name", "status", "hospital_id", "error"]
+    assert rows[1:] == [["2", "B", "failed", "", "boom"], ["3", "C, Inc", "pending", "", ""]]
+
+
+def test_export_filter_accepts_reported_activated_status():
+    app = create_app()
+    _seed(app)
+    client = app.test_client()
+
+    resp = client.get('/api/v1/hospitals/batch/b1/export?status=created_and_activated')
+    rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [r["row"] for r in rows] == [1]
+
+
+def test_export_not_found_and_bad_format():
+    app = create_app()
+    _seed(app)
+    client = app.test_client()
+
+    assert client.get('/api/v1/hospitals/batch/missing/export').status_code == 404
+    assert client.get('/api/v1/hospitals/batch/b1/export?format=xml').status_code == 400
@@ -0,0 +1,29 @@
+from app import create_app
+from app.constants import EXT_APP_METRICS, EXT_BATCH_REPOSITORY, EXT_UPSTREAM_METRICS
+
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    app = create_app()
+    repo = app.extensions[EXT_BATCH_REPOSITORY]
+    repo.save({"id": "b1", "total_hospitals": 0, "hospitals": {}, "end_time": 0})
+    repo.save({"id": "b2", "total_hospitals": 0, "hospitals": {}, "end_time": 5.0, "batch_activated": True})
+    app.extensions[EXT_APP_METRICS].row_done(True)
+    app.extensions[EXT_APP_METRICS].row_done(False)
+    upstream = app.extensions[EXT_UPSTREAM_METRICS]
+    upstream.call_started()
+    upstream.record("POST /hospitals/", 200, 0.03)
+    client = app.test_client()
+    client.get("/api/v1/")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    lines = response.get_data(as_text=True).splitlines()
+    assert 'hospital_rows_total{outcome="processed"} 1' in lines
+    assert 'hospital_rows_total{outcome="failed"} 1' in lines
+    assert 'hospital_batches{state="processing"} 1' in lines
+    assert 'hospital_batches{state="activated"} 1' in lines
+    assert "hospital_upstream_in_flight 0" in lines
+    assert 'hospital_upstream_request_duration_seconds_bucket{endpoint="POST /hospitals/",status="200",le="0.05"} 1' in lines
+    assert 'hospital_http_request_duration_seconds_count{route="/api/v1/",method="GET",status="200"} 1' in lines
+    assert "# TYPE hospital_repository_lock_wait_seconds histogram" in lines
@@ -44,3 +44,74 @@ def test_validate_zero_rows():
     assert body['valid'] is False
     assert 'errors' in body or 'error' in body
 
+
+
+def test_validate_invalid_utf8_returns_400():
+    app = create_app()
+    client = app.test_client()
+
+    data = {
+        'file': (io.BytesIO(b"name,address,phone\nA,addr\xff\xfe,1234567890\n"), 'h.csv')
+    }
+    resp = client.post('/api/v1/hospitals/validate', data=data, content_type='multipart/form-data')
+    assert resp.status_code == 400
+
+
+def test_validate_fail_fast_and_error_limit_query_params():
+    app = create_app()
+    client = app.test_client()
+    content = b"name,address\n" + b",x\n" * 50
+
+    resp = client.post('/api/v1/hospitals/validate?fail_fast=true', data={'file': (io.BytesIO(content), 'h.csv')}, content_type='multipart/form-data')
+    body = resp.get_json()
+    assert body['stopped_early'] is True and len(body['errors']) == 1 and body['row_count'] == 1
+
+    resp = client.post('/api/v1/hospitals/validate?error_limit=5', data={'file': (io.BytesIO(content), 'h.csv')}, content_type='multipart/form-data')
+    body = resp.get_json()
+    assert len(body['errors']) == 5 and body['errors_truncated'] is True
+    assert body['error_counts'] == {'name_required': 50}
+
+    resp = client.post('/api/v1/hospitals/validate?max_errors=abc', data={'file': (io.BytesIO(content), 'h.csv')}, content_type='multipart/form-data')
+    assert resp.status_code == 400
+
+
+def _multipart_body(content, filename):
+    from werkzeug.test import EnvironBuilder
+    environ = EnvironBuilder(method='POST', data={'file': (io.BytesIO(content), filename)}).get_environ()
+    return environ['wsgi.input'].read(), environ['CONTENT_TYPE']
+
+
+def test_validate_accepts_gzipped_upload_and_gzip_request_body():
+    import gzip
+    app = create_app()
+    client = app.test_client()
+    content = b"name,address,phone\nA,addr,1234567890\nB,addr,\n"
+
+    resp = client.post('/api/v1/hospitals/validate', data={'file': (io.BytesIO(gzip.compress(content)), 'h.csv.gz')}, content_type='multipart/form-data')
+    assert resp.status_code == 200
+    assert resp.get_json()['valid'] is True and resp.get_json()['row_count'] == 2
+
+    body, content_type = _multipart_body(content, 'h.csv')
+    resp = client.post('/api/v1/hospitals/validate', data=gzip.compress(body), headers={'Content-Encoding': 'gzip', 'Content-Type': content_type})
+    assert resp.status_code == 200
+    assert resp.get_json()['row_count'] == 2
+
+
+def test_validate_rejects_bad_compressed_uploads():
+    import gzip
+    app = create_app()
+    client = app.test_client()
+
+    resp = client.post('/api/v1/hospitals/validate', data={'file': (io.BytesIO(b"plain text"), 'h.csv.gz')}, content_type='multipart/form-data')
+    assert resp.status_code == 400
+
+    bomb = gzip.compress(b"name,address\n" + b"a" * (8 * 1024 * 1024))
+    resp = client.post('/api/v1/hospitals/validate', data={'file': (io.BytesIO(bomb), 'h.csv.gz')}, content_type='multipart/form-data')
+    assert resp.status_code == 413
+
+    body, content_type = _multipart_body(b"name,address\nA,addr\n", 'h.csv')
+    resp = client.post('/api/v1/hospitals/validate', data=gzip.compress(body)[:-10], headers={'Content-Encoding': 'gzip', 'Content-Type': content_type})
+    assert resp.status_code == 400
+
+    resp = client.post('/api/v1/hospitals/validate', data=body, headers={'Content-Encoding': 'br', 'Content-Type': content_type})
+    assert resp.status_code == 415
@@ -0,0 +1,88 @@
+import gzip
+import io
+import tempfile
+
+import pytest
+
+from app.utils.streams import (
+    DecompressionBombError,
+    DecompressionError,
+    as_io_stream,
+    content_hash,
+    open_gzip_stream,
+    open_text_stream,
+)
+
+CSV = b"name,address,phone\n" + b"".join(b"Hospital %d,%d Main St,5551234567\n" % (i, i) for i in range(2000))
+
+
+def test_gzip_stream_decompresses_incrementally():
+    raw = io.BytesIO(gzip.compress(CSV))
+    stream = open_gzip_stream(raw)
+    first = stream.read(10)
+    assert first == CSV[:10]
+    assert stream.raw.decompressed_bytes < len(CSV)
+    assert first + stream.read() == CSV
+
+
+def test_gzip_stream_reads_concatenated_members_as_text():
+    raw = io.BytesIO(gzip.compress(CSV[:100]) + gzip.compress(CSV[100:]))
+    with open_text_stream(open_gzip_stream(raw)) as text:
+        assert text.read() == CSV.decode("utf-8")
+
+
+def test_gzip_stream_rejects_corrupt_and_truncated_data():
+    with pytest.raises(DecompressionError):
+        open_gzip_stream(io.BytesIO(b"not gzip at all")).read()
+    with pytest.raises(DecompressionError):
+        open_gzip_stream(io.BytesIO(gzip.compress(CSV)[:-12])).read()
+
+
+def test_gzip_stream_stops_decompression_bombs():
+    bomb = gzip.compress(b"a" * (20 * 1024 * 1024))
+    stream = open_gzip_stream(io.BytesIO(bomb), max_ratio=100)
+    with pytest.raises(DecompressionBombError):
+        while stream.read(1024 * 1024):
+            pass
+    assert open_gzip_stream(io.BytesIO(bomb), max_ratio=None).read() == b"a" * (20 * 1024 * 1024)
+
+
+def test_content_hash_of_gzipped_upload_matches_plain_file():
+    raw = io.BytesIO(gzip.compress(CSV))
+    assert content_hash(raw, gzipped=True) == content_hash(io.BytesIO(CSV))
+    assert raw.tell() == 0
+
+
+class _ReadSeekOnly:
+    """Only the methods ``SpooledTemporaryFile`` had before Python 3.11."""
+
+    def __init__(self, data):
+        self._buffer = io.BytesIO(data)
+        self.read = self._buffer.read
+        self.seek = self._buffer.seek
+        self.tell = self._buffer.tell
+
+    def __iter__(self):
+        return iter(self._buffer)
+
+
+def test_text_stream_reads_spooled_temporary_files():
+    with tempfile.SpooledTemporaryFile(max_size=1024) as spooled:
+        spooled.write(CSV)
+        spooled.seek(0)
+        with open_text_stream(spooled) as text:
+            assert text.read() == CSV.decode("utf-8")
+        assert not spooled.closed
+        spooled.seek(0)
+        assert content_hash(spooled) == content_hash(io.BytesIO(CSV))
+
+
+def test_text_stream_adapts_streams_without_the_io_interface():
+    raw = _ReadSeekOnly(CSV)
+    assert as_io_stream(raw) is not raw
+    with open_text_stream(raw) as text:
+        assert text.readline() == "name,address,phone\n"
+        assert text.read() == CSV.decode("utf-8").split("\n", 1)[1]
+    raw.seek(0)
+    assert content_hash(raw) == content_hash(io.BytesIO(CSV))
+    assert raw.tell() == 0
@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+from werkzeug.serving import make_server
+
+from app.services.hospital_api_client import HospitalApiClient
+from app.services.upstream_recording import ReplayAdapter, TrafficRecorder, load_recording, operation_for, replay_session
+from tools.mock_hospital_api import MockProfile, create_mock_app, parse_latencies
+
+
+@pytest.fixture
+def upstream_url():
+    app = create_mock_app(MockProfile(latency=parse_latencies(["create=0.2"])))
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_operation_for_paths():
+    assert operation_for("POST", "/hospitals/") == "create"
+    assert operation_for("PATCH", "/hospitals/batch/abc/activate") == "activate"
+    assert operation_for("GET", "/hospitals/batch/abc") == "get"
+    assert operation_for("DELETE", "/api/hospitals/batch/abc") == "delete"
+    assert operation_for("GET", "/stats") is None
+
+
+def test_recorded_run_replays_with_original_and_scaled_timing(upstream_url, tmp_path):
+    path = str(tmp_path / "upstream.jsonl")
+    recorder = TrafficRecorder(path)
+    client = HospitalApiClient(upstream_url, recorder=recorder)
+    created = client.create_hospital({"name": "A", "address": "addr"}, "b1")
+    client.activate_batch("b1")
+    with pytest.raises(Exception, match="not found"):
+        client.delete_batch("missing")
+    with pytest.raises(Exception, match="Network error"):
+        HospitalApiClient("http://127.0.0.1:1", recorder=recorder).get_hospitals_by_batch("b1")
+    recorder.close()
+
+    entries = load_recording(path)
+    assert [(e["operation"], e.get("status")) for e in entries] == [("create", 200), ("activate", 200), ("delete", 404), ("get", None)]
+    assert json.loads(entries[0]["request_body"])["creation_batch_id"] == "b1"
+    assert entries[0]["elapsed"] >= 0.2
+    assert entries[3]["error"]["type"] == "ConnectionError"
+
+    replayed = HospitalApiClient("http://anywhere", session=replay_session(ReplayAdapter(entries, speed=0.5)))
+    start = time.monotonic()
+    assert replayed.create_hospital({"name": "Z", "address": "elsewhere"}, "other-batch") == created
+    assert 0.1 <= time.monotonic() - start < 0.2
+    assert replayed.activate_batch("other-batch")["activated_count"] == 1
+    with pytest.raises(Exception, match="not found"):
+        replayed.delete_batch("x")
+    with pytest.raises(Exception, match="Network error"):
+        replayed.get_hospitals_by_batch("x")
+
+
+def test_replay_honours_read_timeout_and_missing_operations():
+    adapter = ReplayAdapter([{"operation": "create", "elapsed": 5.0, "status": 200, "body": "{}"}], speed=1.0)
+    session = replay_session(adapter)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        session.post("http://x/hospitals/", json={}, timeout=(1, 0.05))
+    with pytest.raises(requests.exceptions.ConnectionError, match="No recorded exchange"):
+        session.get("http://x/hospitals/batch/b1", timeout=1)
@@ -1,3 +1,5 @@
+import os
+
 from app.services.validation_service import HospitalCsvValidator
 
 
@@ -27,5 +29,121 @@ def test_validate_rows_phone_format():
     v = HospitalCsvValidator()
     csv_text = "name,address,phone\nA,addr,123\n"
     result = v.validate_and_parse(csv_text)
+    assert result["valid"] is False
+    assert result["errors"] == [{"row": 1, "error": "phone must be a 10-digit number"}]
+
+
+def test_validate_and_parse_normalises_phone_and_strips():
+    v = HospitalCsvValidator()
+    csv_text = "name,address,phone\n  A  , addr ,(555) 123-4567\n"
+    result = v.validate_and_parse(csv_text)
+    assert result["valid"] is True
+    assert result["hospitals"] == [(1, {"name": "A", "address": "addr", "phone": "5551234567"})]
+
+
+def test_validate_and_parse_reports_all_row_errors_and_max_length():
+    v = HospitalCsvValidator()
+    long_name = "x" * 256
+    csv_text = f"name,address,phone\n,,12\n{long_name},addr,\nonly\n"
+    result = v.validate_and_parse(csv_text)
+    assert result["valid"] is False
+    assert result["errors"] == [
+        {"row": 1, "error": "name is required and cannot be empty; address is required and cannot be empty; phone must be a 10-digit number"},
+        {"row": 2, "error": "name must be at most 255 characters"},
+        {"row": 3, "error": "Row has fewer than required columns"},
+    ]
+
+
+def test_validate_all_matches_validate_and_parse_without_hospitals():
+    v = HospitalCsvValidator()
+    csv_text = "name,address\nA,addr\n"
+    result = v.validate_all(csv_text, max_hospitals=1)
+    assert result == {"valid": True, "errors": [], "row_count": 1, "header": ["name", "address"]}
+    assert v.validate_phone("555.123.4567") is None
+
+
+
+def test_validate_and_parse_reads_text_stream_incrementally():
+    import io
+    from app.utils.streams import open_text_stream
+
+    raw = io.BytesIO("name,address\n\"Ünï, Clinic\",\"multi\nline\"\nB,addr\n".encode("utf-8"))
+    v = HospitalCsvValidator()
+    with open_text_stream(raw) as stream:
+        result = v.validate_and_parse(stream)
     assert result["valid"] is True
+    assert result["hospitals"][0][1] == {"name": "Ünï, Clinic", "address": "multi\nline"}
+    assert not raw.closed
+
+
+def test_duplicate_rows_flagged_by_default():
+    v = HospitalCsvValidator()
+    csv_text = "name,address\nAlpha,1 Main St\nBeta,2 Main St\n  alpha ,1  MAIN st\n"
+    result = v.validate_and_parse(csv_text)
+    assert result["valid"] is False
+    assert result["errors"] == [{"row": 3, "error": "Duplicate of row 1 (same name and address)"}]
+    assert result["error_counts"] == {"duplicate_row": 1}
+
+
+def test_flagged_duplicates_count_toward_max_errors(monkeypatch):
+    v = HospitalCsvValidator()
+    compiled = []
+    compile_row_validator = v.compile_row_validator
+    monkeypatch.setattr(v, "compile_row_validator", lambda header: compiled.append(header) or compile_row_validator(header))
+    csv_text = "name,address\nAlpha,1 Main St\nalpha,1 main st\n,2 Main St\nALPHA,1 Main St\n,3 Main St\n"
+    result = v.validate_and_parse(csv_text, max_errors=2)
+    assert result["stopped_early"] is True
+    assert [e["row"] for e in result["errors"]] == [2, 3]
+    assert result["row_count"] == 3
+    assert result["error_counts"] == {"duplicate_row": 1, "name_required": 1}
+    assert len(compiled) == 1
+
+
+def test_duplicate_rows_collapsed():
+    v = HospitalCsvValidator(duplicate_mode="collapse")
+    csv_text = "name,address\nAlpha,1 Main St\nalpha,1 main st\nBeta,2 Main St\n"
+    result = v.validate_and_parse(csv_text, max_hospitals=2)
+    assert result["valid"] is True
+    assert [row for row, _ in result["hospitals"]] == [1, 3]
+    assert result["duplicates"] == [{"row": 2, "duplicate_of": 1}]
+
+
+def _bad_rows_csv(rows):
+    return "name,address,phone\n" + "".join(f",addr{i},12\n" if i % 2 else f"H{i},addr{i},\n" for i in range(1, rows + 1))
+
+
+def test_validate_and_parse_stops_after_max_errors():
+    v = HospitalCsvValidator()
+    result = v.validate_and_parse(_bad_rows_csv(100), max_errors=3)
+    assert result["valid"] is False
+    assert result["stopped_early"] is True
+    assert [e["row"] for e in result["errors"]] == [1, 3, 5]
+    assert result["row_count"] == 5
+    assert result["error_counts"] == {"name_required": 3, "phone_invalid": 3}
+
+
+def test_validate_and_parse_caps_returned_errors_but_counts_all():
+    v = HospitalCsvValidator()
+    result = v.validate_and_parse(_bad_rows_csv(100), error_limit=2)
+    assert result["row_count"] == 100
+    assert len(result["errors"]) == 2
+    assert result["errors_truncated"] is True
+    assert result["error_counts"] == {"name_required": 50, "phone_invalid": 50}
+    assert "stopped_early" not in result
+
+
+def test_validate_and_parse_columnar_result():
+    v = HospitalCsvValidator(duplicate_mode="collapse")
+    result = v.validate_and_parse("name,address,phone\nA,addr,5551234567\nB,addr,\na , ADDR,\n", columnar=True)
+    hospitals = result["hospitals"]
+    assert hospitals.rows == [1, 2]
+    assert hospitals.names == ["A", "B"]
+    assert hospitals.phones == ["5551234567", None]
+    assert result["duplicates"] == [{"row": 3, "duplicate_of": 1}]
+
 
+def test_sample_csv_used_by_readme_walkthroughs_is_valid():
+    path = os.path.join(os.path.dirname(__file__), os.pardir, "test_hospitals.csv")
+    with open(path, encoding="utf-8", newline="") as fh:
+        result = HospitalCsvValidator().validate_and_parse(fh, max_hospitals=20)
+    assert result["valid"] is True, result["errors"]
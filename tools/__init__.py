@@ -0,0 +1 @@
+"""Offline tooling for exercising the service: a mock upstream API, benchmarks and load generation."""
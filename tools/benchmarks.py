@@ -0,0 +1,374 @@
+"""Microbenchmarks for the upload and batch processing hot paths.
+
+Each benchmark runs on synthetic hospitals at every requested size:
+
+- ``validator.validate_and_parse``: ``HospitalCsvValidator`` on CSV text, columnar output
+- ``parallel_validator.validate_file``: ``ParallelCsvValidator`` on the same CSV spooled to disk,
+  for each ``--workers`` count, with a warm process pool; columnar output as the upload path
+  uses, and row-dict output to show what rebuilding dicts in the parent costs
+- ``converter.build_initial_batch`` and ``converter.to_status_dto``
+- ``repository.contention``: saves, row updates and finds on one ``HospitalBatchRepository`` from several threads
+- ``processor.fake_client``: ``BatchProcessor.start_batch`` with a zero-latency fake client
+- ``processor.http_client``: the same through ``HospitalApiClient`` over a zero-latency session
+
+Results go to a JSON file that a later run can be compared against::
+
+    python -m tools.benchmarks --output bench.json
+    python -m tools.benchmarks --sizes 1000,100000 --output after.json --compare bench.json
+    python -m tools.benchmarks --only validator --only parallel --sizes 100000,1000000 --workers 1,2,4,8
+
+Logging below ERROR is disabled while benchmarks run, so figures are for the code
+paths alone.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import Flask
+
+from app.repository.hospital_batch_repository import HospitalBatchRepository
+from app.services.app_metrics import LOCK_WAIT_BUCKETS
+from app.services.batch_processor import BatchProcessor
+from app.services.hospital_api_client import HospitalApiClient
+from app.services.parallel_validation import ParallelCsvValidator, find_record_boundaries
+from app.services.validation_service import HospitalCsvValidator
+from app.utils.converter import BatchDtoConverter
+from app.utils.histogram import Histogram
+from app.utils.hospital_columns import HospitalColumns
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_THREADS = (1, 4, 8)
+DEFAULT_WORKERS = (1, 2, 4)
+# Config's PARALLEL_VALIDATION_CHUNK_BYTES default: a file smaller than this is a single chunk
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+# A million processed rows take about half a minute per repeat and variant, so the processor stops here unless asked
+DEFAULT_PROCESSOR_MAX_ROWS = 100_000
+
+Result = Dict[str, Any]
+
+
+def synthetic_csv(rows: int) -> str:
+    """A valid hospital CSV with ``rows`` distinct rows, some with quoted fields and blank phones."""
+    lines = ["name,address,phone"]
+    for i in range(1, rows + 1):
+        phone = "" if i % 7 == 0 else f"(555) {i % 1000:03d}-{i % 10000:04d}"
+        address = f'"{i} Main St, Suite {i % 50}"' if i % 5 == 0 else f"{i} Main St"
+        lines.append(f"Hospital {i},{address},{phone}")
+    return "\n".join(lines) + "\n"
+
+
+def synthetic_columns(rows: int) -> HospitalColumns:
+    columns = HospitalColumns()
+    append = columns.appender()
+    for i in range(1, rows + 1):
+        append(i, {"name": f"Hospital {i}", "address": f"{i} Main St", "phone": None if i % 7 == 0 else f"555{i:07d}"[-10:]})
+    return columns
+
+
+def _measure(run: Callable[[Any], Any], setup: Callable[[], Any], repeat: int) -> List[float]:
+    """Seconds per repeat of ``run(setup())``; setup and a GC pass happen outside the timed part."""
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        gc.collect()
+        started = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _result(name: str, size: int, timings: List[float], *, unit: str = "rows", params: Optional[Dict[str, Any]] = None, **extra: Any) -> Result:
+    median = statistics.median(timings)
+    result: Result = {
+        "name": name,
+        "size": size,
+        "params": params or {},
+        "repeat": len(timings),
+        "seconds": {"min": round(min(timings), 6), "median": round(median, 6), "max": round(max(timings), 6)},
+        "unit": unit,
+        "per_second": round(size / median, 1) if median > 0 else None,
+    }
+    result.update(extra)
+    return result
+
+
+def bench_validator(size: int, repeat: int) -> List[Result]:
+    validator = HospitalCsvValidator()
+    text = synthetic_csv(size)
+
+    def run(_):
+        result = validator.validate_and_parse(text, columnar=True)
+        assert result["valid"], result["errors"][:3]
+
+    return [_result("validator.validate_and_parse", size, _measure(run, lambda: None, repeat), csv_bytes=len(text))]
+
+
+def bench_parallel_validator(size: int, repeat: int, workers: Sequence[int] = DEFAULT_WORKERS, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Result]:
+    """``validate_file`` on a spooled copy of the validator benchmark's CSV for each worker count.
+
+    An untimed run first starts and warms the pool, as it stays up in a running server;
+    the spool copy itself is not timed either. Compare against ``validator.validate_and_parse``
+    at the same size for the break-even point.
+    """
+    data = synthetic_csv(size).encode("utf-8")
+    chunks = len(find_record_boundaries(data, data.index(b"\n") + 1, len(data), chunk_bytes)) - 1
+    fd, path = tempfile.mkstemp(prefix="bench-", suffix=".csv")
+    with os.fdopen(fd, "wb") as out:
+        out.write(data)
+    results = []
+    try:
+        for worker_count in workers:
+            validator = ParallelCsvValidator(HospitalCsvValidator(), workers=worker_count, chunk_bytes=chunk_bytes)
+            try:
+                validator.validate_file(path, collect=False)
+                for columnar in (True, False):
+                    def run(_):
+                        result = validator.validate_file(path, columnar=columnar)
+                        assert result["valid"], result["errors"][:3]
+
+                    params = {"workers": worker_count, "chunk_bytes": chunk_bytes, "columnar": columnar}
+                    results.append(_result("parallel_validator.validate_file", size, _measure(run, lambda: None, repeat), params=params, csv_bytes=len(data), chunks=chunks))
+            finally:
+                validator.shutdown()
+    finally:
+        os.unlink(path)
+    return results
+
+
+def bench_converter(size: int, repeat: int) -> List[Result]:
+    columns = synthetic_columns(size)
+    build = _measure(lambda _: BatchDtoConverter.build_initial_batch("bench", columns), lambda: None, repeat)
+    # A fresh batch each time, so rows are built from the columns as on a first status call
+    status = _measure(BatchDtoConverter.to_status_dto, lambda: BatchDtoConverter.build_initial_batch("bench", columns), repeat)
+    return [
+        _result("converter.build_initial_batch", size, build),
+        _result("converter.to_status_dto", size, status),
+    ]
+
+
+def _small_batch(batch_id: str, rows: int = 10) -> Dict[str, Any]:
+    return BatchDtoConverter.build_initial_batch(batch_id, [(i, {"name": f"H{i}", "address": f"{i} Main St"}) for i in range(1, rows + 1)])
+
+
+def bench_repository(size: int, repeat: int, threads: Sequence[int] = DEFAULT_THREADS) -> List[Result]:
+    """``size`` operations split over each thread count: every op updates a row of a shared
+    batch, every 10th also finds (deep-copies) a 10-row batch and every 100th saves one."""
+    results = []
+    for thread_count in threads:
+        waits = Histogram(LOCK_WAIT_BUCKETS)
+        wait_lock = threading.Lock()
+
+        def observe(seconds: float) -> None:
+            with wait_lock:
+                waits.observe(seconds)
+
+        def setup() -> HospitalBatchRepository:
+            repository = HospitalBatchRepository(lock_wait_observer=observe)
+            repository.save(_small_batch("shared", 100))
+            for worker in range(thread_count):
+                repository.save(_small_batch(f"own-{worker}"))
+            return repository
+
+        def worker_loop(repository: HospitalBatchRepository, worker: int, ops: int) -> None:
+            own = f"own-{worker}"
+            for i in range(ops):
+                repository.update_hospital("shared", str(i % 100 + 1), {"status": "created", "hospital_id": i})
+                if i % 10 == 0:
+                    repository.find_by_batch_id(own)
+                if i % 100 == 0:
+                    repository.save(_small_batch(f"{own}-{i}"))
+
+        def run(repository: HospitalBatchRepository) -> None:
+            per_thread = max(1, size // thread_count)
+            workers = [threading.Thread(target=worker_loop, args=(repository, n, per_thread)) for n in range(thread_count)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+
+        timings = _measure(run, setup, repeat)
+        results.append(_result("repository.contention", size, timings, unit="ops", params={"threads": thread_count}, lock_wait=waits.summary()))
+    return results
+
+
+class _FakeClient:
+    """Zero-latency stand-in for ``HospitalApiClient``."""
+
+    def __init__(self) -> None:
+        self._next_id = 0
+
+    def create_hospital(self, hospital_data: Dict[str, Any], batch_id: str) -> Dict[str, Any]:
+        self._next_id += 1
+        return {"id": self._next_id}
+
+    def activate_batch(self, batch_id: str) -> Dict[str, Any]:
+        return {"activated_count": 0}
+
+
+class _ZeroLatencySession:
+    """Answers every call ``HospitalApiClient`` makes at once, without sockets."""
+
+    class _Response:
+        status_code = 200
+        text = ""
+        content = b'{"id": 1}'
+        headers: Dict[str, str] = {}
+
+        def json(self) -> Dict[str, Any]:
+            return {"id": 1, "activated_count": 0}
+
+    def post(self, url, **kwargs):
+        return self._Response()
+
+    def patch(self, url, **kwargs):
+        return self._Response()
+
+
+def bench_processor(size: int, repeat: int) -> List[Result]:
+    app = Flask(__name__)
+    columns = synthetic_columns(size)
+    variants: List[Tuple[str, Callable[[], Any]]] = [
+        ("processor.fake_client", _FakeClient),
+        ("processor.http_client", lambda: HospitalApiClient("http://upstream.bench", session=_ZeroLatencySession())),
+    ]
+    results = []
+    for name, client_factory in variants:
+        def setup() -> BatchProcessor:
+            repository = HospitalBatchRepository()
+            repository.save(BatchDtoConverter.build_initial_batch("bench", columns))
+            return BatchProcessor(client_factory=client_factory, repository=repository, row_log_every=0, progress_log_seconds=3600)
+
+        timings = _measure(lambda processor: processor.start_batch("bench", app), setup, repeat)
+        results.append(_result(name, size, timings))
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[..., List[Result]]] = {
+    "validator": bench_validator,
+    "parallel": bench_parallel_validator,
+    "converter": bench_converter,
+    "repository": bench_repository,
+    "processor": bench_processor,
+}
+
+
+def run_benchmarks(sizes: Iterable[int] = DEFAULT_SIZES, *, repeat: int = 3, only: Optional[Sequence[str]] = None,
+                   threads: Sequence[int] = DEFAULT_THREADS, workers: Sequence[int] = DEFAULT_WORKERS,
+                   chunk_bytes: int = DEFAULT_CHUNK_BYTES, processor_max_rows: int = DEFAULT_PROCESSOR_MAX_ROWS,
+                   progress: Optional[Callable[[Result], None]] = None) -> List[Result]:
+    results: List[Result] = []
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    try:
+        for size in sizes:
+            for name, bench in BENCHMARKS.items():
+                if only and name not in only:
+                    continue
+                if name == "processor" and size > processor_max_rows:
+                    continue
+                if name == "repository":
+                    batch = bench(size, repeat, threads)
+                elif name == "parallel":
+                    batch = bench(size, repeat, workers, chunk_bytes)
+                else:
+                    batch = bench(size, repeat)
+                for result in batch:
+                    results.append(result)
+                    if progress is not None:
+                        progress(result)
+    finally:
+        logging.disable(previous_disable)
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def _key(result: Result) -> Tuple[str, int, str]:
+    return result["name"], result["size"], json.dumps(result.get("params", {}), sort_keys=True)
+
+
+def compare(baseline: Sequence[Result], current: Sequence[Result]) -> List[Dict[str, Any]]:
+    """Median time of each benchmark present in both runs, with the relative change (negative is faster)."""
+    before = {_key(result): result for result in baseline}
+    rows = []
+    for result in current:
+        old = before.get(_key(result))
+        if old is None:
+            continue
+        old_median, new_median = old["seconds"]["median"], result["seconds"]["median"]
+        rows.append({
+            "name": result["name"],
+            "size": result["size"],
+            "params": result.get("params", {}),
+            "baseline_median": old_median,
+            "median": new_median,
+            "change": round((new_median - old_median) / old_median, 4) if old_median else None,
+        })
+    return rows
+
+
+def _label(result: Dict[str, Any]) -> str:
+    params = ",".join(f"{key}={value}" for key, value in sorted(result.get("params", {}).items()))
+    return f"{result['name']}[{result['size']}{',' + params if params else ''}]"
+
+
+def _parse_ints(value: str) -> List[int]:
+    return [int(part.replace("_", "")) for part in value.split(",") if part.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run microbenchmarks of the validation, conversion, repository and processing hot paths.")
+    parser.add_argument("--sizes", type=_parse_ints, default=list(DEFAULT_SIZES), help="Comma-separated row counts (default: 1000,100000,1000000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repeats per benchmark; the median is reported")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="Run only this benchmark group (repeatable)")
+    parser.add_argument("--threads", type=_parse_ints, default=list(DEFAULT_THREADS), help="Thread counts for repository contention (default: 1,4,8)")
+    parser.add_argument("--workers", type=_parse_ints, default=list(DEFAULT_WORKERS), help="Process pool sizes for parallel validation (default: 1,2,4)")
+    parser.add_argument("--chunk-bytes", type=int, default=DEFAULT_CHUNK_BYTES, help="Chunk size for parallel validation (default: 8388608, as PARALLEL_VALIDATION_CHUNK_BYTES)")
+    parser.add_argument("--processor-max-rows", type=int, default=DEFAULT_PROCESSOR_MAX_ROWS, help="Skip processor benchmarks above this many rows")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", metavar="BASELINE", help="Earlier results file to compare medians against")
+    args = parser.parse_args(argv)
+
+    def report(result: Result) -> None:
+        print(f"{_label(result):55s} median {result['seconds']['median']:10.4f}s  {result['per_second'] or 0:14,.0f} {result['unit']}/s", flush=True)
+
+    results = run_benchmarks(args.sizes, repeat=max(1, args.repeat), only=args.only, threads=args.threads,
+                             workers=args.workers, chunk_bytes=args.chunk_bytes, processor_max_rows=args.processor_max_rows, progress=report)
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump({"environment": environment(), "results": results}, fh, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+        for row in compare(baseline, results):
+            change = "n/a" if row["change"] is None else f"{row['change']:+.1%}"
+            print(f"{_label(row):55s} {row['baseline_median']:10.4f}s -> {row['median']:10.4f}s  {change}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
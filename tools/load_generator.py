@@ -0,0 +1,308 @@
+"""End-to-end load generator for the bulk upload API.
+
+Uploads synthetic CSVs to ``POST /hospitals/bulk`` at a fixed rate (open loop: uploads
+start on schedule whether or not earlier ones have finished, up to ``--concurrency``
+batches in flight), polls each batch's ``/status`` until every row is done, and calls
+``PATCH /resume`` while rows failed and resumes are left. Then it reports:
+
+- request latency percentiles for uploads, status polls and resumes
+- time to activation per batch, from sending the upload to the first status poll
+  showing ``batch_activated``
+- server-side rows/sec per batch, from its ``processing_time_seconds`` (and the
+  ``timings`` section when the server reports one)
+
+Against a local server backed by the mock upstream::
+
+    python -m tools.mock_hospital_api --port 8000 --latency lognormal:0.05:0.5 --error-rate 0.01
+    HOSPITAL_API_BASE_URL=http://localhost:8000 gunicorn -w 2 --threads 8 -b :5000 run:app
+    python -m tools.load_generator --base-url http://localhost:5000/api/v1 --rows 20 --rate 2 --uploads 100 --output load.json
+"""
+import argparse
+import json
+import math
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+
+REQUEST_UPLOAD = "upload"
+REQUEST_STATUS = "status"
+REQUEST_RESUME = "resume"
+
+OUTCOME_ACTIVATED = "activated"
+OUTCOME_FAILED = "failed"
+OUTCOME_TIMED_OUT = "timed_out"
+OUTCOME_REJECTED = "rejected"
+
+
+@dataclass
+class LoadProfile:
+    base_url: str = "http://localhost:5000/api/v1"
+    rows: int = 20
+    uploads: int = 10
+    rate: float = 1.0
+    concurrency: int = 16
+    poll_interval: float = 1.0
+    batch_timeout: float = 300.0
+    max_resumes: int = 3
+    split: bool = False
+    request_timeout: float = 60.0
+
+
+@dataclass
+class BatchRun:
+    """What happened to one upload, from the client's side."""
+    index: int
+    batch_id: Optional[str] = None
+    outcome: Optional[str] = None
+    error: Optional[str] = None
+    scheduled_lag: float = 0.0
+    time_to_activation: Optional[float] = None
+    time_to_done: Optional[float] = None
+    resumes: int = 0
+    polls: int = 0
+    total_hospitals: int = 0
+    failed_hospitals: int = 0
+    server_processing_seconds: Optional[float] = None
+    server_rows_per_second: Optional[float] = None
+    server_timings: Optional[Dict[str, Any]] = None
+
+
+class LatencyLog:
+    """Thread-safe request latencies and error counts per request kind."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, List[float]] = {}
+        self._errors: Dict[str, Dict[str, int]] = {}
+
+    def record(self, kind: str, seconds: float, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._latencies.setdefault(kind, []).append(seconds)
+            if error:
+                errors = self._errors.setdefault(kind, {})
+                errors[error] = errors.get(error, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                kind: {**percentiles(values), "errors": dict(self._errors.get(kind, {}))}
+                for kind, values in sorted(self._latencies.items())
+            }
+
+
+def percentiles(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    """Count, mean, p50/p90/p95/p99 (nearest rank) and max of ``values``."""
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p90": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def rank(q: float) -> float:
+        return round(ordered[max(0, math.ceil(q * len(ordered)) - 1)], 6)
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 6),
+        "p50": rank(0.50),
+        "p90": rank(0.90),
+        "p95": rank(0.95),
+        "p99": rank(0.99),
+        "max": round(ordered[-1], 6),
+    }
+
+
+def synthetic_upload(run_id: str, index: int, rows: int) -> bytes:
+    """A valid CSV whose names are unique to this run and upload, so cross-batch dedup never links rows."""
+    lines = ["name,address,phone"]
+    for row in range(1, rows + 1):
+        lines.append(f"Load {run_id} {index}-{row},{row} Load Test Ave,555{row % 10000000:07d}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class LoadGenerator:
+    def __init__(self, profile: LoadProfile, *, session_factory=requests.Session, log=print) -> None:
+        self.profile = profile
+        self.run_id = uuid.uuid4().hex[:8]
+        self.latencies = LatencyLog()
+        self._session_factory = session_factory
+        self._local = threading.local()
+        self._log = log
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._session_factory()
+        return session
+
+    def _call(self, kind: str, method: str, path: str, **kwargs: Any) -> Optional[requests.Response]:
+        """Send one request and record its latency; None when it failed before a response arrived."""
+        started = time.monotonic()
+        try:
+            response = self._session().request(method, self.profile.base_url.rstrip("/") + path, timeout=self.profile.request_timeout, **kwargs)
+        except requests.RequestException as e:
+            self.latencies.record(kind, time.monotonic() - started, type(e).__name__)
+            return None
+        error = f"http_{response.status_code}" if response.status_code >= 400 else None
+        self.latencies.record(kind, time.monotonic() - started, error)
+        return response
+
+    def run_batch(self, index: int, scheduled_at: float) -> BatchRun:
+        profile = self.profile
+        run = BatchRun(index=index, scheduled_lag=round(max(0.0, time.monotonic() - scheduled_at), 6))
+        started = time.monotonic()
+        params = {"split": "true"} if profile.split else None
+        upload = self._call(REQUEST_UPLOAD, "POST", "/hospitals/bulk", params=params,
+                            files={"file": (f"load-{index}.csv", synthetic_upload(self.run_id, index, profile.rows), "text/csv")})
+        if upload is None or upload.status_code != 202:
+            run.outcome = OUTCOME_REJECTED
+            run.error = "no response" if upload is None else f"HTTP {upload.status_code}: {upload.text[:200]}"
+            return run
+        body = upload.json()
+        run.batch_id = body.get("batch_id")
+        run.total_hospitals = body.get("total_hospitals", profile.rows)
+
+        deadline = started + profile.batch_timeout
+        # processing_time_seconds of the run a resume was sent after; a finished run with the
+        # same value is that old run still showing, not the resumed one
+        resumed_after: Optional[float] = None
+        while time.monotonic() < deadline:
+            time.sleep(profile.poll_interval)
+            response = self._call(REQUEST_STATUS, "GET", f"/hospitals/batch/{run.batch_id}/status")
+            run.polls += 1
+            if response is None or response.status_code != 200:
+                continue
+            status = response.json()
+            done = status.get("processed_hospitals", 0) + status.get("failed_hospitals", 0) >= status.get("total_hospitals", run.total_hospitals)
+            if status.get("batch_activated"):
+                run.time_to_activation = round(time.monotonic() - started, 6)
+                run.time_to_done = run.time_to_activation
+                run.outcome = OUTCOME_ACTIVATED
+                self._record_server_side(run, status)
+                return run
+            if not done or (run.resumes and status.get("processing_time_seconds") == resumed_after):
+                continue
+            run.failed_hospitals = status.get("failed_hospitals", 0)
+            if run.time_to_done is None:
+                run.time_to_done = round(time.monotonic() - started, 6)
+            if run.resumes >= profile.max_resumes:
+                run.outcome = OUTCOME_FAILED
+                self._record_server_side(run, status)
+                return run
+            resumed_after = status.get("processing_time_seconds")
+            resume = self._call(REQUEST_RESUME, "PATCH", f"/hospitals/batch/{run.batch_id}/resume")
+            run.resumes += 1
+            if resume is not None and resume.status_code == 409:
+                # Nothing left to resume: processing finished between our poll and the resume
+                continue
+        run.outcome = OUTCOME_TIMED_OUT
+        return run
+
+    @staticmethod
+    def _record_server_side(run: BatchRun, status: Dict[str, Any]) -> None:
+        seconds = status.get("processing_time_seconds")
+        run.server_processing_seconds = seconds
+        if seconds:
+            run.server_rows_per_second = round(status.get("total_hospitals", run.total_hospitals) / seconds, 1)
+        run.server_timings = status.get("timings")
+
+    def run(self) -> Dict[str, Any]:
+        profile = self.profile
+        interval = 1.0 / profile.rate if profile.rate > 0 else 0.0
+        started = time.monotonic()
+        runs: List[BatchRun] = []
+        with ThreadPoolExecutor(max_workers=max(1, profile.concurrency), thread_name_prefix="load") as executor:
+            futures = []
+            for index in range(profile.uploads):
+                scheduled_at = started + index * interval
+                delay = scheduled_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(executor.submit(self.run_batch, index, scheduled_at))
+            for future in futures:
+                run = future.result()
+                runs.append(run)
+                self._log(f"upload {run.index}: {run.outcome} batch={run.batch_id} time_to_activation={run.time_to_activation} resumes={run.resumes}")
+        return self.report(runs, time.monotonic() - started)
+
+    def report(self, runs: Sequence[BatchRun], elapsed: float) -> Dict[str, Any]:
+        outcomes: Dict[str, int] = {}
+        for run in runs:
+            outcomes[run.outcome or "unknown"] = outcomes.get(run.outcome or "unknown", 0) + 1
+        activated = [run for run in runs if run.outcome == OUTCOME_ACTIVATED]
+        activated_rows = sum(run.total_hospitals for run in activated)
+        server_rates = [run.server_rows_per_second for run in runs if run.server_rows_per_second]
+        return {
+            "profile": vars(self.profile),
+            "run_id": self.run_id,
+            "elapsed_seconds": round(elapsed, 3),
+            "outcomes": outcomes,
+            "requests": self.latencies.summary(),
+            "time_to_activation_seconds": percentiles([run.time_to_activation for run in activated]),
+            "schedule_lag_seconds": percentiles([run.scheduled_lag for run in runs]),
+            "server_rows_per_second": percentiles(server_rates),
+            "activated_rows_per_second": round(activated_rows / elapsed, 1) if elapsed > 0 else None,
+            "batches": [vars(run) for run in runs],
+        }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    def line(label: str, stats: Dict[str, Any], unit: str = "s") -> str:
+        if not stats.get("count"):
+            return f"{label:22s} -"
+        return f"{label:22s} n={stats['count']:<6d} p50={stats['p50']}{unit} p95={stats['p95']}{unit} p99={stats['p99']}{unit} max={stats['max']}{unit}"
+
+    print(f"\n{sum(report['outcomes'].values())} uploads in {report['elapsed_seconds']}s: {report['outcomes']}")
+    for kind, stats in report["requests"].items():
+        print(line(f"{kind} latency", stats) + (f" errors={stats['errors']}" if stats["errors"] else ""))
+    print(line("time to activation", report["time_to_activation_seconds"]))
+    print(line("schedule lag", report["schedule_lag_seconds"]))
+    print(line("server rows/s", report["server_rows_per_second"], unit=""))
+    print(f"{'activated rows/s':22s} {report['activated_rows_per_second']} (client wall clock)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    defaults = LoadProfile()
+    parser = argparse.ArgumentParser(description="Drive the bulk upload API with synthetic CSVs and report latency and throughput.")
+    parser.add_argument("--base-url", default=defaults.base_url, help="API root, including /api/v1")
+    parser.add_argument("--rows", type=int, default=defaults.rows, help="Hospitals per uploaded CSV")
+    parser.add_argument("--uploads", type=int, default=defaults.uploads, help="Number of uploads to send")
+    parser.add_argument("--rate", type=float, default=defaults.rate, help="Uploads started per second (0 = all at once)")
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency, help="Most batches uploaded or polled at the same time")
+    parser.add_argument("--poll-interval", type=float, default=defaults.poll_interval, help="Seconds between status polls of a batch")
+    parser.add_argument("--batch-timeout", type=float, default=defaults.batch_timeout, help="Give up on a batch after this many seconds")
+    parser.add_argument("--max-resumes", type=int, default=defaults.max_resumes, help="Resumes per batch while rows keep failing")
+    parser.add_argument("--split", action="store_true", help="Upload with ?split=true so large CSVs become sub-batches")
+    parser.add_argument("--request-timeout", type=float, default=defaults.request_timeout, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Write the full JSON report, with per-batch details, to this file")
+    parser.add_argument("--quiet", action="store_true", help="Do not print a line per finished upload")
+    args = parser.parse_args(argv)
+
+    profile = LoadProfile(
+        base_url=args.base_url,
+        rows=args.rows,
+        uploads=args.uploads,
+        rate=args.rate,
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+        batch_timeout=args.batch_timeout,
+        max_resumes=args.max_resumes,
+        split=args.split,
+        request_timeout=args.request_timeout,
+    )
+    report = LoadGenerator(profile, log=(lambda message: None) if args.quiet else print).run()
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Wrote report to {args.output}")
+    return 0 if report["outcomes"].get(OUTCOME_ACTIVATED, 0) == len(report["batches"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
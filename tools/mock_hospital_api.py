@@ -0,0 +1,298 @@
+"""A local stand-in for the Hospital Directory API with latency and fault injection.
+
+Implements the endpoints ``HospitalApiClient`` calls, keeping hospitals in memory:
+
+- ``POST /hospitals/``
+- ``GET /hospitals/batch/<batch_id>``
+- ``PATCH /hospitals/batch/<batch_id>/activate``
+- ``DELETE /hospitals/batch/<batch_id>``
+
+Every request can be delayed by a per-operation latency distribution, rejected with
+``429`` by a token-bucket throttle, failed at a configurable rate, or answered
+slow-loris style by trickling the body out over several seconds. ``GET /stats``
+reports what was injected. Run it with::
+
+    python -m tools.mock_hospital_api --port 8000 --latency lognormal:0.05:0.5 --latency activate=uniform:0.5:2 --error-rate 0.01
+
+and point the service at it with ``HOSPITAL_API_BASE_URL=http://localhost:8000``.
+"""
+import argparse
+import itertools
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from flask import Flask, Response, jsonify, request
+
+from app.services.hospital_api_client import OPERATIONS, OPERATION_CREATE, OPERATION_ACTIVATE, OPERATION_GET, OPERATION_DELETE
+
+DEFAULT_OPERATION = "default"
+
+Sampler = Callable[[random.Random], float]
+
+
+def parse_latency(spec: str) -> Sampler:
+    """Build a latency sampler (seconds) from a spec.
+
+    Accepted forms: ``0.05`` or ``const:0.05``, ``uniform:low:high``,
+    ``normal:mean:stddev``, ``lognormal:median:sigma`` and ``exp:mean``.
+    Samples are never negative. Raises ValueError on an unknown or malformed spec.
+    """
+    kind, _, rest = spec.strip().partition(":")
+    try:
+        if not rest:
+            value = float(kind)
+            return lambda rng: value
+        params = [float(part) for part in rest.split(":")]
+    except ValueError:
+        raise ValueError(f"Malformed latency spec '{spec}'")
+    kind = kind.lower()
+    shapes = {
+        "const": (1, lambda rng, v: v),
+        "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+        "normal": (2, lambda rng, mean, stddev: max(0.0, rng.gauss(mean, stddev))),
+        "lognormal": (2, lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0),
+        "exp": (1, lambda rng, mean: rng.expovariate(1.0 / mean) if mean > 0 else 0.0),
+    }
+    if kind not in shapes:
+        raise ValueError(f"Unknown latency distribution '{kind}'; expected one of: {', '.join(shapes)}")
+    arity, sample = shapes[kind]
+    if len(params) != arity:
+        raise ValueError(f"Latency distribution '{kind}' takes {arity} parameter(s), got '{spec}'")
+    return lambda rng: sample(rng, *params)
+
+
+def parse_latencies(specs: List[str]) -> Dict[str, Sampler]:
+    """Per-operation samplers from ``[operation=]spec`` entries; a bare spec sets the default."""
+    samplers: Dict[str, Sampler] = {}
+    for entry in specs:
+        operation, sep, spec = entry.partition("=")
+        if not sep:
+            operation, spec = DEFAULT_OPERATION, entry
+        operation = operation.strip().lower()
+        if operation not in OPERATIONS and operation != DEFAULT_OPERATION:
+            raise ValueError(f"Unknown upstream operation '{operation}' in latency; expected one of: {', '.join(OPERATIONS)}")
+        samplers[operation] = parse_latency(spec)
+    return samplers
+
+
+@dataclass
+class MockProfile:
+    """How the mock misbehaves. Rates are probabilities per request; 0 disables a fault."""
+
+    latency: Dict[str, Sampler] = field(default_factory=dict)
+    error_rate: float = 0.0
+    error_status: int = 503
+    rate_limit: float = 0.0
+    burst: int = 10
+    retry_after: float = 1.0
+    slow_loris_rate: float = 0.0
+    slow_loris_seconds: float = 10.0
+    seed: Optional[int] = None
+
+
+class TokenBucket:
+    """Allow ``rate`` requests per second on average with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._capacity = max(1.0, float(burst))
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+class MockHospitalStore:
+    """Thread-safe in-memory hospitals, grouped by ``creation_batch_id``."""
+
+    def __init__(self) -> None:
+        self._ids = itertools.count(1)
+        self._batches: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        hospital = {
+            "name": payload["name"],
+            "address": payload["address"],
+            "phone": payload.get("phone"),
+            "creation_batch_id": payload.get("creation_batch_id"),
+            "active": bool(payload.get("active", False)),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+        }
+        with self._lock:
+            hospital["id"] = next(self._ids)
+            self._batches.setdefault(hospital["creation_batch_id"], []).append(hospital)
+        return dict(hospital)
+
+    def batch(self, batch_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            hospitals = self._batches.get(batch_id)
+            return None if hospitals is None else [dict(h) for h in hospitals]
+
+    def activate(self, batch_id: str) -> Optional[int]:
+        with self._lock:
+            hospitals = self._batches.get(batch_id)
+            if hospitals is None:
+                return None
+            for hospital in hospitals:
+                hospital["active"] = True
+            return len(hospitals)
+
+    def delete(self, batch_id: str) -> Optional[int]:
+        with self._lock:
+            hospitals = self._batches.pop(batch_id, None)
+            return None if hospitals is None else len(hospitals)
+
+
+def _trickle(body: bytes, seconds: float, chunks: int = 20) -> Iterator[bytes]:
+    """Yield ``body`` in ``chunks`` pieces spread over ``seconds``, like a slow-loris peer."""
+    step = max(1, math.ceil(len(body) / chunks))
+    pieces = [body[i:i + step] for i in range(0, len(body), step)] or [b""]
+    pause = seconds / len(pieces)
+    for piece in pieces:
+        time.sleep(pause)
+        yield piece
+
+
+def create_mock_app(profile: Optional[MockProfile] = None, store: Optional[MockHospitalStore] = None) -> Flask:
+    profile = profile or MockProfile()
+    store = store or MockHospitalStore()
+    rng = random.Random(profile.seed)
+    rng_lock = threading.Lock()
+    bucket = TokenBucket(profile.rate_limit, profile.burst) if profile.rate_limit > 0 else None
+    stats = {"requests": 0, "throttled": 0, "injected_errors": 0, "slow_loris": 0}
+    stats_lock = threading.Lock()
+    default_latency = profile.latency.get(DEFAULT_OPERATION)
+
+    def _random() -> float:
+        with rng_lock:
+            return rng.random()
+
+    def _count(key: str) -> None:
+        with stats_lock:
+            stats[key] += 1
+
+    app = Flask(__name__)
+    app.config["MOCK_STORE"] = store
+
+    @app.before_request
+    def inject_faults():
+        if request.endpoint not in OPERATIONS:
+            return None
+        _count("requests")
+        if bucket is not None and not bucket.try_acquire():
+            _count("throttled")
+            response = jsonify({"detail": "Too many requests"})
+            response.headers["Retry-After"] = f"{profile.retry_after:g}"
+            return response, 429
+        sampler = profile.latency.get(request.endpoint, default_latency)
+        if sampler is not None:
+            with rng_lock:
+                delay = sampler(rng)
+            if delay > 0:
+                time.sleep(delay)
+        if profile.error_rate > 0 and _random() < profile.error_rate:
+            _count("injected_errors")
+            return jsonify({"detail": "Injected failure"}), profile.error_status
+        return None
+
+    @app.after_request
+    def slow_loris(response: Response) -> Response:
+        if request.endpoint in OPERATIONS and profile.slow_loris_rate > 0 and _random() < profile.slow_loris_rate:
+            _count("slow_loris")
+            body = response.get_data()
+            response.response = _trickle(body, profile.slow_loris_seconds)
+            response.headers["Content-Length"] = str(len(body))
+        return response
+
+    @app.route("/", methods=["GET", "HEAD"])
+    def root():
+        return jsonify({"status": "OK"})
+
+    @app.route("/stats", methods=["GET"])
+    def get_stats():
+        with stats_lock:
+            return jsonify(dict(stats))
+
+    @app.route("/hospitals/", methods=["POST"], endpoint=OPERATION_CREATE)
+    def create_hospital():
+        payload = request.get_json(silent=True) or {}
+        if not payload.get("name") or not payload.get("address"):
+            return jsonify({"detail": "name and address are required"}), 422
+        return jsonify(store.create(payload)), 200
+
+    @app.route("/hospitals/batch/<batch_id>", methods=["GET"], endpoint=OPERATION_GET)
+    def get_batch(batch_id):
+        hospitals = store.batch(batch_id)
+        if hospitals is None:
+            return jsonify({"detail": "Batch not found"}), 404
+        return jsonify(hospitals), 200
+
+    @app.route("/hospitals/batch/<batch_id>/activate", methods=["PATCH"], endpoint=OPERATION_ACTIVATE)
+    def activate_batch(batch_id):
+        count = store.activate(batch_id)
+        if count is None:
+            return jsonify({"detail": "Batch not found"}), 404
+        return jsonify({"batch_id": batch_id, "activated_count": count}), 200
+
+    @app.route("/hospitals/batch/<batch_id>", methods=["DELETE"], endpoint=OPERATION_DELETE)
+    def delete_batch(batch_id):
+        count = store.delete(batch_id)
+        if count is None:
+            return jsonify({"detail": "Batch not found"}), 404
+        return jsonify({"batch_id": batch_id, "deleted_count": count}), 200
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from werkzeug.serving import run_simple
+
+    parser = argparse.ArgumentParser(description="Run a local mock Hospital Directory API with latency and fault injection.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", action="append", default=[], metavar="[OPERATION=]SPEC",
+                        help="Latency distribution, e.g. 0.05, uniform:0.01:0.2, lognormal:0.05:0.5 or create=exp:0.1 (repeatable)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second before answering 429 (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=10, help="Requests allowed in a burst above --rate-limit")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429")
+    parser.add_argument("--slow-loris-rate", type=float, default=0.0, help="Fraction of responses trickled out slowly")
+    parser.add_argument("--slow-loris-seconds", type=float, default=10.0, help="How long a trickled response takes")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible latency and fault sampling")
+    args = parser.parse_args(argv)
+
+    try:
+        latency = parse_latencies(args.latency)
+    except ValueError as e:
+        parser.error(str(e))
+    profile = MockProfile(
+        latency=latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        retry_after=args.retry_after,
+        slow_loris_rate=args.slow_loris_rate,
+        slow_loris_seconds=args.slow_loris_seconds,
+        seed=args.seed,
+    )
+    run_simple(args.host, args.port, create_mock_app(profile), threaded=True)
+
+
+if __name__ == "__main__":
+    main()